@@ -1,5 +1,9 @@
 import sublime, sublime_plugin
-from datetime import datetime, timedelta
+
+import html
+import io
+import os
+import threading
 
 """
 On linux this plugin goes here:
@@ -18,195 +22,821 @@ License: The MIT License (http://www.opensource.org/licenses/mit-license.php)
 
 """
 
-def get_total_seconds(td): return (td.microseconds + (td.seconds + td.days * 24 * 3600) * 1e6) / 1e6
+try:
+    from .bluebill import timeparsing
+    from .bluebill import timesheet
+    from .bluebill import intervals
+    from .bluebill import analytics
+    from .bluebill import notes
+    from .bluebill import export
+    from .bluebill import transaction
+    from .bluebill.edits import ChangedRows, cursor_rows, edited_at_cursors
+    from .bluebill.clock import format_total, format_duration, military_labels
+
+except ImportError:
+    # loaded outside of Sublime Text (bluebill.standin)
+    from bluebill import timeparsing
+    from bluebill import timesheet
+    from bluebill import intervals
+    from bluebill import analytics
+    from bluebill import notes
+    from bluebill import export
+    from bluebill import transaction
+    from bluebill.edits import ChangedRows, cursor_rows, edited_at_cursors
+    from bluebill.clock import format_total, format_duration, military_labels
+
 
 class TimeParsingCommand(sublime_plugin.TextCommand):
-    def run(self, edit):
+    """
+    Parse the selected time range lines and insert the totals on the
+    line after each one.
+
+    With `whole_view` set, every `T:` line in the view is parsed and the
+    results are written back in a single edit. Lines that fail to parse
+    are reported and marked instead of stopping the run.
+
+    # Usage
+
+    view.run_command("time_parsing")
+    view.run_command("time_parsing", {"whole_view": True})
+
+    """
+
+    def run(self, edit, whole_view=False):
+
+        if whole_view:
+            self.parse_view(edit)
+            return
 
         # self.view.insert(edit, 0, "Hello, World!")
         view = self.view
+
+        # all of the results are inserted in one batch, see
+        # `bluebill.transaction`
+        t = transaction.EditTransaction()
+
         for region in view.sel():
             if not region.empty():
                 # Get the selected text
                 s = view.substr(region)
-                # s = self.parse_time_ranges_standard(s)
-                s = self.parse_time_ranges_military(s)
+                s = timeparsing.parse_time_ranges(s)
 
                 # replace the original
                 # view.replace(edit, region, s)
 
                 # add a new line and put the orginal after that
-                view.insert(edit, region.end(), '\n' + s)
+                t.insert(region.end(), '\n' + s)
 
-    def parse_time_ranges_standard(self, time_ranges):
+        transaction.apply_edits(view, edit, t.edits(), sublime.Region)
+
+    def parse_view(self, edit):
+        """
+        Parse every time range line in the view and write the results
+        back, one edit per result that changed (see
+        `bluebill.transaction`), so the lines in between and their
+        marks, bookmarks and folds are left alone.
         """
-        Takes  a range of time_ranges of the form:
-        T: 645am - 730am, 815am - 12pm, 1230pm - 345pm. The method attempts to
-        parse out the time ranges into proper datetime objects.
 
-        It assumes that all of the times are on the same date.
+        view = self.view
+        text = view.substr(sublime.Region(0, view.size()))
 
-        returns a properly formatted string with the total time attached:
-        06:45AM - 07:30AM, 08:15AM - 12:00PM, 12:30PM - 15:45PM (7:45:00)
+        edits, count, errors = timeparsing.time_sheet_edits(text)
 
+        transaction.apply_edits(view, edit, edits, sublime.Region)
+
+        error_regions = []
+        for offset, message in errors:
+            row, col = view.rowcol(offset)
+            error_regions.append(view.line(offset))
+            print("Line {}: {}".format(row + 1, message))
+
+        view.add_regions(
+            "bluebill_time_parsing_errors",
+            error_regions,
+            "invalid",
+            "",
+            sublime.DRAW_NO_FILL | sublime.DRAW_NO_OUTLINE | sublime.DRAW_SQUIGGLY_UNDERLINE,
+        )
+
+        sublime.status_message("Parsed {} time range lines, {} errors.".format(count, len(errors)))
+
+    def parse_time_ranges_standard(self, time_ranges):
+        """
+        Takes  a range of time_ranges of the form:
+        T: 645am - 730am, 815am - 12pm, 1230pm - 345pm and returns a
+        properly formatted string with the total time attached.
+
+        See `bluebill.timeparsing.parse_time_ranges_standard`.
         """
-        # parse the time_ranges
-        if not time_ranges.startswith('T:'):
-            raise ValueError("{} is not a valid time range".format(time_ranges))
-
-        ranges = time_ranges[2:].strip().split(',')
-        # print(tokens)
-        # ['645am - 730am', ' 815am - 12pm', ' 1230pm - 345pm']
-
-        processed_values = []
-        for time_span in ranges:
-            # time_span = '645am - 730am'
-            tokens = time_span.partition('-')
-            left = tokens[0].strip()
-            right = tokens[2].strip()
-
-            if len(right) == 0:
-                raise ValueError("missing range in {}".format(time_span))
-
-            # repair the numeric representation of the times so they are interpreted
-            # correctly
-            left_number_count = len(left[:-2])
-            if left_number_count < 4:
-                # we need to figure out where to pad
-                # case 1, 1 digit - 1pm - need leading 0 and trailing minutes so
-                #                  1pm becomes 0100pm
-                # case 2, 2 digits - 11am - pad minutes, 11am -> 1100am
-                # case 3, 3 digits - 111pm -> 1:11pm 111am <- doesn't make sense.
-                #                           111pm -> 0111pm
-                if left_number_count == 3:
-                    left = '0' + left
-
-                elif left_number_count == 2:
-                    left = left[:-2] + '00' + left[-2:]
-
-                elif left_number_count == 1:
-                    left = '0' + left[:-2] + '00' + left[-2:]
-
-            right_number_count = len(right[:-2])
-            if right_number_count < 4:
-                if right_number_count == 3:
-                    right = '0' + right
-
-                elif right_number_count == 2:
-                    right = right[:-2] + '00' + right[-2:]
-
-                elif right_number_count == 1:
-                    right = '0' + right[:-2] + '00' + right[-2:]
-
-            start_time = datetime.strptime(left, '%I%M%p')
-            end_time = datetime.strptime(right, '%I%M%p')
-
-            # see if the times need to be swapped
-            if start_time > end_time:
-                start_time, end_time = end_time, start_time
-
-            processed_values.append((start_time,
-                                     end_time,
-                                     end_time - start_time))
-
-        formatted_values = []
-        for value in processed_values:
-            formatted_values.append('{0:%I:%M%p} - {1:%I:%M%p}'.format(*value))
-
-        total_time = sum([p[-1] for p in processed_values], timedelta())
-
-        formatted_times = ', '.join(formatted_values)
-        # return '{0} ({1} -> {2}s)'.format(formatted_times,
-        #                                   total_time,
-        #                                   int(get_total_seconds(total_time)))
-
-
-
-        total_seconds = get_total_seconds(total_time)
-        days, seconds = total_time.days, total_time.seconds
-        hours = days * 24 + seconds // 3600
-        minutes = (seconds % 3600) // 60
-        # seconds = seconds % 60
-
-        decimal_hours = hours + minutes/60.0
-        return '{0} ({1}h{2}m -> {3:.2f}h -> {4}s)'.format(formatted_times,
-                                                           hours,
-                                                           minutes,
-                                                           decimal_hours,
-                                                           int(total_seconds))
+
+        return timeparsing.parse_time_ranges_standard(time_ranges)
 
     def parse_time_ranges_military(self, time_ranges):
         """
         Takes  a range of time_ranges of the form:
-        T: 0645 - 0730, 0815 - 1200, 1230 - 1545. The method attempts to
-        parse out the time ranges into proper datetime objects.
+        T: 0645 - 0730, 0815 - 1200, 1230 - 1545 and returns a properly
+        formatted string with the total time attached.
+
+        See `bluebill.timeparsing.parse_time_ranges_military`.
+        """
+
+        return timeparsing.parse_time_ranges_military(time_ranges)
+
+
+def view_date(view):
+    """
+    Return the date (YYYY-MM-DD) at the start of the file name of the
+    view, i.e. a note named by `suggest_date_based_name`, or None.
+    """
+
+    if view.file_name():
+        match = timesheet.date_pattern.match(os.path.basename(view.file_name()))
+
+        if match:
+            return match.group()
+
+    return None
+
+
+# ----
+# Overlap and gap analysis
+
+def _format_spans(spans):
+    return ", ".join(["{} - {}".format(military_labels[a], military_labels[b]) for a, b in spans])
+
+
+def format_interval_report(label, report, errors):
+    """
+    Format the analysis of a day for the output panel.
+    """
+
+    lines = [
+        label or "(no date)",
+        "    total          {}".format(format_total(report.total)),
+        "    covered        {}".format(format_total(report.covered)),
+    ]
+
+    if report.double_booked:
+        lines.append("    double booked  {}".format(format_duration(report.double_booked)))
+        lines.append("    overlaps       {}".format(_format_spans(report.overlaps)))
+
+    if report.gaps:
+        idle = sum([b - a for a, b in report.gaps])
+        lines.append("    idle           {}".format(format_duration(idle)))
+        lines.append("    gaps           {}".format(_format_spans(report.gaps)))
+
+    if errors:
+        lines.append("    bad lines      {}".format(errors))
+
+    return "\n".join(lines)
+
+
+# ctrl+` -> view.run_command("analyze_time_ranges")
+class AnalyzeTimeRangesCommand(sublime_plugin.TextCommand):
+    """
+    Check the time ranges of the day under the cursor for overlaps and
+    gaps and show the real covered time in an output panel. The day is
+    the stretch between dated headings (## 2024-03-01), see
+    `bluebill.timesheet`.
+
+    With `whole_view` set, every day in the view is analyzed.
+
+    # Usage
+
+    view.run_command("analyze_time_ranges")
+    view.run_command("analyze_time_ranges", {"whole_view": True})
+
+    """
+
+    def run(self, edit, whole_view=False):
+
+        view = self.view
+
+        sheet = timesheet.TimeSheet(view_date(view))
+        sheet.rescan(view.substr(sublime.Region(0, view.size())))
+
+        if whole_view:
+            rows = [first for label, first, last in sheet.days()]
+
+        else:
+            sel = view.sel()
+            rows = [view.rowcol(sel[0].b)[0] if len(sel) else 0]
+
+        sections = []
+        total = covered = 0
+
+        for row in rows:
+            label, spans, errors = sheet.day_spans(row)
+            report = intervals.analyze(spans)
+
+            total += report.total
+            covered += report.covered
+
+            sections.append(format_interval_report(label, report, errors))
+
+        if whole_view:
+            sections.append("{} days: total {}, covered {}, double booked {}".format(
+                len(rows),
+                format_duration(total),
+                format_duration(covered),
+                format_duration(total - covered),
+            ))
+
+        window = view.window()
+        panel = window.create_output_panel("bluebill_time_analysis")
+        panel.run_command("append", {"characters": "\n\n".join(sections) + "\n"})
+        window.run_command("show_panel", {"panel": "output.bluebill_time_analysis"})
+
+
+# ----
+# Analytics
+
+def _format_minute(minute):
+    return "{:02d}:{:02d}".format(*divmod(int(round(minute)) % 1440, 60))
+
+
+def format_analytics(ranges, by=("weekday", "month")):
+    """
+    Format the rollups and the start time histogram of the ranges.
+    """
+
+    results = analytics.rollups(ranges, by if "day" in by else by + ("day",))
+
+    lines = ["{:,} time ranges over {:,} days".format(len(ranges), len(results["day"]))]
+
+    for period in by:
+        lines.append("")
+        lines.append("By {}".format(period))
+
+        for r in results[period]:
+            lines.append("    {:<12} {:>10} {:>8,} ranges   avg {} - {}".format(
+                r.label,
+                format_duration(r.minutes),
+                r.count,
+                _format_minute(r.mean_start),
+                _format_minute(r.mean_end),
+            ))
+
+    counts = analytics.histogram(ranges, "start", 60)[:24]
+    scale = max(counts) if counts and max(counts) > 0 else 1
+
+    lines.append("")
+    lines.append("Start times by hour")
+    for hour, count in enumerate(counts):
+        lines.append("    {:02d} {:<40} {:,}".format(hour, "#" * int(round(40.0 * count / scale)), count))
+
+    return "\n".join(lines) + "\n"
+
+
+def new_report_view(window, name, text):
+    """
+    Open a new scratch view with the text in it.
+    """
+
+    view = window.new_file()
+    view.set_name(name)
+    view.set_scratch(True)
+    view.run_command("append", {"characters": text})
+
+    return view
+
+
+# ctrl+` -> view.run_command("time_sheet_analytics")
+class TimeSheetAnalyticsCommand(sublime_plugin.TextCommand):
+    """
+    Total every time range in the view per weekday and month (or any of
+    day, week, month, weekday) and show when the work starts, in a new
+    view. The dates come from the dated headings, see
+    `bluebill.timesheet`.
+
+    Uses NumPy for the rollups if it is available.
+
+    # Usage
+
+    view.run_command("time_sheet_analytics")
+    view.run_command("time_sheet_analytics", {"by": ["day", "week"]})
+
+    """
+
+    def run(self, edit, by=("weekday", "month")):
+
+        view = self.view
+
+        sheet = timesheet.TimeSheet(view_date(view))
+        sheet.rescan(view.substr(sublime.Region(0, view.size())))
+
+        ranges = analytics.TimeRanges.from_records(analytics.sheet_records(sheet))
+
+        new_report_view(view.window(), "Time Sheet Analytics", format_analytics(ranges, tuple(by)))
+
+
+# ----
+# Project rollup
+
+def format_rollup(ranges):
+    """
+    Format the totals of the ranges per week, with the days of each
+    week under it.
+    """
+
+    results = analytics.rollups(ranges, ("day", "week"))
+
+    days = results["day"]
+    lines = []
+    i = 0
+
+    for week in results["week"]:
+        lines.append("{:<12} {:>10}".format(week.label, format_duration(week.minutes)))
+
+        # the days are sorted so the ones in this week follow on
+        while i < len(days) and days[i].key < week.key + 7:
+            day = days[i]
+            lines.append("    {:<8} {} {:>10}".format(
+                day.label,
+                analytics.weekday_names[(day.key - 1) % 7],
+                format_duration(day.minutes),
+            ))
+            i += 1
+
+        lines.append("")
+
+    total = sum([week.minutes for week in results["week"]])
+    lines.append("Total {}".format(format_total(total)))
+
+    return "\n".join(lines) + "\n"
+
+
+_rollup_cache = None
+_rollup_lock = threading.Lock()
+
+
+def _time_sheet_cache():
+
+    global _rollup_cache
+
+    if _rollup_cache is None:
+        _rollup_cache = notes.TimeSheetCache(os.path.join(sublime.cache_path(), "Bluebill", "time_sheets.json"))
+        _rollup_cache.load()
+
+    return _rollup_cache
+
+
+# ctrl+` -> window.run_command("time_sheet_rollup")
+class TimeSheetRollupCommand(sublime_plugin.WindowCommand):
+    """
+    Total the time range lines of every note in the project folders per
+    day and per week, in a new view. The date of a note comes from its
+    file name (YYYY-MM-DD [hex].md) or from the dated headings in it.
+
+    The parsed notes are cached on disk by path, modification time and
+    size, so a repeat run only parses the notes that changed. The scan
+    runs in the background.
+
+    # Usage
+
+    window.run_command("time_sheet_rollup")
+
+    """
+
+    def run(self):
+
+        folders = self.window.folders()
+
+        if not folders:
+            sublime.status_message("Time sheet rollup: no project folders")
+            return
+
+        if not _rollup_lock.acquire(False):
+            sublime.status_message("Time sheet rollup: already running")
+            return
+
+        sublime.status_message("Time sheet rollup: scanning {} folder(s)...".format(len(folders)))
+        sublime.set_timeout_async(lambda: self.scan(folders), 0)
+
+    def scan(self, folders):
+
+        try:
+            cache = _time_sheet_cache()
+
+            paths, parsed = cache.update(folders)
+            ranges = analytics.TimeRanges.from_records(cache.records(paths))
+
+            lines = ["{:,} notes, {:,} parsed, {:,} from the cache".format(len(paths), parsed, len(paths) - parsed), ""]
+
+            errors = cache.errors(paths)
+            if errors:
+                lines.append("Notes with lines that could not be parsed:")
+                lines.extend(["    {} ({})".format(path, count) for path, count in errors])
+                lines.append("")
 
-        It assumes that all of the times are on the same date.
+            text = "\n".join(lines) + "\n" + format_rollup(ranges)
 
-        returns a properly formatted string with the total time attached:
-        0645 - 0730, 0815 - 1200, 1230 - 1545 (7:45:00)
+            cache.save()
 
+        finally:
+            _rollup_lock.release()
+
+        sublime.set_timeout(lambda: new_report_view(self.window, "Time Sheet Rollup", text), 0)
+
+
+# ----
+# Export
+
+def _export_async(records, path, format, errors):
+    """
+    Write the records in the background and report the result in the
+    status bar and the console.
+    """
+
+    def work():
+
+        try:
+            count = export.export(records, path, format)
+
+        except (IOError, OSError, ValueError) as e:
+            sublime.status_message("Time sheet export failed: {}".format(e))
+            return
+
+        for source, line, msg in errors:
+            print("{}:{}: {}".format(source, line, msg))
+
+        sublime.status_message("Exported {:,} time ranges to {} ({} errors)".format(count, path, len(errors)))
+
+    sublime.set_timeout_async(work, 0)
+
+
+# ctrl+` -> view.run_command("export_time_sheet", {"format": "csv"})
+class ExportTimeSheetCommand(sublime_plugin.TextCommand):
+    """
+    Export every time range in the view to CSV or JSON Lines, one row
+    per range with the date, start, end, minutes, source file and line.
+    Asks for the file to write if the path isn't given.
+
+    # Usage
+
+    view.run_command("export_time_sheet")
+    view.run_command("export_time_sheet", {"format": "jsonl", "path": "/tmp/hours.jsonl"})
+
+    """
+
+    def run(self, edit, format="csv", path=None):
+
+        view = self.view
+
+        if path is None:
+            base = os.path.splitext(view.file_name() or os.path.join(os.path.expanduser("~"), "time_sheet"))[0]
+
+            view.window().show_input_panel(
+                "Export time sheet to:",
+                base + "." + format,
+                lambda path: view.run_command("export_time_sheet", {"format": format, "path": path}),
+                None,
+                None,
+            )
+            return
+
+        # the text has to be read on the main thread, the lines are
+        # split as they are exported
+        text = view.substr(sublime.Region(0, view.size()))
+
+        errors = []
+        records = export.time_records(io.StringIO(text), view_date(view), view.file_name() or view.name(), errors)
+
+        _export_async(records, path, format, errors)
+
+
+# ctrl+` -> window.run_command("export_project_time_sheet", {"format": "csv"})
+class ExportProjectTimeSheetCommand(sublime_plugin.WindowCommand):
+    """
+    Export every time range in the notes of the project folders to CSV
+    or JSON Lines, see `ExportTimeSheetCommand`. The notes are read and
+    written one line at a time in the background.
+
+    # Usage
+
+    window.run_command("export_project_time_sheet")
+    window.run_command("export_project_time_sheet", {"format": "jsonl", "path": "/tmp/hours.jsonl"})
+
+    """
+
+    def run(self, format="csv", path=None):
+
+        window = self.window
+        folders = window.folders()
+
+        if not folders:
+            sublime.status_message("Time sheet export: no project folders")
+            return
+
+        if path is None:
+            window.show_input_panel(
+                "Export project time sheet to:",
+                os.path.join(folders[0], "time_sheet." + format),
+                lambda path: window.run_command("export_project_time_sheet", {"format": format, "path": path}),
+                None,
+                None,
+            )
+            return
+
+        errors = []
+        records = export.note_records(notes.note_files(folders), errors)
+
+        _export_async(records, path, format, errors)
+
+
+# ----
+# Live totals
+
+def _live_totals_enabled(view):
+
+    settings = sublime.load_settings("Bluebill.sublime-settings")
+
+    return view.settings().get("bluebill_live_time_totals", settings.get("live_time_totals", False))
+
+
+# Sublime Text 4 reports the rows every edit changed (see
+# `LiveTimeTotalsChanges`), Sublime Text 3 only the cursor rows can be
+# recorded
+exact_changes = hasattr(sublime_plugin, "TextChangeListener")
+
+
+class _LiveTotals(object):
+    """
+    The live total state of a single view.
+    """
+
+    def __init__(self, view):
+
+        self.sheet = timesheet.TimeSheet(view_date(view))
+        self.phantoms = sublime.PhantomSet(view, "bluebill_live_time_totals")
+
+        # debounce counters for edits and for redraws
+        self.pending = 0
+        self.pending_draw = 0
+
+        # the rows the current burst of edits can have changed
+        self.changes = ChangedRows(exact_changes)
+
+        # rebuild the sheet from scratch on the next refresh
+        self.full = True
+
+
+# ctrl+` -> view.run_command("toggle_live_time_totals")
+class ToggleLiveTimeTotalsCommand(sublime_plugin.TextCommand):
+    """
+    Turn the live time totals on or off for the view.
+    """
+
+    def run(self, edit):
+
+        enabled = not _live_totals_enabled(self.view)
+        self.view.settings().set("bluebill_live_time_totals", enabled)
+
+        if enabled:
+            LiveTimeTotalsListener.refresh(self.view)
+
+        else:
+            LiveTimeTotalsListener.clear(self.view)
+
+        sublime.status_message("Live time totals {}.".format("on" if enabled else "off"))
+
+
+class LiveTimeTotalsListener(sublime_plugin.EventListener):
+    """
+    Show the total of each time range line next to it and the total for
+    the day under the cursor in the status bar, updated as the view is
+    edited.
+
+    Edits are debounced. Only the rows the edits changed are parsed
+    again, the lines after them are just moved. The rows are reported by
+    the editor (`LiveTimeTotalsChanges`), or in Sublime Text 3 bounded
+    by the cursor rows recorded on every edit and cursor move, an edit
+    not made at the cursors (Replace All, another plugin) rebuilds the
+    sheet.
+    Parse results are also cached by line content. The sheet is rebuilt
+    from the whole buffer when the view is activated or saved. Phantoms
+    are only drawn for the visible lines.
+
+    Enable it with the `live_time_totals` setting or the
+    `toggle_live_time_totals` command.
+    """
+
+    views = {}
+
+    # The most rows an incremental update will parse before it rebuilds
+    # the sheet instead.
+    max_incremental_rows = 2000
+
+    @classmethod
+    def state(cls, view):
+
+        state = cls.views.get(view.id())
+
+        if state is None:
+            state = cls.views[view.id()] = _LiveTotals(view)
+
+        return state
+
+    @classmethod
+    def clear(cls, view):
+
+        state = cls.views.pop(view.id(), None)
+
+        if state is not None:
+            state.phantoms.update([])
+
+        view.erase_status("bluebill_live_time_totals")
+
+    @classmethod
+    def refresh(cls, view):
         """
-        # parse the time_ranges
-        if not time_ranges.startswith('T:'):
-            raise ValueError("{} is not a valid time range".format(time_ranges))
+        Bring the sheet up to date with the view and redraw.
+        """
+
+        state = cls.state(view)
+        sheet = state.sheet
+
+        line_count = view.rowcol(view.size())[0] + 1
+
+        bounds = None if state.full else state.changes.bounds(line_count)
+
+        if bounds is not None:
+            first, old_last, last = bounds
+
+            if last - first > cls.max_incremental_rows or old_last < first - 1:
+                state.full = True
+
+            else:
+                region = sublime.Region(view.text_point(first, 0), view.line(view.text_point(last, 0)).b)
+                sheet.replace_rows(first, old_last, view.substr(region))
+
+                if sheet.line_count != line_count:
+                    state.full = True
+
+        if state.full:
+            sheet.rescan(view.substr(sublime.Region(0, view.size())))
+            state.full = False
+
+        state.changes.reset(cursor_rows(view))
+
+        cls.draw(view, state)
+
+    @classmethod
+    def draw(cls, view, state):
+
+        sheet = state.sheet
+
+        # status bar - the day with the first cursor in it
+        sel = view.sel()
+        row = view.rowcol(sel[0].b)[0] if len(sel) else 0
+        label, spans, errors = sheet.day_spans(row)
+        report = intervals.analyze(spans)
+
+        status = "Time {}: {}".format(label or "total", format_total(report.total))
+        if report.double_booked:
+            status += ", {} double booked".format(format_duration(report.double_booked))
+
+        if errors:
+            status += " ({} bad lines)".format(errors)
+
+        view.set_status("bluebill_live_time_totals", status)
+
+        # phantoms - the visible lines only
+        visible = view.visible_region()
+        first = view.rowcol(visible.begin())[0]
+        last = view.rowcol(visible.end())[0]
+
+        phantoms = []
+        for row, result in sheet.lines_between(first, last):
+            point = view.line(view.text_point(row, 0)).b
+
+            if result.error is None:
+                content = '<span style="color: var(--greenish)">&nbsp;{}</span>'.format(html.escape(result.summary))
+
+            else:
+                content = '<span style="color: var(--redish)">&nbsp;{}</span>'.format(html.escape(result.error))
 
-        ranges = time_ranges[2:].strip().split(',')
-        # print(tokens)
-        # ['0645 - 0730', ' 0815 - 1200', ' 1230 - 1545']
+            phantoms.append(sublime.Phantom(sublime.Region(point), content, sublime.LAYOUT_INLINE))
 
-        processed_values = []
-        for time_span in ranges:
-            # time_span = '0645 - 0730'
-            tokens = time_span.partition('-')
-            left = tokens[0].strip()
-            right = tokens[2].strip()
+        state.phantoms.update(phantoms)
 
-            if len(right) == 0:
-                raise ValueError("missing range in {}".format(time_span))
+    @staticmethod
+    def _delay():
 
-            # Make sure that the times have 4 charactors and is a number
-            if len(left) != 4:
-                raise ValueError("Not enough digits in {}".format(left))
+        settings = sublime.load_settings("Bluebill.sublime-settings")
 
-            if len(right) != 4:
-                raise ValueError("Not enough digits in {}".format(right))
+        return settings.get("live_time_totals_delay", 250)
 
-            start_time = datetime.strptime(left, '%H%M')
-            end_time = datetime.strptime(right, '%H%M')
+    def _schedule_refresh(self, view, state):
 
-            # see if the times need to be swapped
-            if start_time > end_time:
-                start_time, end_time = end_time, start_time
+        state.pending += 1
 
-            processed_values.append((start_time,
-                                     end_time,
-                                     end_time - start_time))
+        def fire():
+            state.pending -= 1
 
-        formatted_values = []
-        for value in processed_values:
-            formatted_values.append('{0:%H%M} - {1:%H%M}'.format(*value))
+            # only the last edit in a burst does any work
+            if state.pending == 0 and view.is_valid():
+                self.refresh(view)
 
-        total_time = sum([p[-1] for p in processed_values], timedelta())
+        # The refresh runs on the main thread so that no edits can come
+        # in while it works out which rows changed.
+        sublime.set_timeout(fire, self._delay())
 
-        formatted_times = ', '.join(formatted_values)
-        # return '{0} ({1} -> {2}s)'.format(formatted_times,
-        #                                   total_time,
-        #                                   int(get_total_seconds(total_time)))
+    def _schedule_draw(self, view, state):
 
+        state.pending_draw += 1
+
+        def fire():
+            state.pending_draw -= 1
+
+            if state.pending_draw == 0 and state.pending == 0 and view.is_valid():
+                self.draw(view, state)
+
+        sublime.set_timeout(fire, self._delay())
+
+    def on_modified(self, view):
+
+        if not _live_totals_enabled(view):
+            return
+
+        state = self.state(view)
+
+        if not exact_changes:
+            if edited_at_cursors(view):
+                state.changes.record(cursor_rows(view))
+
+            else:
+                state.full = True
+
+        self._schedule_refresh(view, state)
+
+    def on_selection_modified(self, view):
+
+        state = self.views.get(view.id())
+
+        if state is None:
+            return
+
+        if exact_changes:
+            if not state.pending:
+                self._schedule_draw(view, state)
+
+        elif state.pending:
+            state.changes.record(cursor_rows(view))
+
+        else:
+            # the cursor moved, it may be on another day or have
+            # scrolled new lines into view
+            state.changes.reset(cursor_rows(view))
+            self._schedule_draw(view, state)
+
+    def on_activated(self, view):
+
+        if not _live_totals_enabled(view):
+            return
+
+        state = self.state(view)
+        state.full = True
+
+        self._schedule_refresh(view, state)
+
+    def on_post_save(self, view):
+
+        state = self.views.get(view.id())
+
+        if state is not None:
+            state.full = True
+            self._schedule_refresh(view, state)
+
+    def on_reload(self, view):
+        self.on_post_save(view)
+
+    def on_revert(self, view):
+        self.on_post_save(view)
+
+    def on_close(self, view):
+        self.views.pop(view.id(), None)
+
+
+if exact_changes:
+
+    class LiveTimeTotalsChanges(sublime_plugin.TextChangeListener):
+        """
+        Record the rows every edit changed for the live time totals of
+        the views of the buffer, see `LiveTimeTotalsListener`.
+        """
 
+        @classmethod
+        def is_applicable(cls, buffer):
+            return True
 
-        total_seconds = get_total_seconds(total_time)
-        days, seconds = total_time.days, total_time.seconds
-        hours = days * 24 + seconds // 3600
-        minutes = (seconds % 3600) // 60
-        # seconds = seconds % 60
+        def on_text_changed(self, changes):
 
-        decimal_hours = hours + minutes/60.0
-        return '{0} ({1}h{2}m -> {3:.2f}h -> {4}s)'.format(formatted_times,
-                                                           hours,
-                                                           minutes,
-                                                           decimal_hours,
-                                                           int(total_seconds))
+            for view in self.buffer.views():
+                state = LiveTimeTotalsListener.views.get(view.id())
 
+                if state is None:
+                    continue
 
+                for change in changes:
+                    state.changes.changed(change.a.row, change.b.row, change.a.row + change.str.count("\n"))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Time sheet analytics on a million time ranges, with NumPy and with the
+pure Python fallback.
+
+Run from the package folder:
+
+$ python benchmarks/bench_analytics.py
+
+"""
+
+import os
+import random
+import sys
+import time
+
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import analytics
+
+
+def generate_records(count, years=10):
+
+    rng = random.Random(42)
+    first = date(2015, 1, 1).toordinal()
+    days = years * 365
+
+    for i in range(count):
+        start = rng.randint(360, 1200)
+        yield first + rng.randrange(days), start, start + rng.randint(5, 180)
+
+
+def timed(label, work):
+
+    start = time.perf_counter()
+    result = work()
+    elapsed = time.perf_counter() - start
+
+    print('{:<40} {:10.3f}ms'.format(label, elapsed * 1000))
+
+    return result
+
+
+def run(name, count):
+
+    ranges = timed('{} load {:,} ranges'.format(name, count),
+                   lambda: analytics.TimeRanges.from_records(generate_records(count)))
+
+    results = timed('{} rollups (all periods)'.format(name),
+                    lambda: analytics.rollups(ranges))
+
+    timed('{} histogram (start)'.format(name),
+          lambda: analytics.histogram(ranges, 'start'))
+
+    timed('{} histogram (duration)'.format(name),
+          lambda: analytics.histogram(ranges, 'duration', bin_size=15))
+
+    return results
+
+
+def main():
+
+    count = 1000000
+
+    numpy = analytics.numpy
+
+    if numpy is None:
+        print('NumPy is not installed, only timing the pure Python path')
+
+    else:
+        with_numpy = run('numpy ', count)
+
+    analytics.numpy = None
+
+    try:
+        without_numpy = run('python', count)
+
+    finally:
+        analytics.numpy = numpy
+
+    if numpy is not None:
+        print('same results: {}'.format(with_numpy == without_numpy))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Per range cost of the time arithmetic: datetime/timedelta (the way the
+parser used to do it) against the integer minute tables in
+`bluebill.clock`.
+
+Each variant converts two HHMM tokens, orders them, takes the duration,
+adds it to a running total and formats the range.
+
+Run from the package folder:
+
+$ python benchmarks/bench_clock.py
+
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import clock
+
+
+def datetime_range(left, right, total):
+
+    start_time = datetime.strptime(left, '%H%M')
+    end_time = datetime.strptime(right, '%H%M')
+
+    if start_time > end_time:
+        start_time, end_time = end_time, start_time
+
+    total += end_time - start_time
+
+    return '{0:%H%M} - {1:%H%M}'.format(start_time, end_time), total
+
+
+def datetime_range_no_strptime(left, right, total):
+
+    start_time = datetime(1900, 1, 1, int(left[:2]), int(left[2:]))
+    end_time = datetime(1900, 1, 1, int(right[:2]), int(right[2:]))
+
+    if start_time > end_time:
+        start_time, end_time = end_time, start_time
+
+    total += end_time - start_time
+
+    return '{0:%H%M} - {1:%H%M}'.format(start_time, end_time), total
+
+
+def minutes_range(left, right, total):
+
+    start = clock.military_minutes[left]
+    end = clock.military_minutes[right]
+
+    if start > end:
+        start, end = end, start
+
+    total += end - start
+
+    labels = clock.military_labels
+    return labels[start] + ' - ' + labels[end], total
+
+
+def peak_bytes(fn, total):
+    """
+    Return the peak memory, in bytes, allocated during a single call.
+    This includes the temporary objects that are freed before the call
+    returns.
+    """
+
+    # warm up so that caches (i.e. strptime's regex) aren't counted
+    fn('1545', '0815', total)
+
+    tracemalloc.start()
+    fn('1545', '0815', total)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
+
+
+def main():
+
+    variants = [
+        ('datetime + strptime', datetime_range, timedelta()),
+        ('datetime, no strptime', datetime_range_no_strptime, timedelta()),
+        ('integer minutes', minutes_range, 0),
+    ]
+
+    print('{:<24} {:>12} {:>16}'.format('', 'ns/range', 'peak bytes/range'))
+
+    for label, fn, total in variants:
+        number = 200000
+        seconds = min(timeit.repeat(lambda: fn('1545', '0815', total), number=number, repeat=5))
+
+        print('{:<24} {:12.0f} {:16d}'.format(label, seconds / number * 1e9, peak_bytes(fn, total)))
+
+
+if __name__ == '__main__':
+    main()
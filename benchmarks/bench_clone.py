@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Cloning a 100MB view into a new note: the old command (the whole buffer
+with substr, passed as a command argument, which the editor serializes
+as JSON) against copying a chunk per pass of the UI thread, and against
+writing the note file in the background.
+
+The new view only counts what it is sent, the editor keeps the text. A
+pass of the UI thread is what the editor can't respond during, the
+longest one is shown. Peak memory is what the clone allocates on top of
+the buffer.
+
+Run from the package folder:
+
+$ python benchmarks/bench_clone.py [megabytes]
+
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+
+from bluebill import split
+
+
+class Target(object):
+    """
+    A new view that takes the arguments of a command the way the editor
+    does, as JSON.
+    """
+
+    def __init__(self):
+        self.size = 0
+
+    def run_command(self, cmd, args):
+        self.size += len(json.loads(json.dumps(args))['characters'])
+
+
+def old_clone(view, target, steps):
+
+    start = time.perf_counter()
+    target.run_command('append', {'characters': view.substr(sublime.Region(0, view.size()))})
+    steps.append(time.perf_counter() - start)
+
+
+def chunked_clone(view, target, steps, chunk_size=1 << 20):
+
+    end = view.size()
+
+    for a in range(0, end, chunk_size):
+        start = time.perf_counter()
+        target.run_command('append', {'characters': view.substr(sublime.Region(a, min(a + chunk_size, end)))})
+        steps.append(time.perf_counter() - start)
+
+
+def file_clone(view, path, steps, chunk_size=1 << 20):
+
+    split.write_parts(lambda a, b: view.substr(sublime.Region(a, b)), [(path, [(0, view.size())])], chunk_size)
+
+    # on the async thread, only opening the file is on the UI thread
+    steps.append(0.0)
+
+
+def measured(label, work):
+
+    steps = []
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    work(steps)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print('{:<28} {:10.1f}ms {:10.1f}ms {:8.1f}MB'.format(label, elapsed * 1000, max(steps) * 1000, peak / 1024.0 / 1024.0))
+
+
+def main():
+
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    line = '- [ ] meeting note line with a link to [notes](notes.md)\n'
+    view = sublime.View(line * (megabytes * 1024 * 1024 // len(line)))
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        print('{:<28} {:10.1f}MB'.format('buffer', view.size() / 1024.0 / 1024.0))
+        print('{:<28} {:>12} {:>12} {:>10}'.format('', 'total', 'longest step', 'peak'))
+
+        measured('old (whole buffer)', lambda steps: old_clone(view, Target(), steps))
+        measured('chunks of 1MB', lambda steps: chunked_clone(view, Target(), steps))
+        measured('file, in the background', lambda steps: file_clone(view, os.path.join(folder, 'clone.md'), steps))
+
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Finding the empty lines of a log-like buffer: the old select_empty_lines
+(every line as a region from split_by_newlines, then find_empty_lines)
+against blank_lines reading the buffer in chunks, with the peak memory
+of each. The chunked scan is also run over a generated buffer far
+larger than the one held in memory, which is never built as a whole.
+
+Run from the package folder:
+
+$ python benchmarks/bench_empty_lines.py [MB in memory] [MB streamed]
+
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+
+from bluebill import buffer
+
+
+def log_lines(rng):
+
+    levels = ('INFO', 'DEBUG', 'WARN', 'ERROR')
+
+    while True:
+        r = rng.random()
+
+        if r < 0.1:
+            yield ''
+
+        elif r < 0.12:
+            yield '    '
+
+        else:
+            yield '2024-03-01 10:{:02d}:{:02d} {} request handled in {}ms'.format(rng.randint(0, 59), rng.randint(0, 59), rng.choice(levels), rng.randint(1, 999))
+
+
+def generate_chunks(megabytes, size=1 << 20, distinct=16):
+
+    rng = random.Random(42)
+    lines = log_lines(rng)
+
+    # a few distinct pieces, repeated, generating them all would take
+    # longer than the scan
+    pieces = []
+
+    for i in range(min(distinct, megabytes * (1 << 20) // size)):
+        piece = []
+        length = 0
+
+        while length < size:
+            line = next(lines)
+            piece.append(line)
+            length += len(line) + 1
+
+        pieces.append('\n'.join(piece) + '\n')
+
+    for i in range(megabytes * (1 << 20) // size):
+        yield pieces[i % len(pieces)]
+
+
+def measured(label, work):
+
+    start = time.perf_counter()
+    result = work()
+    elapsed = time.perf_counter() - start
+
+    # a second run for the memory, tracing slows it down
+    tracemalloc.start()
+    work()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print('{:<36} {:10.3f}ms {:10.1f}MB peak'.format(label, elapsed * 1000, peak / 1024.0 / 1024.0))
+
+    return result
+
+
+def view_chunks(view, size=1 << 20):
+
+    end = view.size()
+
+    for a in range(0, end, size):
+        yield view.substr(sublime.Region(a, min(a + size, end)))
+
+
+def main():
+
+    held = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    streamed = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    view = sublime.View(''.join(generate_chunks(held)))
+    print('{:<36} {:10.1f}MB'.format('buffer', view.size() / 1024.0 / 1024.0))
+
+    def old():
+        return buffer.find_empty_lines(view.split_by_newlines(sublime.Region(0, view.size())))
+
+    found = measured('old, split_by_newlines', old)
+    print('{:<36} {:10,}'.format('empty lines', len(found)))
+
+    for mode in buffer.blank_modes:
+        found = measured('chunked, {}'.format(mode), lambda: sum(1 for span in buffer.blank_lines(view_chunks(view), mode)))
+        print('{:<36} {:10,}'.format('spans', found))
+
+    found = measured('chunked, first, whitespace', lambda: sum(1 for span in buffer.blank_lines(view_chunks(view), 'first', True)))
+    print('{:<36} {:10,}'.format('spans', found))
+
+    del view
+
+    # the peak includes the 16MB of generated pieces
+    found = measured('chunked, first, {}MB streamed'.format(streamed), lambda: sum(1 for span in buffer.blank_lines(generate_chunks(streamed))))
+    print('{:<36} {:10,}'.format('spans', found))
+
+
+if __name__ == '__main__':
+    main()
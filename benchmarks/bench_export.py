@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Streaming export of a notes archive, time and peak memory for a growing
+number of lines. The peak stays flat, the records are never collected.
+
+Run from the package folder:
+
+$ python benchmarks/bench_export.py
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import export
+
+from bench_live_totals import generate_notes
+
+
+def main():
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        for count in (10000, 100000, 1000000):
+            note = os.path.join(folder, '2015-01-01 abcd.md')
+
+            with open(note, 'w') as f:
+                f.write(generate_notes(count))
+
+            for format in export.formats:
+                target = os.path.join(folder, 'out.' + format)
+
+                start = time.perf_counter()
+                records = export.export(export.note_records([note]), target, format)
+                elapsed = time.perf_counter() - start
+
+                # a second run for the memory, tracing slows it down
+                tracemalloc.start()
+                export.export(export.note_records([note]), target, format)
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print('{:>9,} lines {:<5} {:>9,} records {:10.3f}ms  peak {:8.1f}KB  file {:8.1f}KB'.format(
+                    count, format, records, elapsed * 1000, peak / 1024.0, os.path.getsize(target) / 1024.0))
+
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Build time, memory and lookup latency of the project file index on a
+generated tree of empty files.
+
+Run from the package folder:
+
+$ python benchmarks/bench_fileindex.py [files]
+
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill.fileindex import FileIndex
+
+
+words = ('meeting', 'notes', 'design', 'review', 'budget', 'plan', 'draft', 'report', 'summary', 'spec')
+
+
+def generate_tree(folder, count, per_folder=100):
+
+    rng = random.Random(42)
+    names = []
+
+    for i in range(count // per_folder):
+        sub = os.path.join(folder, 'area{:02d}'.format(i % 50), 'project{:04d}'.format(i))
+        os.makedirs(sub)
+
+        for j in range(per_folder):
+            name = '{} {} {:05d}.md'.format(rng.choice(words), rng.choice(words), rng.randint(0, 99999))
+            open(os.path.join(sub, name), 'w').close()
+            names.append(os.path.join(sub, name))
+
+    return names
+
+
+def timed(label, work, repeat=1):
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = work()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    print('{:<36} {:10.3f}ms'.format(label, elapsed * 1000))
+
+    return result
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        paths = generate_tree(folder, count)
+        rng = random.Random(1)
+        note = rng.choice(paths)
+        here = os.path.dirname(note)
+
+        index = FileIndex([folder])
+
+        timed('build {:,} files'.format(count), index.build)
+
+        # a second build for the memory, tracing slows it down
+        tracemalloc.start()
+        index.build()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('{:<36} {:10.1f}MB'.format('index memory', current / 1024.0 / 1024.0))
+
+        relative = os.path.relpath(rng.choice(paths), here)
+        basename = os.path.basename(rng.choice(paths))
+
+        timed('resolve relative path', lambda: index.resolve(relative, here), 1000)
+        timed('resolve project path', lambda: index.resolve(os.path.relpath(note, folder), here), 1000)
+        timed('resolve basename', lambda: index.resolve(basename, here), 1000)
+        timed('resolve fuzzy (first, builds blob)', lambda: index.resolve('budget draft 123', here))
+        result = timed('resolve fuzzy', lambda: index.resolve('budget draft 123', here), 20)
+        print('{:<36} {:>10}'.format('fuzzy matches', len(result.paths)))
+        timed('resolve no match', lambda: index.resolve('nothing like it', here), 20)
+
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Generating IDs in bulk, for a different ID at 100,000 cursors or a
+generated file: the uuid module and random.randint one at a time
+against the batches of bluebill.ids, with the os.urandom reads the
+batches made.
+
+Run from the package folder:
+
+$ python benchmarks/bench_ids.py [count]
+
+"""
+
+import os
+import sys
+import uuid
+
+from random import randint
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import ids
+
+from bench_fileindex import timed
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print('{:<36} {:10,}'.format('IDs', count))
+
+    timed('uuid.uuid1, one at a time', lambda: [str(uuid.uuid1()) for i in range(count)])
+    timed('uuid.uuid4, one at a time', lambda: [str(uuid.uuid4()) for i in range(count)])
+    timed('randint hex, one at a time', lambda: ['{:x}'.format(randint(4096, 65535)) for i in range(count)])
+
+    for kind in ids.id_kinds:
+        pool = ids.RandomPool()
+        timed('{}, batch'.format(kind), lambda: ids.new_ids(kind, count, pool=pool))
+        print('{:<36} {:10,}'.format('  os.urandom reads', pool.reads))
+
+    found = ids.new_ids('uuid7', count)
+    print('uuid7 sorted and distinct: {}'.format(found == sorted(found) and len(set(found)) == count))
+
+
+if __name__ == '__main__':
+    main()
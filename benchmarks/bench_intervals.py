@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Overlap and gap analysis throughput.
+
+Times `bluebill.intervals.analyze` on random spans and the
+`analyze_time_ranges` command over every day of a generated note.
+
+Run from the package folder:
+
+$ python benchmarks/bench_intervals.py
+
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+import TimeParsing
+
+from bluebill import intervals
+
+from bench_live_totals import generate_notes
+
+
+def main():
+
+    rng = random.Random(42)
+
+    for count in (1000, 10000, 100000, 1000000):
+        spans = []
+        for i in range(count):
+            start = rng.randint(0, 1380)
+            spans.append((start, start + rng.randint(1, 59)))
+
+        start = time.perf_counter()
+        report = intervals.analyze(spans)
+        elapsed = time.perf_counter() - start
+
+        print('analyze {:>9,} spans {:10.3f}ms'.format(count, elapsed * 1000))
+
+    text = generate_notes(200000)
+    window = sublime.active_window()
+    view = window.new_file()
+    view.run_command('append', {'characters': text})
+
+    start = time.perf_counter()
+    view.run_command('analyze_time_ranges', {'whole_view': True})
+    elapsed = time.perf_counter() - start
+
+    panel = window.find_output_panel('bluebill_time_analysis')
+    summary = panel.substr(panel.line(panel.size() - 1))
+
+    print('analyze_time_ranges, 200k line note {:10.3f}ms'.format(elapsed * 1000))
+    print(summary)
+
+
+if __name__ == '__main__':
+    main()
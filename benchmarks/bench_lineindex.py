@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+find_regions_by_selections and selected_lines with many cursors on a
+large buffer, asking the view for every row against the line index, and
+the build time and size of the index.
+
+The stand-in view answers rowcol and text_point from a list in the same
+process, in Sublime Text every one of those calls goes to the editor, so
+the calls made are counted too.
+
+Run from the package folder:
+
+$ python benchmarks/bench_lineindex.py [lines] [cursors]
+
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+
+from bluebill import buffer
+from bluebill.lineindex import LineIndex
+
+
+class CountingView(sublime.View):
+
+    def __init__(self, text):
+        sublime.View.__init__(self, text)
+        self.calls = 0
+
+    def rowcol(self, tp):
+        self.calls += 1
+        return sublime.View.rowcol(self, tp)
+
+    def text_point(self, row, col):
+        self.calls += 1
+        return sublime.View.text_point(self, row, col)
+
+    def line(self, x):
+        self.calls += 1
+        return sublime.View.line(self, x)
+
+
+def chunks(view, size=1 << 20):
+
+    end = view.size()
+
+    for a in range(0, end, size):
+        yield view.substr(sublime.Region(a, min(a + size, end)))
+
+
+def timed(label, view, work, repeat=5):
+
+    view.calls = 0
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = work()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    print('{:<36} {:10.3f}ms {:10,} view calls'.format(label, elapsed * 1000, view.calls // repeat))
+
+    return result
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    cursors = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    rng = random.Random(42)
+    view = CountingView('\n'.join(['line {} of the buffer with some text'.format(i) for i in range(count)]))
+
+    view.sel().clear()
+    for row in sorted(rng.sample(range(count), cursors)):
+        point = view.text_point(row, 5)
+        view.sel().add(sublime.Region(point, point + rng.choice((0, 0, 3))))
+
+    print('{:<36} {:10,} lines {:,} cursors'.format('buffer', count, len(view.sel())))
+
+    index = timed('build the index', view, lambda: LineIndex(chunks(view), view.change_count()), repeat=1)
+
+    tracemalloc.start()
+    LineIndex(chunks(view))
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print('{:<36} {:10.1f}MB (a list of ints {:.1f}MB)'.format('index size (peak while built)', size / 1024.0 / 1024.0, (len(index) * 8 + len(index) * 28) / 1024.0 / 1024.0))
+
+    found = timed('find_regions, view', view, lambda: buffer.find_regions_by_selections(view))
+    same = timed('find_regions, index', view, lambda: buffer.find_regions_by_selections(view, index))
+    print('same result: {}'.format(found == same))
+
+    found = timed('selected_lines, view', view, lambda: buffer.selected_lines(view))
+    same = timed('selected_lines, index', view, lambda: buffer.selected_lines(view, index))
+    print('same result: {}'.format(found == same))
+
+    timed('1,000 rowcol, index', view, lambda: [index.rowcol(p) for p in range(0, view.size(), view.size() // 1000)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Resolving the links of a daily note through the project file index
+against the resolved link cache, and loading and saving the cache.
+
+Run from the package folder:
+
+$ python benchmarks/bench_linkcache.py [files] [links]
+
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill.fileindex import FileIndex
+from bluebill.linkcache import ResolvedLinks
+
+from bench_fileindex import generate_tree, timed
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        paths = generate_tree(folder, count)
+        rng = random.Random(1)
+        here = os.path.dirname(rng.choice(paths))
+
+        index = FileIndex([folder])
+        index.build()
+
+        # links that only name the file, the common case in notes
+        links = [os.path.basename(p) for p in rng.sample(paths, size)]
+        cache = ResolvedLinks(os.path.join(folder, 'resolved_links.json'), max_size=size)
+
+        def resolve():
+            for link in links:
+                index.resolve(link, here)
+
+        def cached():
+            for link in links:
+                path = cache.get(folder, here, link)
+
+                if path is None:
+                    paths, exact = index.resolve(link, here)
+
+                    if exact:
+                        cache.put(folder, here, link, paths[0])
+
+        timed('resolve {:,} links'.format(size), resolve)
+        timed('cache, first lookup', cached)
+        timed('cache, every link a hit', cached, repeat=5)
+
+        timed('save', cache.save)
+        timed('load', cache.load, repeat=5)
+        print('{:<36} {:10.1f}KB'.format('cache file', os.path.getsize(cache.path) / 1024.0))
+        print(cache.stats())
+
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
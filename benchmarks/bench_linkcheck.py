@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Broken link check over a generated archive of notes that link to each
+other, to images and to files that don't exist: a check with an empty
+stat cache, a repeat check within its time to live and a check with
+one worker thread.
+
+Run from the package folder:
+
+$ python benchmarks/bench_linkcheck.py [notes] [links per note]
+
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill.fileindex import FileIndex
+from bluebill.linkcheck import LinkChecker, StatCache
+from bluebill.notes import note_files
+
+
+def generate_archive(folder, count, links):
+
+    rng = random.Random(42)
+
+    os.makedirs(os.path.join(folder, 'images'))
+    images = ['images/figure {:03d}.png'.format(i) for i in range(200)]
+
+    for image in images:
+        open(os.path.join(folder, image), 'w').close()
+
+    names = ['{:04d}-{:02d}-{:02d} {:04x}.md'.format(2015 + i // 360, i // 30 % 12 + 1, i % 30 + 1, i) for i in range(count)]
+
+    for i, name in enumerate(names):
+        sub = os.path.join(folder, 'notes', str(i // 500))
+
+        if i % 500 == 0:
+            os.makedirs(sub)
+
+        lines = ['# {}'.format(name)]
+
+        for j in range(links):
+            r = rng.random()
+
+            if r < 0.4:
+                lines.append('- see [{}]({})'.format(j, rng.choice(names).replace(' ', '%20')))
+
+            elif r < 0.6:
+                lines.append('![figure](../../{})'.format(rng.choice(images)))
+
+            elif r < 0.8:
+                lines.append('- [[{}]] and more text'.format(os.path.splitext(rng.choice(names))[0]))
+
+            elif r < 0.95:
+                lines.append('open "{}" later'.format(rng.choice(images)))
+
+            else:
+                lines.append('a [dead link](missing/{:05d}.md)'.format(rng.randint(0, 99999)))
+
+        with open(os.path.join(sub, name), 'w') as f:
+            f.write('\n'.join(lines))
+
+
+def timed(label, work):
+
+    start = time.perf_counter()
+    result = work()
+    elapsed = time.perf_counter() - start
+
+    print('{:<36} {:10.3f}ms'.format(label, elapsed * 1000))
+
+    return result
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    links = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        generate_archive(folder, count, links)
+
+        index = FileIndex([folder])
+        timed('build the file index', index.build)
+
+        paths = list(note_files([folder]))
+        stats = StatCache()
+
+        checker = LinkChecker([folder], index, stats, workers=8)
+
+        broken = timed('{:,} links, empty cache'.format(count * links), lambda: list(checker.check_files(paths)))
+        print('{:<36} {:10,}'.format('broken', len(broken)))
+        print('{:<36} {:10,}'.format('stat calls', stats.misses))
+
+        timed('repeat check, cached', lambda: list(checker.check_files(paths)))
+
+        stats.clear()
+        single = LinkChecker([folder], index, stats, workers=1)
+        timed('one worker, empty cache', lambda: list(single.check_files(paths)))
+
+        # the same check without the stat cache
+        class Uncached(StatCache):
+
+            def exists(self, path):
+                return os.path.exists(path)
+
+        uncached = LinkChecker([folder], index, Uncached(), workers=8)
+        timed('no stat cache', lambda: list(uncached.check_files(paths)))
+
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Building, saving and loading the link graph of a generated archive of
+notes, and the backlink and orphan lookups.
+
+Run from the package folder:
+
+$ python benchmarks/bench_linkgraph.py [notes] [links per note]
+
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill.fileindex import FileIndex
+from bluebill.linkgraph import LinkGraph
+
+from bench_fileindex import timed
+from bench_linkcheck import generate_archive
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    links = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        generate_archive(folder, count, links)
+
+        index = FileIndex([folder])
+        index.build()
+
+        graph = LinkGraph(os.path.join(folder, 'link_graph.json'))
+
+        paths, scanned = timed('first update', lambda: graph.update([folder], index))
+        print('{:<36} {:10,}'.format('notes', len(paths)))
+        print('{:<36} {:10,}'.format('links', graph.link_count()))
+
+        timed('repeat update (nothing changed)', lambda: graph.update([folder], index))
+
+        timed('save', graph.save)
+        print('{:<36} {:10.1f}MB'.format('graph file', os.path.getsize(graph.path) / 1024.0 / 1024.0))
+
+        fresh = LinkGraph(graph.path)
+        timed('load', fresh.load)
+
+        rng = random.Random(7)
+        targets = rng.sample(paths, 100)
+
+        found = timed('backlinks, 100 notes', lambda: [graph.backlinks(path) for path in targets])
+        print('{:<36} {:10.1f}'.format('backlinks per note', sum([len(f) for f in found]) / 100.0))
+
+        orphans = timed('orphans', lambda: graph.orphans([folder]), repeat=5)
+        print('{:<36} {:10,}'.format('orphan notes', len(orphans)))
+
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+The link index of a large note: the first scan, an update after typing
+in one line and after pressing enter, and the lookups from a cursor.
+
+Run from the package folder:
+
+$ python benchmarks/bench_links.py [lines]
+
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+import bluebill_utilities
+
+from bluebill.links import LinkIndex
+
+
+lines = (
+    'see [the spec](docs/spec{}.md) for the details',
+    'plain text, nothing to open on this line at all',
+    'notes on [[Meeting {}]] and `src/main.py`',
+    '[ref{0}]: ../refs/ref{0}.md',
+    'read [the doc][ref{}] or https://example.com/page{}',
+    '',
+    '- [] todo item for ~/work/item{}.txt',
+)
+
+
+def generate_note(count):
+
+    rng = random.Random(42)
+
+    return '\n'.join([rng.choice(lines).format(i, i) for i in range(count)])
+
+
+def timed(label, work, repeat=1):
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = work()
+    elapsed = (time.perf_counter() - start) / repeat
+
+    print('{:<36} {:10.3f}ms'.format(label, elapsed * 1000))
+
+    return result
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    view = sublime.active_window().new_file()
+    view.run_command('append', {'characters': generate_note(count)})
+
+    listener = bluebill_utilities.LinkIndexListener()
+    index = timed('first scan, {:,} lines'.format(count), lambda: listener.index(view))
+    print('{:<36} {:>10,}'.format('links', len(index)))
+
+    rng = random.Random(1)
+    middle = view.text_point(count // 2, 5)
+
+    def edit(characters):
+        # the edit itself isn't timed, the stand-in view copies the
+        # whole buffer on every insert
+        view.sel().clear()
+        view.sel().add(middle)
+        listener.on_selection_modified(view)
+        view.insert(sublime.Edit(view), middle, characters)
+        listener.on_modified(view)
+        listener.on_selection_modified(view)
+
+        start = time.perf_counter()
+        listener.index(view)
+        return time.perf_counter() - start
+
+    for label, characters in (('typing a character', 'x'), ('pressing enter', '\n')):
+        elapsed = sum([edit(characters) for i in range(100)]) / 100
+        print('{:<36} {:10.3f}ms'.format('update after ' + label, elapsed * 1000))
+
+    reference = LinkIndex()
+    reference.rescan(view.substr(sublime.Region(0, view.size())))
+    print('{:<36} {:>10}'.format('same as a rescan', reference.rows == index.rows and reference.links == index.links))
+
+    rows = [rng.randrange(count) for i in range(10000)]
+    timed('at(), 10k lookups', lambda: [index.at(row, 12) for row in rows])
+    timed('next(), 10k lookups', lambda: [index.next(row, 12) for row in rows])
+    timed('previous(), 10k lookups', lambda: [index.previous(row, 12) for row in rows])
+
+
+if __name__ == '__main__':
+    main()
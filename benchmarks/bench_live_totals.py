@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Cost of the live time totals per keystroke.
+
+Builds a note with a dated heading per day, a few text lines and a `T:`
+line for each day, then times:
+
+- the first scan of the buffer
+- typing a character in a `T:` line (same number of lines)
+- pressing enter (the line count changes and the sheet is rebuilt)
+
+Run from the package folder:
+
+$ python benchmarks/bench_live_totals.py [lines]
+
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+import TimeParsing
+
+from datetime import date, timedelta
+
+
+def generate_notes(count, seed=42):
+
+    rng = random.Random(seed)
+    day = date(2015, 1, 1)
+    lines = []
+
+    while len(lines) < count:
+        lines.append('## {}'.format(day.isoformat()))
+        lines.append('')
+        for i in range(rng.randint(2, 6)):
+            lines.append('- worked on item {} of the project'.format(rng.randint(1, 1000)))
+
+        spans = []
+        for j in range(rng.randint(1, 4)):
+            a = rng.randint(0, 1439)
+            b = rng.randint(0, 1439)
+            spans.append('{:02d}{:02d} - {:02d}{:02d}'.format(a // 60, a % 60, b // 60, b % 60))
+
+        lines.append('T: ' + ', '.join(spans))
+        lines.append('')
+
+        day += timedelta(days=1)
+
+    return '\n'.join(lines)
+
+
+def timed(label, fn, repeat=50):
+    """
+    fn does its setup and returns the listener work to time.
+    """
+
+    times = []
+    for i in range(repeat):
+        work = fn()
+
+        start = time.perf_counter()
+        work()
+        times.append(time.perf_counter() - start)
+
+    times.sort()
+    print('{:<32} median {:8.3f}ms  max {:8.3f}ms'.format(label, times[len(times) // 2] * 1000, times[-1] * 1000))
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    text = generate_notes(count)
+
+    view = sublime.View(text)
+    view.settings().set('bluebill_live_time_totals', True)
+
+    listener = TimeParsing.LiveTimeTotalsListener()
+
+    print('{:,} lines, {:,} characters'.format(text.count('\n') + 1, len(text)))
+
+    def first_scan():
+        TimeParsing.LiveTimeTotalsListener.views.clear()
+        return lambda: listener.on_activated(view)
+
+    timed('first scan', first_scan, repeat=5)
+
+    # put the cursor at the end of a time range line in the middle
+    time_lines = view.find_all(r'^T:.*$')
+    middle = time_lines[len(time_lines) // 2]
+    print('{:,} time range lines'.format(len(TimeParsing.LiveTimeTotalsListener.state(view).sheet.rows)))
+
+    view.sel().clear()
+    view.sel().add(middle.b)
+    listener.on_selection_modified(view)
+
+    edit = sublime.Edit(view)
+
+    # The stand-in runs the debounced refresh straight away, so each
+    # call below is an edit, its event and the refresh.
+    def typed(characters):
+
+        def setup():
+            view.insert(edit, view.sel()[0].b, characters)
+
+            def work():
+                listener.on_modified(view)
+                listener.on_selection_modified(view)
+
+            return work
+
+        return setup
+
+    timed('keystroke in a T: line', typed('5'))
+    timed('enter', typed('\n'))
+    timed('paste a 3 line time sheet', typed('\n## 2030-01-01\nT: 0800 - 0900\n'))
+
+    print(view.get_status('bluebill_live_time_totals'))
+
+
+if __name__ == '__main__':
+    main()
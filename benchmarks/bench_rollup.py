@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Project time sheet rollup over a folder of dated notes, the first run
+(every note parsed) against a repeat run (everything from the cache)
+and a run after a few notes changed.
+
+Run from the package folder:
+
+$ python benchmarks/bench_rollup.py [notes]
+
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+import TimeParsing
+
+from datetime import date, timedelta
+
+from bench_live_totals import generate_notes
+
+
+def write_notes(folder, count):
+
+    rng = random.Random(42)
+    day = date(2015, 1, 1)
+    paths = []
+
+    for i in range(count):
+        path = os.path.join(folder, '{} {:04x}.md'.format(day.isoformat(), rng.randint(0, 0xffff)))
+
+        # the dated headings are stripped, the date comes from the name
+        text = '\n'.join([line for line in generate_notes(20, seed=i).split('\n') if not line.startswith('#')])
+
+        with open(path, 'w') as f:
+            f.write(text)
+
+        paths.append(path)
+        day += timedelta(days=1)
+
+    return paths
+
+
+def timed(label, window):
+
+    start = time.perf_counter()
+    window.run_command('time_sheet_rollup')
+    elapsed = time.perf_counter() - start
+
+    view = window.active_view()
+    print('{:<24} {:10.3f}ms   {}'.format(label, elapsed * 1000, view.substr(view.line(0))))
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    folder = tempfile.mkdtemp()
+    cache = tempfile.mkdtemp()
+
+    try:
+        paths = write_notes(folder, count)
+
+        window = sublime.active_window()
+        window.set_project_data({"folders": [{"path": folder}]})
+
+        TimeParsing._rollup_cache = TimeParsing.notes.TimeSheetCache(os.path.join(cache, 'time_sheets.json'))
+
+        timed('first run', window)
+        timed('repeat run', window)
+
+        for path in paths[:10]:
+            with open(path, 'a') as f:
+                f.write('\nT: 0800 - 0900\n')
+
+        timed('10 notes changed', window)
+
+        # a new session, the cache is read from disk
+        TimeParsing._rollup_cache = TimeParsing.notes.TimeSheetCache(os.path.join(cache, 'time_sheets.json'))
+        TimeParsing._rollup_cache.load()
+
+        timed('new session', window)
+
+    finally:
+        shutil.rmtree(folder)
+        shutil.rmtree(cache)
+
+
+if __name__ == '__main__':
+    main()
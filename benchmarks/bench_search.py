@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Building, saving and loading the full text search index of a generated
+archive of notes, and the latency of a search.
+
+Run from the package folder:
+
+$ python benchmarks/bench_search.py [notes] [lines per note]
+
+"""
+
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill.search import SearchIndex
+
+from bench_fileindex import timed
+
+
+def vocabulary(count, rng):
+
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+
+    return [''.join([rng.choice(letters) for i in range(rng.randint(3, 10))]) for j in range(count)]
+
+
+def write_notes(folder, count, lines):
+
+    rng = random.Random(42)
+    words = vocabulary(20000, rng)
+
+    # a few words are common, most are rare
+    weights = list(itertools.accumulate([1.0 / (rank + 1) for rank in range(len(words))]))
+
+    for i in range(count):
+        sub = os.path.join(folder, str(i // 500))
+
+        if i % 500 == 0:
+            os.makedirs(sub)
+
+        drawn = rng.choices(words, cum_weights=weights, k=lines * 15)
+        text = '\n'.join([' '.join(drawn[j * 15:j * 15 + rng.randint(3, 15)]) for j in range(lines)])
+
+        with open(os.path.join(sub, '{:05d}.md'.format(i)), 'w') as f:
+            f.write(text)
+
+    return words
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        words = write_notes(folder, count, lines)
+
+        index = SearchIndex(os.path.join(folder, 'search_index.json'))
+
+        timed('first update', lambda: index.update([folder]))
+        print('{:<36} {:10,}'.format('words', len(index.postings)))
+
+        timed('repeat update (nothing changed)', lambda: index.update([folder]))
+
+        timed('save', index.save)
+        print('{:<36} {:10.1f}MB'.format('index file', os.path.getsize(index.path) / 1024.0 / 1024.0))
+
+        timed('load', SearchIndex(index.path).load)
+
+        queries = [
+            ('common word', words[0]),
+            ('rare word', words[5000]),
+            ('two common words', '{} {}'.format(words[0], words[1])),
+            ('common and rare', '{} {}'.format(words[1], words[3000])),
+            ('prefix of 2 letters', words[2][:2]),
+            ('three words, last a prefix', '{} {} {}'.format(words[3], words[10], words[20][:3])),
+        ]
+
+        for label, query in queries:
+            # min of 5, the first search builds the sorted word list
+            elapsed = []
+            for i in range(5):
+                start = time.perf_counter()
+                hits = index.search(query)
+                elapsed.append(time.perf_counter() - start)
+
+            print('{:<36} {:10.3f}ms   {:,} hits'.format(label, min(elapsed) * 1000, len(hits)))
+
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
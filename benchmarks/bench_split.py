@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Splitting a large log at a few cursors into files: the old way (the
+text of each region joined in memory, the way new_view_from_region
+passed it to a new view) against bluebill.split writing each part a
+chunk at a time. Peak memory is what the split allocates on top of the
+buffer.
+
+Run from the package folder:
+
+$ python benchmarks/bench_split.py [megabytes] [cursors]
+
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import split
+
+
+def old_split(text, parts):
+
+    for path, ranges in parts:
+        joined = '\n'.join([text[a:b] for a, b in ranges])
+
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(joined)
+
+
+def measured(label, work):
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    work()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print('{:<36} {:10.1f}ms {:8.1f}MB peak'.format(label, elapsed * 1000, peak / 1024.0 / 1024.0))
+
+
+def main():
+
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cursors = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    line = '2020-06-20 14:05:01 INFO request served in 12ms from the cache\n'
+    text = line * (megabytes * 1024 * 1024 // len(line))
+
+    # split at evenly spaced line starts
+    step = len(text) // (cursors + 1) // len(line) * len(line)
+    points = [0] + [step * (i + 1) for i in range(cursors)] + [len(text)]
+    regions = list(zip(points, points[1:]))
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        parts = split.split_parts(os.path.join(folder, 'server.log'), regions)
+        print('{:<36} {:10.1f}MB {} parts'.format('buffer', len(text) / 1024.0 / 1024.0, len(parts)))
+
+        measured('old (joined in memory)', lambda: old_split(text, parts))
+
+        for chunk_size in (1 << 16, 1 << 20, 1 << 22):
+            measured('chunks of {:,}'.format(chunk_size), lambda: split.write_parts(lambda a, b: text[a:b], parts, chunk_size))
+
+        print('{:<36} {}'.format('same files', sum(os.path.getsize(p) for p, r in parts) == len(text)))
+
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Opening the new note menu and making a note from a template, with
+hundreds of templates: the old command (glob the folder for the menu,
+read the file and parse it with string.Template for every note) against
+a TemplateFolder, listed and compiled once and kept until the folder or
+the file changes.
+
+Run from the package folder:
+
+$ python benchmarks/bench_templates.py [templates]
+
+"""
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+
+from datetime import datetime
+from string import Template
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import templates
+
+from bench_fileindex import timed
+
+
+def make_templates(folder, count):
+
+    body = '\n'.join(['## Item {} for $Project on $Date at $Time'.format(i) for i in range(40)])
+
+    for i in range(count):
+        with open(os.path.join(folder, 'template {:04d}.md'.format(i)), 'w', encoding='utf-8') as f:
+            f.write('# $Name\n\nid: $UUID\n\n{}\n'.format(body))
+
+
+def old_menu(folder):
+    return [(os.path.splitext(os.path.basename(f))[0], f) for f in sorted(glob.glob(os.path.join(folder, '*')))]
+
+
+def old_note(path, variables):
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return Template(f.read()).safe_substitute(variables)
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    root = tempfile.mkdtemp()
+    folder = os.path.join(root, '.templates')
+    os.mkdir(folder)
+
+    try:
+        make_templates(folder, count)
+        print('{:<36} {:10,}'.format('templates', count))
+
+        variables = templates.note_variables(datetime.now(), '0b5f1c8e-0000-4000-8000-000000000000', 'notes', '2020-06-20 [1a2b].md')
+
+        menu = old_menu(folder)
+        timed('old menu (glob)', lambda: old_menu(folder), repeat=100)
+        timed('old note (read + Template)', lambda: [old_note(f, variables) for m, f in menu[:100]], repeat=10)
+
+        cached = templates.TemplateFolder(folder)
+        timed('first menu (list the folder)', cached.names)
+        timed('precompile every template', cached.precompile)
+        timed('menu (folder unchanged)', cached.names, repeat=100)
+
+        names = cached.names()
+        notes = timed('100 notes (compiled)', lambda: [cached.render(n, variables) for n in names[:100]], repeat=10)
+        print('same text: {}'.format(notes == [old_note(f, variables) for m, f in menu[:100]]))
+        print('{:<36} {:10,}'.format('templates read', cached.reads))
+
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Time sheet parsing throughput.
+
+Compares the original strptime based parser (kept here as the
+reference) with the compiled tokenizer, one line at a time, and the
+whole view batch mode of `time_parsing` on a generated time sheet.
+
+Run from the package folder:
+
+$ python benchmarks/bench_timeparsing.py [lines]
+
+"""
+
+import os
+import random
+import sys
+import time
+
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+import TimeParsing
+
+from bluebill import timeparsing
+
+
+class RecordingView(sublime.View):
+    """
+    Counts the edits instead of making them. The stand-in copies the
+    whole text on every edit, which the editor doesn't.
+    """
+
+    def __init__(self, text):
+        sublime.View.__init__(self, text)
+        self.written = 0
+        self.edits = 0
+
+    def insert(self, edit, pt, text):
+        self.written += len(text)
+        self.edits += 1
+
+    def replace(self, edit, region, text):
+        self.written += len(text)
+        self.edits += 1
+
+
+def reference_parse_time_ranges_military(time_ranges):
+    """
+    The original implementation of `parse_time_ranges_military`.
+    """
+
+    if not time_ranges.startswith('T:'):
+        raise ValueError("{} is not a valid time range".format(time_ranges))
+
+    ranges = time_ranges[2:].strip().split(',')
+
+    processed_values = []
+    for time_span in ranges:
+        tokens = time_span.partition('-')
+        left = tokens[0].strip()
+        right = tokens[2].strip()
+
+        if len(right) == 0:
+            raise ValueError("missing range in {}".format(time_span))
+
+        if len(left) != 4:
+            raise ValueError("Not enough digits in {}".format(left))
+
+        if len(right) != 4:
+            raise ValueError("Not enough digits in {}".format(right))
+
+        start_time = datetime.strptime(left, '%H%M')
+        end_time = datetime.strptime(right, '%H%M')
+
+        if start_time > end_time:
+            start_time, end_time = end_time, start_time
+
+        processed_values.append((start_time, end_time, end_time - start_time))
+
+    formatted_times = ', '.join(['{0:%H%M} - {1:%H%M}'.format(*v) for v in processed_values])
+
+    total_time = sum([p[-1] for p in processed_values], timedelta())
+    total_seconds = total_time.total_seconds()
+    days, seconds = total_time.days, total_time.seconds
+    hours = days * 24 + seconds // 3600
+    minutes = (seconds % 3600) // 60
+
+    return '{0} ({1}h{2}m -> {3:.2f}h -> {4}s)'.format(formatted_times,
+                                                       hours,
+                                                       minutes,
+                                                       hours + minutes/60.0,
+                                                       int(total_seconds))
+
+
+def generate_time_sheet(count, seed=42):
+    """
+    Return a list of `T:` lines with 1 to 5 military time spans each.
+    """
+
+    rng = random.Random(seed)
+    lines = []
+
+    for i in range(count):
+        spans = []
+        for j in range(rng.randint(1, 5)):
+            a = rng.randint(0, 1439)
+            b = rng.randint(0, 1439)
+            spans.append('{:02d}{:02d} - {:02d}{:02d}'.format(a // 60, a % 60, b // 60, b % 60))
+
+        lines.append('T: ' + ', '.join(spans))
+
+    return lines
+
+
+def timed(label, count, fn):
+
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    print('{:<40} {:8.3f}s {:12,.0f} lines/s'.format(label, elapsed, count / elapsed))
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lines = generate_time_sheet(count)
+
+    for line in lines[:1000]:
+        assert reference_parse_time_ranges_military(line) == timeparsing.parse_time_ranges_military(line)
+
+    print('{:,} time range lines'.format(count))
+
+    timed('reference (strptime)', count, lambda: [reference_parse_time_ranges_military(l) for l in lines])
+    timed('tokenizer', count, lambda: [timeparsing.parse_time_ranges(l) for l in lines])
+
+    # one note line between each time range line, like a real time sheet
+    text = '\n'.join(l + '\nworked on things' for l in lines)
+
+    view = RecordingView(text)
+
+    def batch():
+        view.sel().clear()
+        view.run_command('time_parsing', {'whole_view': True})
+
+    timed('time_parsing whole_view', count, batch)
+    print('{:<40} {:8,} edits, {:,} characters written'.format('', view.edits, view.written))
+
+
+if __name__ == '__main__':
+    main()
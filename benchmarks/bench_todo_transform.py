@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Creating and toggling TODO items under many cursors: the old
+create_todo loop (view.line, substr, re.match and a replace of the
+whole line per cursor) against transform_todos (the lines read once per
+selection, the edits worked out first).
+
+The edits are recorded rather than applied, the stand-in rebuilds its
+text on every edit and would hide the difference. The characters
+written are what goes into the undo history.
+
+Run from the package folder:
+
+$ python benchmarks/bench_todo_transform.py [cursors]
+
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+import bluebill_utilities
+
+
+class RecordingView(sublime.View):
+
+    def __init__(self, text):
+        sublime.View.__init__(self, text)
+        self.written = 0
+        self.edits = 0
+
+    def insert(self, edit, pt, text):
+        self.written += len(text)
+        self.edits += 1
+
+    def replace(self, edit, region, text):
+        self.written += len(text)
+        self.edits += 1
+
+
+def old_create_todo(view, edit):
+
+    for region in view.sel():
+
+        if region.empty():
+            current_line = view.line(region)
+            region = sublime.Region(current_line.a, current_line.b)
+
+        s = view.substr(region)
+
+        match = re.match(r"^(\s*)-(.*)$", s)
+
+        if match:
+            todo_line = match.group(1) + '- []' + match.group(2)
+
+        else:
+            todo_line = '- [] {}'.format(s)
+
+        view.replace(edit, region, todo_line)
+
+
+def cursors_view(count, text):
+
+    view = RecordingView('\n'.join([text.format(i) for i in range(count)]))
+    view.sel().clear()
+
+    for row in range(count):
+        view.sel().add(sublime.Region(view.text_point(row, 3)))
+
+    return view
+
+
+def timed(label, view, work):
+
+    start = time.perf_counter()
+    work(view)
+    elapsed = time.perf_counter() - start
+
+    print('{:<36} {:10.3f}ms {:8,} edits {:10,} chars'.format(label, elapsed * 1000, view.edits, view.written))
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    text = '- follow up with the team about the budget review, item {}'
+
+    def transform(action):
+        return lambda view: bluebill_utilities.TransformTodosCommand(view).run(None, action)
+
+    timed('create, old loop', cursors_view(count, text), lambda view: old_create_todo(view, None))
+    timed('create, transform_todos', cursors_view(count, text), transform('create'))
+
+    text = '- [] follow up with the team about the budget review, item {}'
+    timed('toggle, transform_todos', cursors_view(count, text), transform('toggle'))
+
+    # a whole checklist selected
+    view = RecordingView('\n'.join([text.format(i) for i in range(count)]))
+    view.sel().clear()
+    view.sel().add(sublime.Region(0, view.size()))
+    timed('toggle, one selection', view, transform('toggle'))
+
+    view = RecordingView('\n'.join([text.format(i) for i in range(count)]))
+    view.sel().clear()
+    view.sel().add(sublime.Region(0, view.size()))
+    timed('count, one selection', view, transform('count'))
+
+
+if __name__ == '__main__':
+    main()
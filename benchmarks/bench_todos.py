@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Project TODO scan over a folder of dated notes, the first run (every
+note read) against a repeat run (everything from the cache), a run
+after a few notes changed and a new session that loads the cache.
+
+Run from the package folder:
+
+$ python benchmarks/bench_todos.py [notes]
+
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill.todos import TodoCache, format_todos
+
+from bench_fileindex import timed
+
+from datetime import date, timedelta
+
+
+def write_notes(folder, count):
+
+    rng = random.Random(42)
+    day = date(2015, 1, 1)
+    paths = []
+
+    for i in range(count):
+        path = os.path.join(folder, '{} {:04x}.md'.format(day.isoformat(), rng.randint(0, 0xffff)))
+
+        lines = ['# {}'.format(day.isoformat())]
+
+        for j in range(rng.randint(20, 60)):
+            r = rng.random()
+
+            if r < 0.2:
+                lines.append('- [] follow up on item {}'.format(j))
+
+            elif r < 0.3:
+                lines.append('    - [x] finished item {}'.format(j))
+
+            else:
+                lines.append('some notes about the meeting, line {}'.format(j))
+
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines))
+
+        paths.append(path)
+        day += timedelta(days=1)
+
+    return paths
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    folder = tempfile.mkdtemp()
+    cache_path = os.path.join(tempfile.mkdtemp(), 'todos.json')
+
+    try:
+        paths = write_notes(folder, count)
+
+        for workers in (1, 4):
+            cache = TodoCache(cache_path, workers=workers)
+            timed('first run, {} worker(s)'.format(workers), lambda: cache.update([folder]))
+
+        timed('repeat run', lambda: cache.update([folder]))
+
+        for path in paths[:10]:
+            with open(path, 'a') as f:
+                f.write('\n- [] a new item\n')
+
+        timed('10 notes changed', lambda: cache.update([folder]))
+
+        timed('save', cache.save)
+
+        fresh = TodoCache(cache_path)
+        timed('new session, load', fresh.load)
+
+        found = timed('group and format', lambda: format_todos(fresh.todos(paths)))
+        print(found.splitlines()[-1])
+
+    finally:
+        shutil.rmtree(folder)
+        shutil.rmtree(os.path.dirname(cache_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Inserting a value at every cursor, 10 to 100,000 cursors: the old loop
+(insert at each cursor of the live selection, every insert moves the
+cursors after it) against an EditTransaction applied in one pass with
+the cursors taken off.
+
+The stand-in copies the whole text on every edit, which the editor
+doesn't, so the view here only moves the cursors and regions the way
+the stand-in does and records the size of the text. What is left is the
+cost of the cursors.
+
+Run from the package folder:
+
+$ python benchmarks/bench_transaction.py [most cursors for the old loop]
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import standin
+standin.install()
+
+import sublime
+
+from bluebill import transaction
+
+
+class CursorsView(sublime.View):
+
+    def __init__(self, size):
+        sublime.View.__init__(self, '')
+        self._size = size
+
+    def size(self):
+        return self._size
+
+    def insert(self, edit, pt, text):
+        self._move(pt, pt, text, True)
+        return len(text)
+
+    def replace(self, edit, region, text):
+        self._move(region.begin(), region.end(), text, False)
+
+    def _move(self, a, b, text, shift_at_point):
+
+        delta = len(text) - (b - a)
+        self._size += delta
+
+        def move(p):
+            if p > b or (shift_at_point and p == b):
+                return p + delta
+
+            if p > a:
+                return a + len(text)
+
+            return p
+
+        self._sel._set([sublime.Region(move(r.a), move(r.b)) for r in self._sel])
+
+
+def cursors_view(count, line_length=40):
+
+    view = CursorsView(count * line_length)
+    view.sel().add_all([sublime.Region(row * line_length) for row in range(count)])
+
+    return view
+
+
+def old_loop(view, values):
+
+    for s, value in zip(view.sel(), values):
+        view.insert(None, s.a, value)
+
+
+def batched(view, values):
+
+    t = transaction.EditTransaction()
+    t.insert_each([s.a for s in view.sel()], values)
+
+    transaction.apply_edits(view, None, t.edits(), sublime.Region)
+
+
+def main():
+
+    most_old = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    print('{:>10} {:>14} {:>14}'.format('cursors', 'old loop', 'transaction'))
+
+    for count in (10, 100, 1000, 10000, 100000):
+        values = ['{:06d}'.format(i) for i in range(count)]
+
+        if count <= most_old:
+            view = cursors_view(count)
+            start = time.perf_counter()
+            old_loop(view, values)
+            old = '{:12.1f}ms'.format((time.perf_counter() - start) * 1000)
+            old_sel = list(view.sel())
+
+        else:
+            old = '{:>14}'.format('-')
+            old_sel = None
+
+        view = cursors_view(count)
+        start = time.perf_counter()
+        batched(view, values)
+        new = '{:12.1f}ms'.format((time.perf_counter() - start) * 1000)
+
+        if old_sel is not None and old_sel != list(view.sel()):
+            print('the cursors differ')
+
+        print('{:>10,} {} {}'.format(count, old, new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Working out the whitespace edits of normalize_whitespace for a large
+buffer, against tidying the text line by line and replacing all of it
+(the simple way, one edit but the whole buffer in the undo history).
+
+Run from the package folder:
+
+$ python benchmarks/bench_whitespace.py [lines]
+
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bluebill import buffer
+
+
+def generate_text(count):
+
+    rng = random.Random(42)
+    lines = []
+
+    for i in range(count):
+        r = rng.random()
+
+        if r < 0.15:
+            lines.append('')
+
+        elif r < 0.17:
+            lines.append('  \t')
+
+        elif r < 0.22:
+            lines.append('- follow up on item {}   '.format(i))
+
+        else:
+            lines.append('some notes about the meeting, line {}'.format(i))
+
+    return '\n\n' + '\n'.join(lines) + '\n\n\n'
+
+
+def chunks(text, size=1 << 20):
+
+    for a in range(0, len(text), size):
+        yield text[a:a + size]
+
+
+def line_by_line(text):
+
+    lines = [line.rstrip(' \t') for line in text.split('\n')]
+
+    out = []
+    blank = 0
+
+    for line in lines:
+        blank = blank + 1 if not line else 0
+
+        if blank <= 1:
+            out.append(line)
+
+    return '\n'.join(out).strip('\n') + '\n'
+
+
+def timed(label, work):
+
+    start = time.perf_counter()
+    result = work()
+    elapsed = time.perf_counter() - start
+
+    print('{:<36} {:10.3f}ms'.format(label, elapsed * 1000))
+
+    return result
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    text = generate_text(count)
+    print('{:<36} {:10,} lines {:.1f}MB'.format('buffer', count, len(text) / 1024.0 / 1024.0))
+
+    tidy = timed('line by line, whole text', lambda: line_by_line(text))
+
+    edits = timed('whitespace_edits, 1M chunks', lambda: buffer.whitespace_edits(chunks(text)))
+    print('{:<36} {:10,} edits {:,} characters'.format('touched', len(edits), sum([b - a for a, b, t in edits])))
+
+    start = time.perf_counter()
+    pieces = []
+    pos = 0
+    for a, b, t in edits:
+        pieces.append(text[pos:a])
+        pieces.append(t)
+        pos = b
+    pieces.append(text[pos:])
+    applied = ''.join(pieces)
+    print('{:<36} {:10.3f}ms'.format('edits applied to a copy', (time.perf_counter() - start) * 1000))
+
+    print('same result: {}'.format(applied == tidy))
+
+    timed('blank lines only (trailing=False)', lambda: buffer.whitespace_edits(chunks(text), trailing=False))
+    timed('nothing to change', lambda: buffer.whitespace_edits(chunks(tidy)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+The editor independent core of the Bluebill tools.
+
+Nothing in this package imports `sublime` or `sublime_plugin`. The
+commands in the top level plugin files are thin wrappers that pull the
+text out of the view, hand it to the functions in here and write the
+results back. That means the logic can be imported, profiled and load
+tested on a machine without Sublime Text installed.
+
+For running the commands themselves outside of the editor, see
+`bluebill.standin`:
+
+>>> from bluebill import standin
+>>> standin.install()
+>>> import bluebill_utilities
+
+"""
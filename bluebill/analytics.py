@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Rollups and histograms over large numbers of parsed time ranges.
+
+The ranges are stored in columns (date, start minute, end minute) so a
+rollup is a handful of passes over flat arrays. When NumPy is available
+the passes are vectorized; it isn't shipped with Sublime Text, so the
+same results are computed with plain Python otherwise.
+
+>>> ranges = TimeRanges.from_records([(date(2024, 3, 1).toordinal(), 480, 570)])
+>>> rollups(ranges, by=('month',))['month']
+[Rollup(key=24290, label='2024-03', count=1, minutes=90, mean_start=480.0, mean_end=570.0)]
+
+"""
+
+from array import array
+from collections import namedtuple
+from datetime import date
+
+try:
+    import numpy
+
+except ImportError:
+    # Not available inside Sublime Text unless it has been installed
+    # as a dependency, the pure Python path is used instead.
+    numpy = None
+
+from .clock import MINUTES_PER_DAY
+
+
+# key - the value the rows were grouped by (an ordinal, week start
+#       ordinal, year * 12 + month - 1 or weekday number)
+# label - the key for people, 2024-03-01, 2024-W09, 2024-03 or Fri
+# count - the number of ranges
+# minutes - the sum of their durations
+# mean_start, mean_end - the average start and end minute of the day
+Rollup = namedtuple('Rollup', 'key label count minutes mean_start mean_end')
+
+weekday_names = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+periods = ('day', 'week', 'month', 'weekday')
+
+_epoch = date(1970, 1, 1).toordinal()
+
+
+class TimeRanges(object):
+    """
+    Parsed time ranges in columns. dates holds the date ordinals
+    (`date.toordinal`), starts and ends the minutes of the day.
+    """
+
+    def __init__(self, dates, starts, ends):
+        self.dates = dates
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build the columns from an iterable of (ordinal, start, end)
+        tuples. The iterable is consumed once, without keeping the
+        tuples around.
+        """
+
+        dates = array('i')
+        starts = array('h')
+        ends = array('h')
+
+        for ordinal, start, end in records:
+            dates.append(ordinal)
+            starts.append(start)
+            ends.append(end)
+
+        if numpy is not None:
+            return cls(numpy.frombuffer(dates, dtype=numpy.int32),
+                       numpy.frombuffer(starts, dtype=numpy.int16),
+                       numpy.frombuffer(ends, dtype=numpy.int16))
+
+        return cls(dates, starts, ends)
+
+
+def sheet_records(sheet):
+    """
+    Yield (ordinal, start, end) for every span in a `TimeSheet`. Days
+    without a date, or with one that isn't a date, are skipped.
+    """
+
+    for label, first, last in sheet.days():
+        if label is None:
+            continue
+
+        year, month, day = label.split('-')
+
+        try:
+            ordinal = date(int(year), int(month), int(day)).toordinal()
+
+        except ValueError:
+            # a heading like 2024-13-01
+            continue
+
+        label, spans, errors = sheet.day_spans(first)
+
+        for start, end in spans:
+            yield ordinal, start, end
+
+
+def _label(by, key):
+
+    if by == 'day':
+        return date.fromordinal(key).isoformat()
+
+    if by == 'week':
+        year, week, weekday = date.fromordinal(key).isocalendar()
+        return '{:04d}-W{:02d}'.format(year, week)
+
+    if by == 'month':
+        return '{:04d}-{:02d}'.format(key // 12, key % 12 + 1)
+
+    return weekday_names[key]
+
+
+def _numpy_keys(by, dates):
+
+    if by == 'day':
+        return dates
+
+    if by == 'week':
+        # the ordinal of the monday, ordinal 1 is a monday
+        return dates - (dates - 1) % 7
+
+    if by == 'month':
+        months = (dates - _epoch).astype('datetime64[D]').astype('datetime64[M]').astype(numpy.int64)
+        return months + 1970 * 12
+
+    return (dates - 1) % 7
+
+
+def _numpy_rollups(ranges, by):
+
+    dates = ranges.dates.astype(numpy.int64)
+    starts = ranges.starts.astype(numpy.int64)
+    ends = ranges.ends.astype(numpy.int64)
+
+    # Group by day first with a bincount over the day offsets (no sort),
+    # every other period is a group of days
+    first_day = dates.min()
+    offsets = dates - first_day
+
+    counts = numpy.bincount(offsets)
+    minutes = numpy.bincount(offsets, weights=ends - starts)
+    start_sums = numpy.bincount(offsets, weights=starts)
+    end_sums = numpy.bincount(offsets, weights=ends)
+
+    used = numpy.nonzero(counts)[0]
+    days = used + first_day
+    counts, minutes, start_sums, end_sums = counts[used], minutes[used], start_sums[used], end_sums[used]
+
+    results = {}
+
+    for period in by:
+        keys, inverse = numpy.unique(_numpy_keys(period, days), return_inverse=True)
+
+        group_counts = numpy.bincount(inverse, weights=counts)
+        group_minutes = numpy.bincount(inverse, weights=minutes)
+        group_starts = numpy.bincount(inverse, weights=start_sums)
+        group_ends = numpy.bincount(inverse, weights=end_sums)
+
+        results[period] = [
+            Rollup(k, _label(period, k), int(c), int(m), s / c, e / c)
+            for k, c, m, s, e in zip(keys.tolist(), group_counts.tolist(), group_minutes.tolist(), group_starts.tolist(), group_ends.tolist())
+        ]
+
+    return results
+
+
+def _python_rollups(ranges, by):
+
+    # the month of each distinct date, dates repeat a lot
+    months = {}
+
+    def month(ordinal):
+        key = months.get(ordinal)
+
+        if key is None:
+            d = date.fromordinal(ordinal)
+            key = months[ordinal] = d.year * 12 + d.month - 1
+
+        return key
+
+    key_functions = {
+        'day': lambda ordinal: ordinal,
+        'week': lambda ordinal: ordinal - (ordinal - 1) % 7,
+        'month': month,
+        'weekday': lambda ordinal: (ordinal - 1) % 7,
+    }
+
+    # Group by day first, every other period is a group of days
+    days = {}
+    for ordinal, start, end in zip(ranges.dates, ranges.starts, ranges.ends):
+        totals = days.get(ordinal)
+
+        if totals is None:
+            totals = days[ordinal] = [0, 0, 0, 0]
+
+        totals[0] += 1
+        totals[1] += end - start
+        totals[2] += start
+        totals[3] += end
+
+    results = {}
+
+    for period in by:
+        key_function = key_functions[period]
+        groups = {}
+
+        for ordinal, (count, minutes, start_sum, end_sum) in days.items():
+            key = key_function(ordinal)
+            totals = groups.get(key)
+
+            if totals is None:
+                groups[key] = [count, minutes, start_sum, end_sum]
+
+            else:
+                totals[0] += count
+                totals[1] += minutes
+                totals[2] += start_sum
+                totals[3] += end_sum
+
+        results[period] = [
+            Rollup(k, _label(period, k), c, m, s / float(c), e / float(c))
+            for k, (c, m, s, e) in sorted(groups.items())
+        ]
+
+    return results
+
+
+def rollups(ranges, by=periods):
+    """
+    Total the ranges per period in one batch.
+
+    # Parameters
+
+    ranges - TimeRanges
+        - The ranges to total.
+
+    by - tuple
+        - The periods to group by, any of 'day', 'week', 'month' and
+          'weekday'.
+
+    # Return
+
+    A dict of period -> list of `Rollup`, sorted by key.
+
+    """
+
+    for period in by:
+        if period not in periods:
+            raise ValueError("{} is not a valid period".format(period))
+
+    if len(ranges) == 0:
+        return dict((period, []) for period in by)
+
+    if numpy is not None and isinstance(ranges.dates, numpy.ndarray):
+        return _numpy_rollups(ranges, by)
+
+    return _python_rollups(ranges, by)
+
+
+def histogram(ranges, field='start', bin_size=60):
+    """
+    Count the ranges by their start, end or duration.
+
+    # Parameters
+
+    ranges - TimeRanges
+        - The ranges to count.
+
+    field - str
+        - 'start', 'end' or 'duration'.
+
+    bin_size - int
+        - The width of each bin in minutes.
+
+    # Return
+
+    A list with the count for each bin, the first bin starts at 0.
+
+    """
+
+    bins = (MINUTES_PER_DAY + bin_size - 1) // bin_size + 1
+
+    if numpy is not None and isinstance(ranges.dates, numpy.ndarray):
+
+        if field == 'start':
+            values = ranges.starts
+
+        elif field == 'end':
+            values = ranges.ends
+
+        elif field == 'duration':
+            values = ranges.ends.astype(numpy.int64) - ranges.starts
+
+        else:
+            raise ValueError("{} is not a valid field".format(field))
+
+        return numpy.bincount(values.astype(numpy.int64) // bin_size, minlength=bins).tolist()
+
+    counts = [0] * bins
+
+    if field == 'start':
+        values = ranges.starts
+
+    elif field == 'end':
+        values = ranges.ends
+
+    elif field == 'duration':
+        values = [end - start for start, end in zip(ranges.starts, ranges.ends)]
+
+    else:
+        raise ValueError("{} is not a valid field".format(field))
+
+    for value in values:
+        counts[value // bin_size] += 1
+
+    return counts
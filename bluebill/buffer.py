@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Line oriented operations on a buffer.
+
+The functions work with anything that looks like a Sublime Text view or
+region (the real thing or `bluebill.standin`) and never construct
+regions themselves - they return (a, b) tuples and leave it to the
+caller to wrap them.
+"""
+
+import re
+
+
+def find_empty_lines(lines):
+    """
+    Given the list of line regions for a buffer (i.e. the output of
+    `view.split_by_newlines`), return the empty lines that should be
+    selected.
+
+    Empty lines at the start and end of the buffer are ignored and only
+    the first empty line of a run of adjacent empty lines is returned.
+
+    # Parameters
+
+    lines - list
+        - The regions representing the lines of the buffer.
+
+    # Return
+
+    The list of empty line regions.
+
+    """
+
+    # ----------------
+    # Skip the empty lines at the start and end of the buffer
+    first = 0
+    last = len(lines)
+
+    while first < last and len(lines[first]) == 0:
+        first += 1
+
+    while last > first and len(lines[last - 1]) == 0:
+        last -= 1
+    # ----------------
+
+    # ----------------
+    # Keep the first empty line of each run of adjacent empty lines
+
+    empty_lines = []
+
+    previous_empty = False
+    for i in range(first, last):
+        l = lines[i]
+
+        if len(l) > 0:
+            previous_empty = False
+
+        elif not previous_empty:
+            empty_lines.append(l)
+            previous_empty = True
+    # ----------------
+
+    return empty_lines
+
+
+# The modes of `blank_lines`
+blank_modes = ('first', 'all', 'runs')
+
+# A blank line, from the newline before it, so the search can skip to the
+# next newline instead of trying every position
+_empty_pattern = re.compile(r'\n(?=\n)')
+_whitespace_pattern = re.compile(r'\n[ \t]*(?=\n)')
+
+
+def blank_lines(chunks, mode='first', whitespace=False):
+    """
+    Find the blank lines of a buffer read in chunks, without holding
+    more of it than a chunk (and the line it ends in the middle of).
+    Blank lines at the start and end of the buffer are ignored, like
+    `find_empty_lines` does.
+
+    The modes:
+
+    - first: the first blank line of each run of adjacent blank lines
+    - all: every blank line
+    - runs: each run of blank lines, from the start of the first to the
+      end of the last
+
+    # Parameters
+
+    chunks - iterable
+        - The text of the buffer, in order, in pieces of any size.
+
+    mode - str
+        - One of `blank_modes`.
+
+    whitespace - bool
+        - Lines of only spaces and tabs are blank too.
+
+    # Return
+
+    A generator of (a, b) tuples, in order. A blank line is from its
+    start to its end, so an empty line is (a, a).
+
+    """
+
+    if mode not in blank_modes:
+        raise ValueError("{} is not a blank line mode".format(mode))
+
+    finditer = (_whitespace_pattern if whitespace else _empty_pattern).finditer
+
+    # the run of blank lines that is still open: its lines (only the
+    # first unless the mode is all) and the end of the last one
+    run = []
+    run_end = -1
+
+    # the text not searched yet, from the newline that ends the last line
+    # searched (one is made up before the first line), and its position
+    carry = '\n'
+    offset = -1
+    chunks = iter(chunks)
+
+    while True:
+        chunk = next(chunks, None)
+
+        if chunk is None:
+            # the end of the last line
+            text = carry + '\n'
+            cut = len(text) - 1
+
+        else:
+            text = carry + chunk
+            cut = text.rfind('\n')
+
+            if cut == 0:
+                carry = text
+                continue
+
+        # the lines that end before the cut, the rest waits for the next
+        # chunk
+        for m in finditer(text, 0, cut + 1):
+            a = m.start() + 1 + offset
+            b = m.end() + offset
+
+            if run and a == run_end + 1:
+                if mode == 'all':
+                    run.append((a, b))
+
+            else:
+                # a line with text ended the open run, it is reported
+                # unless it is at the start of the buffer
+                if run and run[0][0] != 0:
+                    if mode == 'runs':
+                        yield (run[0][0], run_end)
+
+                    else:
+                        for span in run:
+                            yield span
+
+                run = [(a, b)]
+
+            run_end = b
+
+        if chunk is None:
+            break
+
+        carry = text[cut:]
+        offset += cut
+
+    # an open run that ends the buffer is at its end
+    if run and run[0][0] != 0 and run_end != offset + cut:
+        if mode == 'runs':
+            yield (run[0][0], run_end)
+
+        else:
+            for span in run:
+                yield span
+
+
+# For `whitespace_edits`: a blank line from the newline before it, or
+# the newline after a space or a tab, so both start at a newline
+_blank_pattern = re.compile(r'\n([ \t]*)(?=\n)')
+_blank_or_trailing_pattern = re.compile(r'\n([ \t]*)(?=\n)|\n(?<=[ \t]\n)')
+
+
+def _run_edits(lines, keep, trailing, trim, at_end, size):
+    """
+    Return the edits of `whitespace_edits` for a run of blank lines,
+    given as (a, b) tuples. at_end is True when the run ends the buffer.
+    """
+
+    # the newline before the run, -1 when the run starts the buffer
+    before = lines[0][0] - 1
+    end = lines[-1][1]
+
+    if before < 0 and (trim or keep == 0):
+        return [(0, size if at_end else end + 1, '')]
+
+    if at_end and trim:
+        return [(before + 1, size, '')]
+
+    kept = lines if keep is None else lines[:keep]
+
+    edits = [(a, b, '') for a, b in kept if b > a] if trailing else []
+
+    if len(kept) < len(lines):
+        edits.append((kept[-1][1] if kept else before, end, ''))
+
+    return edits
+
+
+def whitespace_edits(chunks, blank_lines=1, trailing=True, trim=True):
+    """
+    Work out the edits that tidy the whitespace of a buffer read in
+    chunks. Lines of only spaces and tabs are blank. Nothing is changed,
+    the caller applies the edits, last first.
+
+    # Parameters
+
+    chunks - iterable
+        - The text of the buffer, in order, in pieces of any size.
+
+    blank_lines - int
+        - The most blank lines in a row, longer runs lose the lines
+          after the first ones. None leaves the runs alone.
+
+    trailing - bool
+        - Remove the spaces and tabs at the end of every line.
+
+    trim - bool
+        - Remove the blank lines at the start and at the end of the
+          buffer, a newline after the last line is kept.
+
+    # Return
+
+    A list of (a, b, text) edits, in order and not overlapping, each
+    replaces a to b with the text. Only the whitespace that changes is
+    covered.
+
+    >>> whitespace_edits(['\\n\\none  \\n\\n\\n\\ntwo\\n  \\n'])
+    [(0, 2, ''), (5, 7, ''), (8, 10, ''), (15, 18, '')]
+
+    """
+
+    finditer = (_blank_or_trailing_pattern if trailing else _blank_pattern).finditer
+
+    edits = []
+
+    # the run of blank lines that is still open, as (a, b) tuples
+    run = []
+
+    carry = '\n'
+    offset = -1
+    chunks = iter(chunks)
+
+    while True:
+        chunk = next(chunks, None)
+
+        if chunk is None:
+            text = carry + '\n'
+            cut = len(text) - 1
+
+            # a newline ends the buffer, the empty line after it isn't
+            # a blank line
+            if carry == '\n':
+                cut = 0
+
+        else:
+            text = carry + chunk
+            cut = text.rfind('\n')
+
+            if cut == 0:
+                carry = text
+                continue
+
+        for m in finditer(text, 0, cut + 1):
+            p = m.start()
+
+            # the line that ends here has text and whitespace after it,
+            # unless it is the last line of the run
+            if trailing and p and text[p - 1] in ' \t' and not (run and run[-1][1] == p + offset):
+                if run:
+                    edits.extend(_run_edits(run, blank_lines, trailing, trim, False, None))
+                    run = []
+
+                i = p - 1
+                while text[i - 1] in ' \t':
+                    i -= 1
+
+                edits.append((i + offset, p + offset, ''))
+
+            if m.group(1) is not None:
+                # a blank line, the next one of the run or a new run
+                a = p + 1 + offset
+
+                if run and a != run[-1][1] + 1:
+                    edits.extend(_run_edits(run, blank_lines, trailing, trim, False, None))
+                    run = []
+
+                run.append((a, m.end() + offset))
+
+        if chunk is None:
+            break
+
+        carry = text[cut:]
+        offset += cut
+
+    size = offset + len(carry)
+
+    if run:
+        # the last line of the buffer, before the newline that ends it
+        last = size - 1 if carry == '\n' else size
+        edits.extend(_run_edits(run, blank_lines, trailing, trim, run[-1][1] == last, size))
+
+    # join the edits that touch, a blank line stripped and the lines
+    # after it removed are one edit
+    joined = []
+
+    for edit in edits:
+        if joined and joined[-1][1] == edit[0]:
+            joined[-1] = (joined[-1][0], edit[1], joined[-1][2] + edit[2])
+
+        else:
+            joined.append(edit)
+
+    return joined
+
+
+def find_regions_by_selections(view, index=None):
+    """
+    Take the view and split it up into regions based on the cursor(s) location.
+    If there is one cursor, two regions will be returned. If there are 2 cursors, 3
+    regions will be returned.
+
+    # Parameters
+
+    index - LineIndex
+        - The line index of the view (see `bluebill.lineindex`), the
+          rows are looked up in it instead of asking the view for each
+          cursor.
+
+    # Return
+
+    A list of (a, b) tuples.
+
+    """
+
+    # Determine where to split the document
+    values = set()
+    sel = view.sel()
+
+    if index is None:
+        for s in sel:
+            r, c = view.rowcol(s.a)
+            values.add(r)
+
+            r, c = view.rowcol(s.b)
+            values.add(r)
+
+    else:
+        points = []
+        for s in sel:
+            points.append(s.a)
+            points.append(s.b)
+
+        values.update(index.rows(points))
+
+    # the set isn't sorted
+    values = sorted(values)
+
+    # collect the areas into regions, starting at the beginning
+    # of the document to the first
+    regions = []
+    a = 0
+    for row in values:
+        b = view.text_point(row, 0) if index is None else index.starts[row]
+
+        # Make sure there are enough characters. There has to be
+        # more than 2 char (i.e. \n) for us to consider it a valid region
+        if b - a > 1:
+            regions.append((a, b))
+
+        a = b
+
+    # capture the last part of the file
+    b = view.size()
+    if b - a > 1:
+        regions.append((a, b))
+
+    return regions
+
+
+def selected_lines(view, index=None):
+    """
+    Return the lines under the selections: the line of each cursor and
+    every line of each non-empty selection (except the line a selection
+    ends at the start of). The lines of selections that share a line are
+    merged.
+
+    # Parameters
+
+    index - LineIndex
+        - The line index of the view, see `find_regions_by_selections`.
+
+    # Return
+
+    A list of (a, b) tuples, in order, from the start of the first line
+    to the end of the last line (before its newline).
+
+    """
+
+    if index is None:
+        rowcol = view.rowcol
+
+        def line(point):
+            region = view.line(point)
+            return region.begin(), region.end()
+
+    else:
+        rowcol = index.rowcol
+        line = index.line
+
+    spans = []
+
+    for region in view.sel():
+        a = region.begin()
+        b = region.end()
+
+        # a selection of whole lines ends at the start of the next one
+        if b > a and rowcol(b)[1] == 0:
+            b -= 1
+
+        begin, end = line(a)
+
+        if b > end:
+            end = line(b)[1]
+
+        if spans and begin <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+
+        else:
+            spans.append((begin, end))
+
+    return spans
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Clock arithmetic on integer minutes of the day (0 to 1439).
+
+Every valid time token is looked up in a table that is built once at
+import, so parsing a time is a dictionary lookup and formatting one is
+a list index. Nothing allocates per time, and durations and totals are
+plain integer math.
+
+The tables:
+
+- `military_minutes` - 'HHMM' -> minute of day
+- `am_minutes`, `pm_minutes` - the digits of an h[mm]am/pm token
+  ('6', '06', '645', '0645') -> minute of day
+- `military_labels` - minute of day -> 'HHMM'
+- `standard_labels` - minute of day -> 'hh:MMAM'
+
+"""
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _build_tables():
+
+    military_minutes = {}
+    am_minutes = {}
+    pm_minutes = {}
+    military_labels = []
+    standard_labels = []
+
+    for minute_of_day in range(MINUTES_PER_DAY):
+        hour, minute = divmod(minute_of_day, 60)
+
+        military = '{:02d}{:02d}'.format(hour, minute)
+        military_minutes[military] = minute_of_day
+        military_labels.append(military)
+
+        hour_12 = hour % 12 or 12
+        suffix = 'AM' if hour < 12 else 'PM'
+        standard_labels.append('{:02d}:{:02d}{}'.format(hour_12, minute, suffix))
+
+        table = am_minutes if hour < 12 else pm_minutes
+
+        # 4 digits - hhmm
+        table['{:02d}{:02d}'.format(hour_12, minute)] = minute_of_day
+
+        # 3 digits - hmm
+        if hour_12 < 10:
+            table['{:d}{:02d}'.format(hour_12, minute)] = minute_of_day
+
+        # 1 or 2 digits - the hour on its own
+        if minute == 0:
+            table['{:d}'.format(hour_12)] = minute_of_day
+            table['{:02d}'.format(hour_12)] = minute_of_day
+
+    return military_minutes, am_minutes, pm_minutes, military_labels, standard_labels
+
+
+military_minutes, am_minutes, pm_minutes, military_labels, standard_labels = _build_tables()
+
+
+def format_duration(minutes):
+    """
+    >>> format_duration(465)
+    '7h45m'
+    """
+
+    return '{0}h{1}m'.format(*divmod(minutes, 60))
+
+
+def format_total(minutes):
+    """
+    Format a total number of minutes the way the time sheet reports it:
+
+    >>> format_total(465)
+    '7h45m -> 7.75h -> 27900s'
+
+    """
+
+    hours, minutes = divmod(minutes, 60)
+
+    decimal_hours = hours + minutes/60.0
+    return '{0}h{1}m -> {2:.2f}h -> {3}s'.format(hours,
+                                                 minutes,
+                                                 decimal_hours,
+                                                 (hours * 60 + minutes) * 60)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Work out which rows of a buffer a burst of edits changed, so an index
+of the buffer can be updated by parsing those rows again and moving the
+rows after them.
+
+Since Sublime Text 4 a `TextChangeListener` reports exactly which
+rows each edit replaced, see `ChangedRows.changed`. Sublime Text 3 only
+reports that a buffer was modified, not where. Typing happens at the
+cursors though, so the cursor rows recorded before the burst and after
+every edit and cursor move in it bound the rows that can have changed,
+see `ChangedRows.bounds`. An edit made by any other command (Replace
+All, a reload, another plugin) has to be treated as changing every row,
+see `edited_at_cursors`.
+
+>>> changes = ChangedRows(exact=True)
+>>> changes.reset((0, 0, 10))
+>>> changes.changed(4, 4, 5)
+>>> changes.changed(8, 9, 8)
+>>> changes.bounds(10)
+(4, 8, 8)
+"""
+
+
+# The commands that only edit the text at the cursors
+cursor_commands = frozenset([
+    'insert',
+    'left_delete',
+    'right_delete',
+    'delete_word',
+    'insert_snippet',
+    'paste',
+    'cut',
+    'commit_completion',
+    'insert_best_completion',
+    'indent',
+    'unindent',
+    'toggle_comment',
+    'reindent',
+])
+
+
+def edited_at_cursors(view):
+    """
+    Return True if the last edit of the view was made by one of the
+    `cursor_commands`, so the cursor rows bound the rows it changed.
+    """
+
+    name = view.command_history(0, True)[0]
+
+    return name in cursor_commands
+
+
+def cursor_rows(view):
+    """
+    Return (first row, last row, line count) for the selection.
+    """
+
+    sel = view.sel()
+
+    if len(sel) == 0:
+        first = last = 0
+
+    else:
+        first = view.rowcol(sel[0].begin())[0]
+        last = view.rowcol(sel[-1].end())[0]
+
+    return first, last, view.rowcol(view.size())[0] + 1
+
+
+class ChangedRows(object):
+    """
+    The cursor rows before a burst of edits and after every edit and
+    cursor move in it, see `cursor_rows`. Or, with exact, the rows the
+    edits replaced.
+
+    # Parameters
+
+    exact - bool
+        - The edits are reported with `changed` (a TextChangeListener),
+          the cursor rows are ignored.
+
+    """
+
+    def __init__(self, exact=False):
+        self.exact = exact
+        self.base = None
+        self.events = []
+
+        # (first, old_last, last) of the changes reported with changed
+        self.span = None
+
+    def reset(self, rows):
+        """
+        Start a new burst, the index is up to date with the buffer and
+        the cursors are on these rows.
+        """
+
+        self.base = rows
+        self.events = []
+        self.span = None
+
+    def record(self, rows):
+        """
+        Record the cursor rows after an edit or a cursor move.
+        """
+
+        self.events.append(rows)
+
+    def changed(self, first, old_last, last):
+        """
+        Record an edit that replaced the rows first to old_last with the
+        rows first to last, in the buffer as it was right before it.
+        """
+
+        if self.span is None:
+            self.span = (first, old_last, last)
+            return
+
+        span_first, span_old_last, span_last = self.span
+
+        # the rows after both edits moved by the lines this one added
+        end = max(span_last, old_last)
+
+        self.span = (min(span_first, first), end - (span_last - span_old_last), end + (last - old_last))
+
+    def bounds(self, line_count):
+        """
+        Return (first, old_last, last) for the rows that can have
+        changed: first to last in the buffer now, first to old_last
+        before the burst (old_last < first when rows were only added).
+        None if there is nothing to go on (no `reset` yet, or with
+        exact no edit reported).
+        """
+
+        if self.exact:
+            return self.span
+
+        if self.base is None:
+            return None
+
+        events = [self.base] + self.events
+
+        first = min([e[0] for e in events])
+
+        # The last row any edit can have ended up on. A row recorded
+        # during the burst can only be pushed down by the lines added
+        # after it.
+        last = 0
+        growth = 0
+        for i in range(len(events) - 1, -1, -1):
+            last = max(last, events[i][1] + growth)
+
+            if i > 0:
+                growth += max(0, events[i][2] - events[i - 1][2])
+
+        last = min(last, line_count - 1)
+        old_last = last - (line_count - self.base[2])
+
+        return first, old_last, last
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Export parsed time ranges to CSV or JSON Lines for billing tools.
+
+Every step is a generator: the lines are read one at a time, each span
+becomes a `TimeRecord` and the writer puts it on disk before the next
+line is read. Exporting a whole archive of notes never holds more than
+a line and a record in memory.
+
+>>> list(time_records(['## 2024-03-01', 'T: 0800 - 0930'], source='note.md'))
+[TimeRecord(date='2024-03-01', start='08:00', end='09:30', minutes=90, source='note.md', line=2)]
+
+"""
+
+import csv
+import json
+import os
+
+from collections import namedtuple
+
+from .clock import MINUTES_PER_DAY
+from .notes import note_date
+from .timesheet import date_pattern, parse_line
+
+
+# date - YYYY-MM-DD, or None when the line has no date
+# start, end - HH:MM
+# minutes - the duration
+# source - the file (or view name) the line came from
+# line - the line number, starting at 1
+TimeRecord = namedtuple('TimeRecord', 'date start end minutes source line')
+
+formats = ('csv', 'jsonl')
+
+_labels = ['{:02d}:{:02d}'.format(*divmod(minute, 60)) for minute in range(MINUTES_PER_DAY)]
+
+
+def time_records(lines, day=None, source=None, errors=None):
+    """
+    Yield a `TimeRecord` for every span of the time range lines.
+
+    # Parameters
+
+    lines - iterable
+        - The lines of a note, e.g. an open file.
+
+    day - str
+        - The date (YYYY-MM-DD) of the lines before the first dated
+          heading.
+
+    source - str
+        - Stored in every record.
+
+    errors - list
+        - If given, (source, line, message) is appended for every line
+          that could not be parsed. Those lines are skipped.
+
+    """
+
+    for number, line in enumerate(lines, 1):
+
+        if line.startswith('T:'):
+            result = parse_line(line.rstrip('\r\n'), cache=False)
+
+            if result.spans is None:
+                if errors is not None:
+                    errors.append((source, number, result.error))
+
+                continue
+
+            for start, end in result.spans:
+                yield TimeRecord(day, _labels[start], _labels[end], end - start, source, number)
+
+        elif line.startswith('#'):
+            match = date_pattern.search(line)
+
+            if match:
+                day = match.group()
+
+
+def note_records(paths, errors=None):
+    """
+    Yield a `TimeRecord` for every span in the notes, the date of a note
+    comes from its file name (see `bluebill.notes`). The notes are read
+    line by line.
+    """
+
+    for path in paths:
+
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                for record in time_records(f, note_date(path), path, errors):
+                    yield record
+
+        except (IOError, OSError) as e:
+            if errors is not None:
+                errors.append((path, 0, str(e)))
+
+
+def write_csv(records, f):
+    """
+    Write the records to an open text file (opened with newline='') as
+    CSV, with a header row. Returns the number of records.
+    """
+
+    writer = csv.writer(f)
+    writer.writerow(TimeRecord._fields)
+
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+
+    return count
+
+
+def write_jsonl(records, f):
+    """
+    Write the records to an open text file as JSON Lines, one object per
+    record. Returns the number of records.
+    """
+
+    count = 0
+    for record in records:
+        f.write(json.dumps(record._asdict()))
+        f.write('\n')
+        count += 1
+
+    return count
+
+
+def export(records, path, format='csv'):
+    """
+    Write the records to a file.
+
+    The records are written to a temporary file next to the target that
+    replaces it when the export is complete, an export that fails never
+    leaves a partial file behind.
+
+    # Parameters
+
+    records - iterable
+        - `TimeRecord`s, usually from `time_records` or `note_records`.
+
+    path - str
+        - The file to write.
+
+    format - str
+        - 'csv' or 'jsonl'.
+
+    # Return
+
+    The number of records written.
+
+    """
+
+    if format not in formats:
+        raise ValueError("{} is not a valid format".format(format))
+
+    temp = path + '.tmp'
+
+    try:
+        with open(temp, 'w', encoding='utf-8', newline='') as f:
+
+            if format == 'csv':
+                count = write_csv(records, f)
+
+            else:
+                count = write_jsonl(records, f)
+
+        os.replace(temp, path)
+
+    except Exception:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+        raise
+
+    return count
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+An index of every file and folder under the project folders, used to
+resolve the links in a note to a path.
+
+The index is a trie of the path components under each folder, so
+checking that a path exists is a walk of a few dicts instead of a
+stat call, and a map of lower case basename -> (folder, name) so that a
+link that only names the file (`[notes](meeting.md)` in a note two
+folders away) is a single dict lookup. When nothing matches exactly,
+the basenames are searched for the words of the link and the hits are
+ranked, see `FileIndex.resolve`.
+
+Building the index walks the folders once and is meant to run on a
+background thread, `build` swaps the finished index in at the end.
+After that it is kept current with `add` and `remove`, and a path it
+doesn't have is looked for on disk (a file downloaded into the project
+since) and added when it is there.
+"""
+
+import os
+import re
+import threading
+
+from collections import namedtuple
+
+
+# paths - the matching paths, best first
+# exact - True if the link named a path that exists or a unique
+#         basename, False for a ranked list of guesses
+Resolution = namedtuple('Resolution', 'paths exact')
+
+# Folders that are never indexed, as well as every hidden folder
+ignored_folders = ('node_modules', '__pycache__')
+
+_word_pattern = re.compile(r'[^\W_]+')
+
+_FILE = True
+
+
+def _key(name):
+
+    # most names are already lower case, share the string with the name
+    key = name.lower()
+
+    return name if key == name else key
+
+
+def link_path(link):
+    """
+    Return the path part of a link: the `#anchor` and the space around
+    it dropped and `%20` read as a space. An in page link, `#heading`,
+    has no path.
+
+    >>> link_path(' notes/meeting%20notes.md#agenda ')
+    'notes/meeting notes.md'
+    >>> link_path('#agenda')
+    ''
+
+    """
+
+    return link.split('#', 1)[0].replace('%20', ' ').strip()
+
+
+def _components(path):
+    return [c for c in path.replace('\\', '/').split('/') if c and c != '.']
+
+
+class FileIndex(object):
+    """
+    The files and folders under a list of folders.
+
+    # Parameters
+
+    folders - list
+        - The folders to index, usually `window.folders()`.
+
+    """
+
+    def __init__(self, folders=()):
+        self.folders = [os.path.normpath(f) for f in folders]
+
+        # folder -> nested dicts of name -> dict (folder) or _FILE
+        self.trees = {}
+
+        # lower case basename -> list of (parent folder, name)
+        self.names = {}
+
+        # the lower case basenames joined by newlines, for the word
+        # search, built when it is first needed
+        self._blob = None
+
+        self.count = 0
+        self.ready = False
+
+        self._lock = threading.Lock()
+
+    def build(self):
+        """
+        Walk the folders and replace the index. Safe to call from a
+        background thread, lookups before it finishes fall back to the
+        file system.
+        """
+
+        trees = {}
+        names = {}
+        count = 0
+
+        for folder in self.folders:
+            nodes = {folder: {}}
+            trees[folder] = nodes[folder]
+
+            for root, dirs, files in os.walk(folder):
+                node = nodes.pop(root)
+
+                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ignored_folders]
+
+                for name in dirs:
+                    node[name] = nodes[os.path.join(root, name)] = {}
+                    names.setdefault(_key(name), []).append((root, name))
+
+                for name in files:
+                    node[name] = _FILE
+                    names.setdefault(_key(name), []).append((root, name))
+
+                count += len(dirs) + len(files)
+
+        with self._lock:
+            self.trees = trees
+            self.names = names
+            self.count = count
+            self._blob = None
+            self.ready = True
+
+    def _locate(self, path):
+        """
+        Return (folder, components) for a normalized path under one of
+        the folders, or (None, None).
+        """
+
+        for folder in self.folders:
+            if path == folder:
+                return folder, []
+
+            if path.startswith(folder) and path[len(folder)] in '/\\':
+                return folder, _components(path[len(folder):])
+
+        return None, None
+
+    def exists(self, path):
+        """
+        Return True if the file or folder is in the index. Paths outside
+        the folders, or any path before the index is built, are checked
+        on the file system. So is a path the index doesn't have, for the
+        files made outside of the editor since it was built, a file that
+        is found is added.
+        """
+
+        path = os.path.normpath(path)
+        folder, components = self._locate(path)
+
+        if folder is None or not self.ready:
+            return os.path.exists(path)
+
+        node = self.trees.get(folder)
+
+        for name in components:
+            if node is _FILE:
+                break
+
+            node = node.get(name)
+
+            if node is None:
+                break
+
+        else:
+            return True
+
+        if not os.path.exists(path):
+            return False
+
+        if os.path.isfile(path) and not any(c.startswith('.') or c in ignored_folders for c in components):
+            self.add(path)
+
+        return True
+
+    def add(self, path):
+        """
+        Add a file (a saved note) to the index, along with any of its
+        folders that are missing.
+        """
+
+        path = os.path.normpath(path)
+
+        with self._lock:
+            folder, components = self._locate(path)
+
+            if folder is None or not components or not self.ready:
+                return
+
+            node = self.trees[folder]
+            parent = folder
+
+            for i, name in enumerate(components):
+                child = node.get(name)
+
+                if child is None:
+                    child = node[name] = _FILE if i == len(components) - 1 else {}
+                    self.names.setdefault(_key(name), []).append((parent, name))
+
+                    self.count += 1
+                    self._blob = None
+
+                if child is _FILE:
+                    break
+
+                node = child
+                parent = os.path.join(parent, name)
+
+    def remove(self, path):
+        """
+        Remove a file or folder (and everything under it) from the
+        index.
+        """
+
+        path = os.path.normpath(path)
+
+        with self._lock:
+            folder, components = self._locate(path)
+
+            if folder is None or not components or not self.ready:
+                return
+
+            node = self.trees[folder]
+
+            for name in components[:-1]:
+                node = node.get(name)
+
+                if not isinstance(node, dict):
+                    return
+
+            removed = node.pop(components[-1], None)
+
+            if removed is None:
+                return
+
+            if removed is _FILE:
+                # only the one basename to fix
+                keys = [components[-1].lower()]
+
+            else:
+                keys = list(self.names)
+
+            prefix = path + os.sep
+
+            for key in keys:
+                entries = self.names.get(key, [])
+                kept = [(parent, name) for parent, name in entries
+                        if not (parent == path or parent.startswith(prefix) or os.path.join(parent, name) == path)]
+
+                if len(kept) != len(entries):
+                    self.count -= len(entries) - len(kept)
+
+                    if kept:
+                        self.names[key] = kept
+
+                    else:
+                        del self.names[key]
+
+            self._blob = None
+
+    def named(self, name):
+        """
+        Return the paths of the indexed files and folders with the
+        basename (any case), an empty list before the index is built.
+        """
+
+        return [os.path.join(folder, n) for folder, n in self.names.get(name.lower(), ())]
+
+    def _existing(self, paths, exists=os.path.exists):
+        """
+        Drop the paths that were deleted since the index was built,
+        from the list and from the index.
+        """
+
+        found = []
+
+        for path in paths:
+            if exists(path):
+                found.append(path)
+
+            else:
+                self.remove(path)
+
+        return found
+
+    def candidates(self, link, relative_to=None):
+        """
+        Return the paths the link names directly, 1 to 3 of `resolve`,
+        best first: the absolute path, or the link joined to the note's
+        folder and to each of the project folders.
+        """
+
+        link = os.path.expanduser(link_path(link))
+
+        if not link:
+            return []
+
+        if os.path.isabs(link):
+            return [os.path.normpath(link)]
+
+        return [os.path.normpath(os.path.join(folder, link)) for folder in ([relative_to] if relative_to else []) + self.folders]
+
+    def resolve(self, link, relative_to=None, limit=20, guess=True, exists=None):
+        """
+        Find the file or folder a link points to.
+
+        In order:
+
+        1. an absolute path
+        2. a path relative to the note's folder
+        3. a path relative to each of the project folders
+        4. a file or folder with the same basename anywhere in the
+           folders
+        5. files and folders whose basename contains every word of the
+           link's basename
+
+        Matches from 4 and 5 are ranked by how many trailing path
+        components they share with the link, then by how close they are
+        to the note's folder, then by length.
+
+        # Parameters
+
+        link - str
+            - The link text, `~` is expanded and an anchor is dropped
+              (see `link_path`).
+
+        relative_to - str
+            - The folder of the note the link is in, or None.
+
+        limit - int
+            - The most paths to return from 5.
+
+        guess - bool
+            - False skips 5.
+
+        exists - callable
+            - Checks that a path is there, `FileIndex.exists` for 1 to 3
+              and the file system for the rest if None. The link checker
+              passes `StatCache.exists`.
+
+        # Return
+
+        A `Resolution`, paths is empty if nothing matched.
+
+        """
+
+        link = os.path.expanduser(link_path(link))
+
+        if not link:
+            return Resolution([], False)
+
+        for candidate in self.candidates(link, relative_to):
+            if (exists or self.exists)(candidate):
+                return Resolution([candidate], True)
+
+        if not self.ready:
+            return Resolution([], False)
+
+        link_components = _components(link)
+        basename = link_components[-1].lower() if link_components else ''
+
+        paths = self._existing(self.named(basename), exists or os.path.exists)
+
+        if paths:
+            return Resolution(self._rank(paths, link_components, relative_to), len(paths) == 1)
+
+        words = _word_pattern.findall(os.path.splitext(basename)[0])
+
+        if not words or not guess:
+            return Resolution([], False)
+
+        paths = []
+        for name in self._search(words):
+            paths.extend(os.path.join(folder, n) for folder, n in self.names.get(name, ()))
+
+        return Resolution(self._existing(self._rank(paths, link_components, relative_to)[:limit]), False)
+
+    def _search(self, words):
+        """
+        Return the lower case basenames that contain every word. The
+        rarest word is found with `str.find` over all of the names at
+        once, the lines it is on are checked for the rest.
+        """
+
+        blob = self._blob
+
+        if blob is None:
+            blob = self._blob = '\n' + '\n'.join(self.names) + '\n'
+
+        # str.count is a fast scan, the rarest word leaves the fewest
+        # lines to check
+        first = min(words, key=blob.count)
+        rest = [word for word in words if word != first]
+
+        found = []
+        position = blob.find(first)
+
+        while position != -1:
+            start = blob.rfind('\n', 0, position) + 1
+            end = blob.find('\n', position)
+            name = blob[start:end]
+
+            if all(word in name for word in rest):
+                found.append(name)
+
+            position = blob.find(first, end)
+
+        return found
+
+    def _rank(self, paths, link_components, relative_to):
+
+        tail = [c.lower() for c in reversed(link_components) if c != '..']
+        here = _components(os.path.normcase(relative_to)) if relative_to else []
+
+        def score(path):
+            components = _components(path)
+
+            shared = 0
+            for a, b in zip(tail, reversed(components)):
+                if a != b.lower():
+                    break
+
+                shared += 1
+
+            near = 0
+            for a, b in zip(here, _components(os.path.normcase(path))):
+                if a != b:
+                    break
+
+                near += 1
+
+            return -shared, -near, len(path), path
+
+        return sorted(paths, key=score)
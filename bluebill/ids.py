@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Random and time sortable IDs, generated in batches.
+
+Every kind of ID draws its randomness from a `RandomPool`, a buffer
+filled from `os.urandom` 64KB at a time (or a whole batch at once), so
+a batch of 100,000 IDs costs a single system call instead of one (or a
+lock) per ID the way `uuid.uuid4` and `uuid.uuid1` do. The IDs are formatted
+straight from the hex of the random bytes.
+
+The kinds (`id_kinds`):
+
+- uuid4 - random UUID, RFC 9562 version 4
+- uuid7 - UUID version 7, a millisecond unix timestamp then random
+  bits, sorts by creation time
+- ulid - 26 characters of Crockford base32, also a millisecond
+  timestamp then random bits, sorts by creation time
+- hex - a short random hex number with no leading zero, like
+  `random_4_digit_hex`
+
+Within one millisecond the uuid7s count up (a 12 bit counter) and the
+ulids add one to the random part, so a batch sorts in the order it was
+generated too.
+
+>>> [len(i) for i in new_ids('uuid4', 2) + new_ids('uuid7', 1) + new_ids('ulid', 1) + new_ids('hex', 1)]
+[36, 36, 36, 26, 4]
+>>> found = new_ids('ulid', 1000)
+>>> found == sorted(found) and len(set(found)) == 1000
+True
+
+"""
+
+import binascii
+import os
+import struct
+import threading
+import time
+
+
+id_kinds = ('uuid4', 'uuid7', 'ulid', 'hex')
+
+# the variant bits of a UUID (10xx) for the top two bits of a nibble
+_variant = '89ab' * 4
+
+_crockford = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+# 10 bits -> two base32 characters
+_crockford_pairs = [a + b for a in _crockford for b in _crockford]
+
+
+class RandomPool(object):
+    """
+    Random bytes from `os.urandom`, read size bytes at a time.
+
+    # Parameters
+
+    size - int
+        - The bytes read at once.
+
+    """
+
+    def __init__(self, size=1 << 16):
+        self.size = size
+        self.reads = 0
+
+        self._buffer = b''
+        self._pos = 0
+        self._lock = threading.Lock()
+
+    def take(self, n):
+        """
+        Return n random bytes.
+        """
+
+        with self._lock:
+            if self._pos + n > len(self._buffer):
+                # what is left and enough new bytes for the request
+                more = max(self.size, n)
+                self._buffer = self._buffer[self._pos:] + os.urandom(more)
+                self._pos = 0
+                self.reads += 1
+
+            data = self._buffer[self._pos:self._pos + n]
+            self._pos += n
+
+        return data
+
+
+_pool = RandomPool()
+
+# the last uuid7 (milliseconds, counter) and ulid (milliseconds, random)
+# handed out, to count up from within a millisecond
+_clock_lock = threading.Lock()
+_last_uuid7 = (0, 0)
+_last_ulid = (0, 0)
+
+
+def _now():
+    return int(time.time() * 1000)
+
+
+def uuid4_ids(count, pool=_pool):
+    """
+    Return count random (version 4) UUIDs.
+    """
+
+    digits = binascii.hexlify(pool.take(16 * count)).decode('ascii')
+
+    ids = []
+    for i in range(0, 32 * count, 32):
+        h = digits[i:i + 32]
+        ids.append('{}-{}-4{}-{}{}-{}'.format(h[:8], h[8:12], h[13:16], _variant[int(h[16], 16)], h[17:20], h[20:]))
+
+    return ids
+
+
+def uuid7_ids(count, now=None, pool=_pool):
+    """
+    Return count time sortable (version 7) UUIDs.
+
+    # Parameters
+
+    now - int
+        - The unix time in milliseconds, the clock if None.
+
+    """
+
+    global _last_uuid7
+
+    digits = binascii.hexlify(pool.take(10 * count)).decode('ascii')
+
+    with _clock_lock:
+        ms = _now() if now is None else now
+        last_ms, counter = _last_uuid7
+
+        if ms <= last_ms:
+            ms = last_ms
+
+        else:
+            # start low so there is room to count up
+            counter = int(digits[:3], 16) & 0x7ff
+
+        t = '{:012x}'.format(ms)
+        prefix = '{}-{}-7'.format(t[:8], t[8:])
+
+        ids = []
+        for i in range(0, 20 * count, 20):
+            counter += 1
+
+            if counter > 0xfff:
+                # the counter ran out, borrow the next millisecond
+                ms += 1
+                counter = int(digits[i:i + 3], 16) & 0x7ff
+
+                t = '{:012x}'.format(ms)
+                prefix = '{}-{}-7'.format(t[:8], t[8:])
+
+            h = digits[i + 4:i + 20]
+            ids.append('{}{:03x}-{}{}-{}'.format(prefix, counter, _variant[int(h[0], 16)], h[1:4], h[4:]))
+
+        _last_uuid7 = (ms, counter)
+
+    return ids
+
+
+def _encode_ulid(value):
+    """
+    Return the 26 character Crockford base32 of a 128 bit number.
+    """
+
+    pairs = []
+    for i in range(13):
+        pairs.append(_crockford_pairs[value & 0x3ff])
+        value >>= 10
+
+    pairs.reverse()
+
+    return ''.join(pairs)
+
+
+def ulid_ids(count, now=None, pool=_pool):
+    """
+    Return count ULIDs.
+
+    # Parameters
+
+    now - int
+        - The unix time in milliseconds, the clock if None.
+
+    """
+
+    global _last_ulid
+
+    with _clock_lock:
+        ms = _now() if now is None else now
+        last_ms, random_part = _last_ulid
+
+        if ms <= last_ms:
+            ms = last_ms
+
+        else:
+            random_part = int(binascii.hexlify(pool.take(10)), 16) >> 1
+
+        ids = []
+        for i in range(count):
+            random_part += 1
+
+            if random_part >> 80:
+                ms += 1
+                random_part = int(binascii.hexlify(pool.take(10)), 16) >> 1
+
+            ids.append(_encode_ulid(ms << 80 | random_part))
+
+        _last_ulid = (ms, random_part)
+
+    return ids
+
+
+def hex_ids(count, digits=4, pool=_pool):
+    """
+    Return count random hex numbers of the given number of digits, the
+    first digit is never 0. 4 digits is 0x1000 to 0xffff.
+    """
+
+    lowest = 16 ** (digits - 1)
+    mask = 16 ** digits - 1
+    width = (digits * 4 + 7) // 8
+
+    ids = []
+
+    while len(ids) < count:
+        # a few more than needed, the ones below the lowest are dropped
+        wanted = count - len(ids)
+        data = pool.take(width * (wanted + wanted // 8 + 1))
+
+        if width == 2:
+            values = struct.unpack('>{}H'.format(len(data) // 2), data)
+
+        else:
+            values = [int(binascii.hexlify(data[i:i + width]), 16) for i in range(0, len(data), width)]
+
+        for value in values:
+            value &= mask
+
+            if value >= lowest:
+                ids.append('{:x}'.format(value))
+
+    return ids[:count]
+
+
+def new_ids(kind, count, **kwargs):
+    """
+    Return count IDs of a kind, one of `id_kinds`. The keyword arguments
+    go to the function of the kind, digits for hex.
+    """
+
+    if kind == 'uuid4':
+        return uuid4_ids(count, **kwargs)
+
+    if kind == 'uuid7':
+        return uuid7_ids(count, **kwargs)
+
+    if kind == 'ulid':
+        return ulid_ids(count, **kwargs)
+
+    if kind == 'hex':
+        return hex_ids(count, **kwargs)
+
+    raise ValueError("{} is not a kind of ID".format(kind))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Overlap and gap analysis of time ranges.
+
+The parser sums the duration of every span, so two spans that overlap
+are counted twice and the time between spans is never reported. The
+analysis sorts the spans once and sweeps over them to find the time
+that is really covered, the double booked stretches and the idle gaps,
+O(n log n) in the number of spans.
+
+The times are integer minutes, like the ones `tokenize_time_ranges`
+returns.
+"""
+
+from collections import namedtuple
+
+
+# total - the sum of the span durations, what the parser reports
+# covered - the minutes covered by at least one span
+# double_booked - total - covered, the minutes counted more than once
+# merged - the spans with the overlaps merged, sorted
+# overlaps - the stretches covered by two or more spans, sorted
+# gaps - the idle stretches between the merged spans, sorted
+IntervalReport = namedtuple('IntervalReport', 'total covered double_booked merged overlaps gaps')
+
+
+def analyze(spans):
+    """
+    Analyze a list of (start, end) spans.
+
+    # Parameters
+
+    spans - iterable
+        - (start, end) tuples with start <= end.
+
+    # Return
+
+    An `IntervalReport`.
+
+    """
+
+    # The start and end of every span as events, packed into a single
+    # int (time * 2, plus 1 for a start) so that the sort is on plain
+    # ints. At the same time an end sorts before a start, so spans that
+    # only touch don't overlap.
+    events = []
+    total = 0
+
+    for start, end in spans:
+        if end > start:
+            events.append(start * 2 + 1)
+            events.append(end * 2)
+            total += end - start
+
+    events.sort()
+
+    merged = []
+    overlaps = []
+
+    depth = 0
+    merged_start = overlap_start = None
+
+    for event in events:
+        time = event >> 1
+
+        if event & 1:
+            # a span that starts where the last one ended continues it
+            if depth == 0:
+                merged_start = merged.pop()[0] if merged and merged[-1][1] == time else time
+
+            elif depth == 1:
+                overlap_start = overlaps.pop()[0] if overlaps and overlaps[-1][1] == time else time
+
+            depth += 1
+
+        else:
+            depth -= 1
+
+            if depth == 0:
+                merged.append((merged_start, time))
+
+            elif depth == 1:
+                overlaps.append((overlap_start, time))
+
+    gaps = []
+    covered = 0
+
+    for i, (start, end) in enumerate(merged):
+        covered += end - start
+
+        if i > 0 and start > merged[i - 1][1]:
+            gaps.append((merged[i - 1][1], start))
+
+    return IntervalReport(total, covered, total - covered, merged, overlaps, gaps)
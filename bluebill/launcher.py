@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Open files and folders with the default application without waiting
+for it.
+
+`subprocess.call(["xdg-open", path])` blocks until xdg-open exits, which
+freezes the editor while it runs. A `Launcher` puts the paths on a
+queue and a worker thread starts a detached process for each one, a
+short interval apart so opening fifty links doesn't start fifty
+applications at once. A path that is already queued, or was opened a
+moment ago, isn't opened again. The worker stays until the launchers it
+started have exited, so none are left behind as zombies.
+
+Any command can stand in for xdg-open, here a script that logs the
+paths it is called with:
+
+>>> import sys, tempfile
+>>> folder = tempfile.mkdtemp()
+>>> log = os.path.join(folder, 'opened.txt')
+>>> stub = os.path.join(folder, 'stub.py')
+>>> with open(stub, 'w') as f:
+...     _ = f.write('import sys; print(sys.argv[2], file=open(sys.argv[1], "a"))')
+>>> launcher = Launcher([sys.executable, stub, log], interval=0, reap_interval=0.05)
+>>> launcher.open(['/notes/a.pdf', '/notes/b.pdf', '/notes/a.pdf'])
+2
+>>> launcher.wait()
+>>> sorted(open(log).read().split())
+['/notes/a.pdf', '/notes/b.pdf']
+>>> launcher.open(['/notes/a.pdf'])
+0
+>>> launcher.running()
+0
+"""
+
+import collections
+import os
+import platform
+import subprocess
+import threading
+import time
+
+
+def default_command(system=None):
+    """
+    Return the command that opens a path on the system, as a list the
+    path is appended to. None means `os.startfile` (Windows), and the
+    empty list an unsupported system.
+    """
+
+    system = system or platform.system()
+
+    if system == "Darwin":  # macOS
+        return ["open"]
+
+    if system == "Windows":
+        return None
+
+    if system in ("Linux", "FreeBSD", "OpenBSD", "NetBSD"):
+        return ["xdg-open"]
+
+    return []
+
+
+class Launcher(object):
+    """
+    Opens paths on a background thread.
+
+    # Parameters
+
+    command - list
+        - The command to run with the path appended, see
+          `default_command`. Defaults to the one for this system.
+
+    interval - float
+        - The seconds to wait between two launches.
+
+    repeat_after - float
+        - A path opened less than this many seconds ago is skipped.
+
+    reap_interval - float
+        - The seconds between two checks for finished launchers once
+          the queue is empty.
+
+    """
+
+    def __init__(self, command=False, interval=0.2, repeat_after=2.0, reap_interval=1.0):
+
+        # the system is only checked once, here
+        self.command = default_command() if command is False else command
+        self.interval = interval
+        self.repeat_after = repeat_after
+        self.reap_interval = reap_interval
+
+        self._queue = collections.deque()
+        self._queued = set()
+        self._opened = {}
+        self._children = []
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def open(self, paths):
+        """
+        Queue the paths to be opened and return the number that were
+        queued, paths that are already queued or were just opened are
+        skipped. Returns immediately.
+        """
+
+        now = time.time()
+        count = 0
+
+        with self._lock:
+            for path in paths:
+                if path in self._queued or now - self._opened.get(path, -self.repeat_after) < self.repeat_after:
+                    continue
+
+                self._queue.append(path)
+                self._queued.add(path)
+                count += 1
+
+            if count and self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="bluebill-launcher")
+                self._worker.daemon = True
+                self._worker.start()
+
+        return count
+
+    def _run(self):
+
+        while True:
+            with self._lock:
+                if not self._queue and not self._children:
+                    self._worker = None
+                    return
+
+                path = None
+
+                if self._queue:
+                    path = self._queue.popleft()
+                    self._queued.discard(path)
+                    self._opened[path] = time.time()
+
+            if path is None:
+                # nothing to open, wait for the launchers that are still
+                # running
+                time.sleep(self.reap_interval)
+                self._reap()
+                continue
+
+            try:
+                self.launch(path)
+
+            except (OSError, ValueError) as e:
+                print("Error: could not open {}: {}".format(path, e))
+
+            self._reap()
+            time.sleep(self.interval)
+
+    def launch(self, path):
+        """
+        Start the application for the path, detached from the editor:
+        no pipes to it and, on POSIX, in its own session.
+        """
+
+        if self.command is None:
+            os.startfile(path)
+            return
+
+        if not self.command:
+            print("Unsupported operating system :(")
+            return
+
+        with open(os.devnull, 'r+b') as devnull:
+            kwargs = dict(stdin=devnull, stdout=devnull, stderr=devnull, close_fds=True)
+
+            if os.name == 'posix':
+                kwargs['start_new_session'] = True
+
+            child = subprocess.Popen(self.command + [path], **kwargs)
+
+        with self._lock:
+            self._children.append(child)
+
+    def _reap(self):
+        """
+        Collect the exit status of the launchers that have finished
+        (xdg-open and open exit once the application is started) so
+        they don't linger as zombies.
+        """
+
+        now = time.time()
+
+        with self._lock:
+            self._children = [child for child in self._children if child.poll() is None]
+
+            # forget the old launches so the dict doesn't grow
+            for path in [p for p, t in self._opened.items() if now - t >= self.repeat_after]:
+                del self._opened[path]
+
+    def running(self):
+        """
+        Return the number of launchers that haven't exited yet.
+        """
+
+        with self._lock:
+            return len([child for child in self._children if child.poll() is None])
+
+    def wait(self, timeout=None):
+        """
+        Block until the queue is empty and the launchers have exited,
+        for scripts and the stand-in.
+        """
+
+        worker = self._worker
+
+        if worker is not None:
+            worker.join(timeout)
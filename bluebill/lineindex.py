@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+The start of every line of a buffer, for turning points into rows and
+columns and back without asking the editor once per cursor.
+
+`LineIndex` holds the line starts in an `array('Q')`, 8 bytes a line,
+and answers `rowcol`, `text_point` and `line` with a binary search, the
+same calls as a view (`line` returns an (a, b) tuple). An index is built
+from the text of a view read in chunks and stays valid until the view
+changes, `change_count` records the `view.change_count()` it was built
+at.
+
+>>> index = LineIndex(['one\\ntw', 'o\\n\\nthree'])
+>>> len(index), index.rowcol(10), index.text_point(3, 2), index.line(5)
+(4, (3, 1), 11, (4, 7))
+
+"""
+
+import bisect
+import itertools
+
+from array import array
+
+
+class LineIndex(object):
+    """
+    The line starts of a buffer.
+
+    # Parameters
+
+    chunks - iterable
+        - The text of the buffer, in order, in pieces of any size.
+
+    change_count - int
+        - The `view.change_count()` of the text, the index is out of
+          date once the view has a different count.
+
+    """
+
+    def __init__(self, chunks=(), change_count=None):
+        self.starts = array('Q', [0])
+        self.size = 0
+        self.change_count = change_count
+
+        for chunk in chunks:
+            self.extend(chunk)
+
+    def extend(self, chunk):
+        """
+        Add text to the end of the buffer.
+        """
+
+        parts = chunk.split('\n')
+
+        if len(parts) > 1:
+            # the start of each line is the start of the one before it
+            # plus its length and the newline
+            first = self.size + len(parts[0]) + 1
+            lengths = itertools.chain([first], [len(part) + 1 for part in parts[1:-1]])
+            self.starts.extend(itertools.accumulate(lengths))
+
+        self.size += len(chunk)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def rowcol(self, point):
+        """
+        Return (row, col) of the point, counted from 0, like
+        `view.rowcol`.
+        """
+
+        point = max(0, min(point, self.size))
+        row = bisect.bisect_right(self.starts, point) - 1
+
+        return row, point - self.starts[row]
+
+    def rows(self, points):
+        """
+        Return the row of each point, a list in the same order. Points
+        in order (like the regions of a selection) are quicker, each
+        search starts at the row of the point before it.
+        """
+
+        starts = self.starts
+        size = self.size
+        bisect_right = bisect.bisect_right
+
+        rows = []
+        lo = 0
+        previous = -1
+
+        for point in points:
+            point = 0 if point < 0 else size if point > size else point
+
+            if point < previous:
+                lo = 0
+
+            lo = bisect_right(starts, point, lo) - 1
+            previous = point
+
+            rows.append(lo)
+
+        return rows
+
+    def text_point(self, row, col):
+        """
+        Return the point of the row and column, like `view.text_point`.
+        The column stops at the end of the line.
+        """
+
+        if row < 0:
+            return 0
+
+        if row >= len(self.starts):
+            return self.size
+
+        return min(self.starts[row] + col, self._line_end(row))
+
+    def line(self, point):
+        """
+        Return (a, b) of the line with the point, without the newline.
+        """
+
+        row = self.rowcol(point)[0]
+
+        return self.starts[row], self._line_end(row)
+
+    def _line_end(self, row):
+
+        if row + 1 < len(self.starts):
+            return self.starts[row + 1] - 1
+
+        return self.size
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Remember where links were resolved to, across sessions.
+
+The links in daily notes point at the same few files, and resolving one
+(see `bluebill.fileindex.FileIndex.resolve`) means joining it to each
+folder and checking the disk, which is slow on a network share.
+`ResolvedLinks` keeps the most recently used links, the path each one
+resolved to and the modified times of the path and of the folder the
+link was resolved from. A hit costs a stat call of each: if either time
+changed the target was edited, moved or removed, or a file was added
+next to the note that could now shadow it, and the link is resolved
+again.
+
+The cache is saved to a JSON file (a list of entries, least recently
+used first) and loaded again in the next session.
+"""
+
+import json
+import os
+
+from collections import OrderedDict
+
+
+class ResolvedLinks(object):
+    """
+    A least recently used cache of (project, note folder, link) -> path.
+
+    The note's folder is part of the key because a relative link
+    resolves differently in different folders.
+
+    # Parameters
+
+    path - str
+        - The cache file. It is created on the first `save`.
+
+    max_size - int
+        - The most links to remember, the least recently used are
+          dropped first.
+
+    """
+
+    version = 3
+
+    def __init__(self, path, max_size=2000):
+        self.path = path
+        self.max_size = max_size
+
+        # (project, folder, link) -> (path, modified time of the path,
+        # modified time of the folder), least recently used first
+        self.entries = OrderedDict()
+        self.dirty = False
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self):
+        """
+        Read the cache file. A missing, unreadable or old cache starts
+        empty.
+        """
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+        except (IOError, OSError, ValueError):
+            data = None
+
+        self.entries = OrderedDict()
+
+        if isinstance(data, dict) and data.get('version') == self.version:
+            for project, folder, link, path, mtime, folder_mtime in data['entries'][-self.max_size:]:
+                self.entries[(project, folder, link)] = (path, mtime, folder_mtime)
+
+        self.dirty = False
+
+    def save(self):
+        """
+        Write the cache file if an entry was added or dropped (not for
+        a hit, the order of the hits is only kept in memory). The file
+        is replaced in one step so an interrupted save never leaves half
+        a cache.
+        """
+
+        if not self.dirty:
+            return
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        entries = [list(key) + list(entry) for key, entry in list(self.entries.items())]
+
+        temp = self.path + '.tmp'
+
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'entries': entries}, f, separators=(',', ':'))
+
+        os.replace(temp, self.path)
+        self.dirty = False
+
+    def get(self, project, folder, link):
+        """
+        Return the path the link resolved to, or None. An entry whose
+        path or folder changed since it was put is a miss and is
+        dropped, the caller resolves the link again.
+        """
+
+        key = (project, folder, link)
+        entry = self.entries.get(key)
+
+        if entry is not None:
+            if entry[1:] == _mtimes(entry[0], folder, link):
+                # the order is only kept in memory, a hit doesn't write
+                # the file again
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            del self.entries[key]
+            self.dirty = True
+
+        self.misses += 1
+        return None
+
+    def put(self, project, folder, link, path):
+        """
+        Remember the path the link resolved to.
+        """
+
+        mtime, folder_mtime = _mtimes(path, folder, link)
+
+        if mtime is None:
+            return
+
+        key = (project, folder, link)
+        entry = (path, mtime, folder_mtime)
+
+        if self.entries.get(key) != entry:
+            self.entries[key] = entry
+            self.dirty = True
+
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """
+        Return a one line summary of the counters, for tuning the size.
+        """
+
+        lookups = self.hits + self.misses
+
+        return '{:,} of {:,} links cached, {:,} hits, {:,} misses ({:.0%} hit rate), {:,} evicted'.format(
+            len(self.entries),
+            self.max_size,
+            self.hits,
+            self.misses,
+            self.hits / float(lookups) if lookups else 0.0,
+            self.evictions,
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _mtime(path):
+
+    try:
+        return os.stat(path).st_mtime_ns
+
+    except OSError:
+        return None
+
+
+def _mtimes(path, folder, link):
+    """
+    Return the modified times of the path and of the folder the link is
+    resolved from, the note's folder joined to any folders in the link
+    (where a file named by the link would be created). None for a time
+    that can't be read, the folder is None for a note that isn't saved.
+    """
+
+    if folder is None:
+        return _mtime(path), None
+
+    return _mtime(path), _mtime(os.path.dirname(os.path.join(folder, os.path.expanduser(link.strip()))))
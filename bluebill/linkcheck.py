@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Find the links in notes that point to files that don't exist.
+
+The links are found with `bluebill.links.scan_rows` and resolved by
+`bluebill.fileindex.FileIndex.resolve`, the resolver `open_links` uses,
+with the same anchor rule (`bluebill.fileindex.link_path`). A link is
+good when `open_links` would open it without asking: an absolute path,
+a path relative to the note, relative to one of the project folders,
+or a basename that only one file in the project has. A basename shared
+by several files, or a link that only has guesses, is broken.
+
+An archive of notes links to the same few files over and over, so the
+result of every stat call is kept in a `StatCache` shared by all of
+the notes (and by every check run within the time to live). The notes
+are read and checked on a thread pool, the stat calls release the GIL.
+"""
+
+import os
+import re
+import time
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+from .fileindex import FileIndex, link_path
+from .links import scan_rows
+
+
+# path - the note (or view name) the link is in
+# row, col - where the link starts, counted from 0
+# target - the link as written
+# kind - the kind of link, see `bluebill.links.link_kinds`
+Broken = namedtuple('Broken', 'path row col target kind')
+
+# The kinds of links that are checked. Bare paths and urls are left
+# out, `example.com` in a sentence is not a link to a file.
+checked_kinds = ('markdown', 'definition', 'reference', 'wiki', 'quoted')
+
+# A quoted string is only checked if it looks like a path: it starts
+# at a root, a home or a relative folder, or it ends in an extension
+_path_like = re.compile(r'(?:\A(?:~|\.{1,2}|[A-Za-z]:)?[/\\]|\.[A-Za-z][A-Za-z0-9]{1,4}\Z)')
+
+# http://..., mailto:... are not files (C:\ is)
+_scheme_pattern = re.compile(r'[a-zA-Z][a-zA-Z0-9+.-]+:')
+
+
+class StatCache(object):
+    """
+    Remember whether paths exist for a while.
+
+    # Parameters
+
+    ttl - float
+        - The seconds an answer is good for.
+
+    max_size - int
+        - The most paths to remember, the expired answers are dropped
+          when there are more.
+
+    """
+
+    def __init__(self, ttl=30.0, max_size=200000):
+        self.ttl = ttl
+        self.max_size = max_size
+
+        # path -> (time checked, exists)
+        self._entries = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def exists(self, path):
+        """
+        Return True if the file or folder exists. Safe to call from
+        several threads at once, two threads that miss the same path
+        both stat it.
+        """
+
+        now = time.monotonic()
+        entry = self._entries.get(path)
+
+        if entry is not None and now - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+
+        try:
+            os.stat(path)
+            found = True
+
+        except (OSError, ValueError):
+            found = False
+
+        if len(self._entries) >= self.max_size:
+            self.prune(now)
+
+        self._entries[path] = (now, found)
+
+        return found
+
+    def prune(self, now=None):
+        """
+        Drop the expired answers, or every answer if none have expired.
+        """
+
+        now = time.monotonic() if now is None else now
+
+        expired = [path for path, entry in list(self._entries.items()) if now - entry[0] >= self.ttl]
+
+        if not expired:
+            self._entries.clear()
+
+        for path in expired:
+            self._entries.pop(path, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def checked_links(text):
+    """
+    Return (row, col, target, kind) for each link in the text that
+    names a file, with reference links replaced by their definition and
+    wiki links given the .md extension. The target is None for an
+    undefined reference.
+    """
+
+    rows, links = scan_rows(text)
+
+    definitions = {}
+    for link in links:
+        if link.kind == 'definition':
+            definitions.setdefault(link.label, link.target)
+
+    found = []
+
+    for row, link in zip(rows, links):
+        kind = link.kind
+
+        if kind not in checked_kinds:
+            continue
+
+        target = link.target
+
+        if kind == 'reference':
+            target = definitions.get(link.label)
+
+        elif kind == 'quoted' and not _path_like.search(target):
+            continue
+
+        if target is not None:
+            # in page anchors, and the anchor of a link to a note
+            if target.startswith('#'):
+                continue
+
+            target = link_path(target)
+
+            if not target or _scheme_pattern.match(target):
+                continue
+
+            if kind == 'wiki' and not os.path.splitext(target)[1]:
+                target += '.md'
+
+        found.append((row, link.start, target, kind))
+
+    return found
+
+
+class LinkChecker(object):
+    """
+    Check the links in notes against the file system.
+
+    # Parameters
+
+    folders - list
+        - The project folders, relative links are tried against each
+          when there is no index.
+
+    index - FileIndex
+        - The project file index, the links are resolved with it. If it
+          is None, or not built yet, the links that only name a file are
+          broken.
+
+    stats - StatCache
+        - Shared between checks, a new one if not given.
+
+    workers - int
+        - The threads that read the notes and stat the targets.
+
+    """
+
+    def __init__(self, folders=(), index=None, stats=None, workers=8):
+        self.folders = [os.path.normpath(f) for f in folders]
+        self.index = index if index is not None else FileIndex(self.folders)
+        self.stats = stats if stats is not None else StatCache()
+        self.workers = workers
+
+        # (target, folder of the note) -> resolves, the notes in a
+        # folder link to the same files
+        self._resolved = {}
+
+    def resolves(self, target, relative_to=None):
+        """
+        Return True if the link target names a file or folder. The
+        answer is remembered for the life of the checker.
+        """
+
+        key = (target, relative_to)
+        found = self._resolved.get(key)
+
+        if found is None:
+            found = self._resolved[key] = self._resolves(target, relative_to)
+
+        return found
+
+    def _resolves(self, target, relative_to):
+
+        return self.index.resolve(target, relative_to, guess=False, exists=self.stats.exists).exact
+
+    def check_text(self, text, path=None, parallel=False):
+        """
+        Return the `Broken` links in the text of a note.
+
+        # Parameters
+
+        text - str
+            - The text of the note.
+
+        path - str
+            - The file of the note, relative links are tried against its
+              folder first. Stored in the results.
+
+        parallel - bool
+            - Check the targets on a thread pool, for a single large
+              note. `check_files` checks the notes in parallel instead.
+
+        """
+
+        relative_to = os.path.dirname(path) if path and os.path.isabs(path) else None
+        links = checked_links(text)
+
+        targets = list(set([link[2] for link in links if link[2] is not None]))
+
+        if parallel:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(self.resolves, targets, repeat(relative_to)))
+
+        else:
+            results = map(self.resolves, targets, repeat(relative_to))
+
+        good = set([target for target, ok in zip(targets, results) if ok])
+
+        return [Broken(path, row, col, target, kind) for row, col, target, kind in links if target not in good]
+
+    def check_file(self, path):
+        """
+        Return the `Broken` links in a note file. A file that can't be
+        read is reported as a single broken link to itself.
+        """
+
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+
+        except (IOError, OSError) as e:
+            return [Broken(path, 0, 0, str(e), 'file')]
+
+        return self.check_text(text, path)
+
+    def check_files(self, paths):
+        """
+        Yield the `Broken` links of each note in turn, the notes are
+        read and checked on the thread pool.
+        """
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for broken in pool.map(self.check_file, paths):
+                for link in broken:
+                    yield link
+
+
+def format_broken(broken):
+    """
+    Return the line of the output panel for a broken link,
+    `path:line:column: message` so the location can be double clicked
+    (see `result_file_regex`).
+    """
+
+    if broken.target is None:
+        message = 'undefined reference'
+
+    elif broken.kind == 'file':
+        message = 'could not read: {}'.format(broken.target)
+
+    else:
+        message = 'broken {} link: {}'.format(broken.kind, broken.target)
+
+    return '{}:{}:{}: {}'.format(broken.path, broken.row + 1, broken.col + 1, message)
+
+
+# Matches the lines of `format_broken`
+result_file_regex = r'^(.+?):(\d+):(\d+): (.*)$'
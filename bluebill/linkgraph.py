@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+The graph of links between the notes of a project, for finding the
+notes that link to a note (backlinks) and the notes nothing links to
+(orphans).
+
+Every note is scanned for the links `open_links` follows (see
+`bluebill.linkcheck.checked_links`) and each link is resolved to a path
+once, when the note is scanned, through the project file index. The
+outgoing links of each note are kept with the note's modification time
+and size, so an update only scans the notes that changed, and the
+incoming links of every path are kept alongside, so a backlink lookup
+is a dict lookup.
+
+A link that doesn't resolve is stored as the path it would have
+relative to the note, `[[Next Steps]]` links to `Next Steps.md` next to
+the note, which becomes a backlink once that note is written there.
+
+The graph is saved as JSON with every path stored once, in a list, and
+the links as indexes into it.
+"""
+
+import json
+import os
+
+from .linkcheck import checked_links
+from .notes import note_extensions, note_files
+
+
+class LinkGraph(object):
+    """
+    The links between the notes in a set of folders, persisted to a
+    JSON file.
+
+    # Parameters
+
+    path - str
+        - The graph file. It is created on the first `save`.
+
+    """
+
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+
+        # note path -> [mtime_ns, size, links], links is a flat list of
+        # target path, row, target path, row, ...
+        self.notes = {}
+
+        # target path -> {note path: number of links}
+        self.incoming = {}
+
+        # one string per path, shared by every link to it
+        self._paths = {}
+
+        self.dirty = False
+
+    def _intern(self, path):
+        return self._paths.setdefault(path, path)
+
+    def _connect(self, source, links, add):
+
+        for i in range(0, len(links), 2):
+            target = links[i]
+
+            if add:
+                sources = self.incoming.setdefault(target, {})
+                sources[source] = sources.get(source, 0) + 1
+
+            else:
+                sources = self.incoming[target]
+                sources[source] -= 1
+
+                if not sources[source]:
+                    del sources[source]
+
+                if not sources:
+                    del self.incoming[target]
+
+    def load(self):
+        """
+        Read the graph file. A missing, unreadable or old graph starts
+        empty.
+        """
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+        except (IOError, OSError, ValueError):
+            data = None
+
+        self.notes = {}
+        self.incoming = {}
+        self._paths = {}
+
+        if isinstance(data, dict) and data.get('version') == self.version:
+            paths = [self._intern(path) for path in data['paths']]
+
+            for note, mtime, size, flat in data['notes']:
+                links = []
+
+                for i in range(0, len(flat), 2):
+                    links.append(paths[flat[i]])
+                    links.append(flat[i + 1])
+
+                source = paths[note]
+                self.notes[source] = [mtime, size, links]
+                self._connect(source, links, True)
+
+        self.dirty = False
+
+    def save(self):
+        """
+        Write the graph file if anything changed. The file is replaced in
+        one step so an interrupted save never leaves half a graph.
+        """
+
+        if not self.dirty:
+            return
+
+        ids = {}
+        paths = []
+
+        def number(path):
+            i = ids.get(path)
+
+            if i is None:
+                i = ids[path] = len(paths)
+                paths.append(path)
+
+            return i
+
+        notes = []
+        for source, (mtime, size, links) in list(self.notes.items()):
+            flat = []
+
+            for i in range(0, len(links), 2):
+                flat.append(number(links[i]))
+                flat.append(links[i + 1])
+
+            notes.append([number(source), mtime, size, flat])
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        temp = self.path + '.tmp'
+
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'paths': paths, 'notes': notes}, f, separators=(',', ':'))
+
+        os.replace(temp, self.path)
+        self.dirty = False
+
+    def scan(self, path, text, index, mtime=0, size=0, resolved=None):
+        """
+        Replace the outgoing links of a note.
+
+        # Parameters
+
+        path - str
+            - The note.
+
+        text - str
+            - The text of the note.
+
+        index - FileIndex
+            - Resolves the links, see `bluebill.fileindex`.
+
+        mtime, size - int
+            - The modification time (ns) and size of the note, an
+              update scans the note again when they change.
+
+        resolved - dict
+            - (folder, link) -> path, the links already resolved.
+              `update` shares one between the notes it scans, the notes
+              in a folder link to the same files.
+
+        """
+
+        source = self._intern(os.path.normpath(path))
+        relative_to = os.path.dirname(source)
+
+        links = []
+
+        if resolved is None:
+            resolved = {}
+
+        for row, col, target, kind in checked_links(text):
+            if target is None:
+                continue
+
+            key = (relative_to, target)
+            found = resolved.get(key)
+
+            if found is None:
+                paths, exact = index.resolve(target, relative_to, guess=False)
+
+                if exact:
+                    found = paths[0]
+
+                else:
+                    found = os.path.normpath(os.path.join(relative_to, os.path.expanduser(target)))
+
+                found = resolved[key] = self._intern(found)
+
+            links.append(found)
+            links.append(row)
+
+        self.remove(source)
+
+        self.notes[source] = [mtime, size, links]
+        self._connect(source, links, True)
+        self.dirty = True
+
+    def remove(self, path):
+        """
+        Forget the outgoing links of a note.
+        """
+
+        entry = self.notes.pop(path, None)
+
+        if entry is not None:
+            self._connect(path, entry[2], False)
+            self.dirty = True
+
+    def update(self, folders, index, extensions=note_extensions):
+        """
+        Bring the graph up to date with the notes in the folders. Notes
+        that haven't changed since they were scanned aren't read, notes
+        that no longer exist are dropped.
+
+        # Return
+
+        A tuple (paths, scanned), the paths of the notes in the folders
+        and how many of them had to be scanned.
+
+        """
+
+        folders = [os.path.normpath(folder) for folder in folders]
+
+        paths = []
+        scanned = 0
+        resolved = {}
+
+        for path in note_files(folders, extensions):
+
+            try:
+                st = os.stat(path)
+
+            except OSError:
+                continue
+
+            paths.append(path)
+
+            entry = self.notes.get(path)
+
+            if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                continue
+
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+
+            except (IOError, OSError):
+                continue
+
+            self.scan(path, text, index, st.st_mtime_ns, st.st_size, resolved)
+            scanned += 1
+
+        # forget the notes that were deleted or moved out of the folders
+        seen = set(paths)
+        roots = tuple(os.path.join(folder, '') for folder in folders)
+
+        for path in [p for p in self.notes if p.startswith(roots) and p not in seen]:
+            self.remove(path)
+
+        return paths, scanned
+
+    def backlinks(self, path):
+        """
+        Return (note, row) for every link to the path from another note,
+        sorted by note.
+        """
+
+        path = os.path.normpath(path)
+        found = []
+
+        for source in sorted(self.incoming.get(path, ())):
+            if source == path:
+                continue
+
+            entry = self.notes.get(source)
+
+            if entry is None:
+                # removed on the async thread since
+                continue
+
+            links = entry[2]
+
+            for i in range(0, len(links), 2):
+                if links[i] == path:
+                    found.append((source, links[i + 1]))
+
+        return found
+
+    def orphans(self, folders):
+        """
+        Return the notes in the folders that no other note links to,
+        sorted.
+        """
+
+        roots = tuple(os.path.join(os.path.normpath(folder), '') for folder in folders)
+        found = []
+
+        # a copy, a saved note can be scanned on the async thread while
+        # this runs on the UI thread
+        for path in list(self.notes):
+            if not path.startswith(roots):
+                continue
+
+            sources = self.incoming.get(path)
+
+            if not sources or (len(sources) == 1 and path in sources):
+                found.append(path)
+
+        found.sort()
+
+        return found
+
+    def link_count(self):
+        return sum([len(entry[2]) // 2 for entry in list(self.notes.values())])
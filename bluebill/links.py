@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Finding link like things (paths, markdown links, quoted strings) in a
+line of text, `scan_links`, and `LinkIndex`, which keeps every link like
+span of a buffer.
+"""
+
+import bisect
+import re
+
+from collections import namedtuple
+
+
+def find_whitespace_positions(input_string):
+    """
+    Given the string, return a list of index numbers for each location
+    of whitespace
+    """
+
+    # Define the regex pattern for matching whitespace
+    whitespace_pattern = re.compile(r'\s+')
+
+    # Use finditer to find all matches in the input string
+    matches = whitespace_pattern.finditer(input_string)
+
+    # Extract and return the positions of each match
+    positions = [match.start() for match in matches]
+
+    return positions if len(positions) > 0 else None
+
+
+# ----
+# Link spans
+
+# A link like span in a line.
+#
+# start, end - the columns of the span
+# target - the path or url the link points to, for a reference link the
+#          label of its definition (see `LinkIndex.target`)
+# kind - one of `link_kinds`
+# label - the lower case label of a reference or definition, or None
+Link = namedtuple('Link', 'start end target kind label')
+
+# The kinds of links, in the order the scanner tries them at a position
+link_kinds = ('wiki', 'markdown', 'definition', 'reference', 'url', 'quoted', 'path')
+
+# Every kind of link in one pass.
+#
+# Each alternative starts with a literal character, so the regex engine
+# skips ahead to the next [, quote, :, / , \\ or . in C instead of trying
+# every alternative at every position. A bare path or url is found by
+# its separator and extended back to the start of the word in
+# `scan_links`. The group after the literal names what matched.
+_link_pattern = re.compile(r"""
+    \[(?P<wiki>\[(?P<wiki_target>[^\]\[|\#\n]*)(?:[|\#][^\]\n]*)?\]\])
+
+  | \[(?<![^\n]\[)(?P<definition>(?P<definition_label>[^\]\n]+)\]:[ \t]*<?(?P<definition_url>[^\s>]+)>?)
+
+  | \[(?P<markdown>[^\]\n]*\]\([ \t]*(?:<(?P<markdown_angle>[^>\n]*)>|(?P<markdown_url>[^\s)]+))(?:[ \t]+["'(][^\n)]*)?[ \t]*\))
+
+  | \[(?P<reference>(?P<reference_text>[^\]\n]+)\]\[(?P<reference_label>[^\]\n]*)\])
+
+  | '(?<![\w'"`].)(?P<single>[^\n]+?)'(?!\w)
+  | "(?<![\w'"`].)(?P<double>[^\n]+?)"(?!\w)
+  | `(?<![\w'"`].)(?P<backtick>[^\n]+?)`(?!\w)
+
+  | :(?=//)(?P<colon>[^\s'"`()\[\]<>]*)
+  | [/\\](?P<slash>[^\s'"`()\[\]<>]*)
+  | \.(?<=\w\.)(?=[A-Za-z][A-Za-z0-9]{1,4}(?![^\s)\]>,.;:!?]))(?P<dot>[^\s'"`()\[\]<>]*)
+""", re.MULTILINE | re.VERBOSE)
+
+_quotes = ('single', 'double', 'backtick')
+
+# the characters a bare path or url can't contain
+_breaks = frozenset(' \t\r\n\x0b\x0c\'"`()[]<>')
+
+_scheme_pattern = re.compile(r'[a-zA-Z][a-zA-Z0-9+.-]*\Z')
+
+# punctuation that ends a sentence rather than a bare path or url
+_trailing = '.,;:!?'
+
+
+def scan_links(text):
+    """
+    Yield (row, Link) for every link like span in the text, rows
+    counted from the start of the text.
+
+    >>> [link for row, link in scan_links('see [notes](a%20b.md) or ~/x.txt.')]
+    [Link(start=4, end=21, target='a%20b.md', kind='markdown', label=None), Link(start=25, end=32, target='~/x.txt', kind='path', label=None)]
+
+    """
+
+    rows, links = scan_rows(text)
+
+    for row, link in zip(rows, links):
+        yield row, link
+
+
+def scan_rows(text, row=0):
+    """
+    Find every link like span in the text, which starts at the given
+    row.
+
+    # Return
+
+    A tuple (rows, links) of parallel lists, the `Link`s in order and
+    the row of each one.
+
+    """
+
+    rows = []
+    links = []
+
+    pos = 0
+    line_start = 0
+
+    for match in _link_pattern.finditer(text):
+        start = match.start()
+
+        newlines = text.count('\n', pos, start)
+        if newlines:
+            row += newlines
+            line_start = text.rfind('\n', pos, start) + 1
+
+        pos = start
+
+        kind = match.lastgroup
+        end = match.end()
+        label = None
+
+        if kind == 'wiki':
+            target = match.group('wiki_target').strip()
+
+        elif kind == 'markdown':
+            target = match.group('markdown_angle') or match.group('markdown_url')
+
+        elif kind == 'definition':
+            target = match.group('definition_url')
+            label = match.group('definition_label').lower()
+
+        elif kind == 'reference':
+            target = match.group('reference_label') or match.group('reference_text')
+            label = target.lower()
+
+        elif kind in _quotes:
+            target = match.group(kind)
+            kind = 'quoted'
+
+        else:
+            # a bare path or url, the match starts at a separator and
+            # the word it is in starts further back
+            i = start
+            while i > line_start and text[i - 1] not in _breaks:
+                i -= 1
+
+            kind = 'url' if kind == 'colon' and _scheme_pattern.match(text, i, start) else 'path'
+
+            target = text[i:end].rstrip(_trailing)
+            start = i
+            end = i + len(target)
+
+        if target:
+            rows.append(row)
+            links.append(Link(start - line_start, end - line_start, target, kind, label))
+
+    return rows, links
+
+
+class LinkIndex(object):
+    """
+    The link like spans of one buffer.
+
+    The links are kept in order with the row of each one in a sorted
+    list alongside, so the link under a cursor, and the next or
+    previous link, are a binary search away. After an edit only the
+    rows that changed are scanned again and the rows after them are
+    moved (see `bluebill.timesheet.TimeSheet`, which is updated the same
+    way).
+    """
+
+    def __init__(self):
+
+        # the links in order and the row of each one
+        self.rows = []
+        self.links = []
+
+        # reference label (lower case) -> the urls it is defined as,
+        # usually just the one
+        self.definitions = {}
+
+        self.line_count = 0
+
+    def _define(self, links, add):
+
+        for link in links:
+            if link.kind != 'definition':
+                continue
+
+            if add:
+                self.definitions.setdefault(link.label, []).append(link.target)
+
+            else:
+                urls = self.definitions[link.label]
+                urls.remove(link.target)
+
+                if not urls:
+                    del self.definitions[link.label]
+
+    def rescan(self, text):
+        """
+        Rebuild the index from the full text of the buffer.
+        """
+
+        self.rows, self.links = scan_rows(text)
+        self.line_count = text.count('\n') + 1
+
+        self.definitions = {}
+        self._define(self.links, True)
+
+    def replace_rows(self, first, last, text):
+        """
+        Update the index after an edit that replaced the rows from first
+        to last (inclusive, in the old numbering) with the text (without
+        the newline at the end).
+        """
+
+        delta = text.count('\n') - (last - first)
+
+        rows, links = scan_rows(text, first)
+
+        a = bisect.bisect_left(self.rows, first)
+        b = bisect.bisect_right(self.rows, last)
+
+        self._define(self.links[a:b], False)
+
+        if delta:
+            self.rows[b:] = [r + delta for r in self.rows[b:]]
+
+        self.rows[a:b] = rows
+        self.links[a:b] = links
+
+        self._define(links, True)
+
+        self.line_count += delta
+
+    def at(self, row, col):
+        """
+        Return the link that covers the column of the row, or None.
+        """
+
+        i = bisect.bisect_left(self.rows, row)
+
+        while i < len(self.rows) and self.rows[i] == row:
+            link = self.links[i]
+
+            if link.start <= col <= link.end:
+                return link
+
+            i += 1
+
+        return None
+
+    def next(self, row, col):
+        """
+        Return (row, Link) for the first link that starts after the
+        column of the row, or None.
+        """
+
+        i = bisect.bisect_left(self.rows, row)
+
+        while i < len(self.rows) and self.rows[i] == row and self.links[i].start <= col:
+            i += 1
+
+        if i < len(self.rows):
+            return self.rows[i], self.links[i]
+
+        return None
+
+    def previous(self, row, col):
+        """
+        Return (row, Link) for the last link that ends before the column
+        of the row, or None.
+        """
+
+        i = bisect.bisect_right(self.rows, row) - 1
+
+        while i >= 0 and self.rows[i] == row and self.links[i].end >= col:
+            i -= 1
+
+        if i >= 0:
+            return self.rows[i], self.links[i]
+
+        return None
+
+    def target(self, link):
+        """
+        Return the path or url the link points to, a reference link is
+        looked up in the definitions. None for an undefined reference.
+        """
+
+        if link.kind == 'reference':
+            urls = self.definitions.get(link.label)
+            return urls[0] if urls else None
+
+        return link.target
+
+    def __len__(self):
+        return len(self.links)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+The time range lines of every note in a set of folders.
+
+Notes are named `YYYY-MM-DD [hex].md` (see `suggest_date_based_name`)
+so the date of the `T:` lines in a note comes from its file name, or
+from a dated heading inside it (see `bluebill.timesheet`).
+
+Parsing thousands of notes on every run is wasted work when only a few
+of them changed, so `TimeSheetCache` keeps the parsed spans of each
+note on disk, keyed by the path, modification time and size of the
+file. A note is only read again when one of those changes.
+"""
+
+import json
+import os
+
+from datetime import date
+
+from .timesheet import TimeSheet, date_pattern
+
+
+note_extensions = ('.md',)
+
+
+def note_date(path):
+    """
+    Return the date (YYYY-MM-DD) at the start of the file name, or None.
+
+    >>> note_date('/notes/2024-03-01 1a2b.md')
+    '2024-03-01'
+
+    """
+
+    match = date_pattern.match(os.path.basename(path))
+
+    return match.group() if match else None
+
+
+def note_files(folders, extensions=note_extensions):
+    """
+    Yield the path of every note under the folders. Hidden folders
+    (.git, .obsidian, ...) are skipped.
+    """
+
+    for folder in folders:
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+
+            for name in files:
+                if name.endswith(extensions):
+                    yield os.path.join(root, name)
+
+
+def parse_note(text, day=None):
+    """
+    Parse the time range lines of a note.
+
+    # Parameters
+
+    text - str
+        - The contents of the note.
+
+    day - str
+        - The date (YYYY-MM-DD) of the lines before the first dated
+          heading, usually from the file name.
+
+    # Return
+
+    A tuple (days, errors). days is a dict of date -> flat list of
+    start, end minutes (start, end, start, end, ...), errors is the
+    number of lines that could not be parsed. Lines without a date are
+    left out.
+
+    """
+
+    sheet = TimeSheet(day)
+    sheet.rescan(text)
+
+    days = {}
+    errors = 0
+
+    for label, first, last in sheet.days():
+        label, spans, day_errors = sheet.day_spans(first)
+        errors += day_errors
+
+        if label is None or not spans:
+            continue
+
+        flat = days.setdefault(label, [])
+        for start, end in spans:
+            flat.append(start)
+            flat.append(end)
+
+    return days, errors
+
+
+class TimeSheetCache(object):
+    """
+    The parsed time range lines of the notes in a set of folders,
+    persisted to a JSON file.
+
+    # Parameters
+
+    path - str
+        - The cache file. It is created on the first `save`.
+
+    """
+
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+
+        # note path -> [mtime_ns, size, days, errors], see `parse_note`
+        self.entries = {}
+        self.dirty = False
+
+    def load(self):
+        """
+        Read the cache file. A missing, unreadable or old cache starts
+        empty.
+        """
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+        except (IOError, OSError, ValueError):
+            data = None
+
+        if isinstance(data, dict) and data.get('version') == self.version:
+            self.entries = data['entries']
+
+        else:
+            self.entries = {}
+
+        self.dirty = False
+
+    def save(self):
+        """
+        Write the cache file if anything changed. The file is replaced
+        in one step so an interrupted save never leaves half a cache.
+        """
+
+        if not self.dirty:
+            return
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        temp = self.path + '.tmp'
+
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'entries': self.entries}, f, separators=(',', ':'))
+
+        os.replace(temp, self.path)
+        self.dirty = False
+
+    def update(self, folders, extensions=note_extensions):
+        """
+        Bring the cache up to date with the notes in the folders. Notes
+        that haven't changed since they were cached aren't read, notes
+        that no longer exist are dropped.
+
+        # Return
+
+        A tuple (paths, parsed), the paths of the notes in the folders
+        and how many of them had to be parsed.
+
+        """
+
+        paths = []
+        parsed = 0
+
+        for path in note_files(folders, extensions):
+
+            try:
+                st = os.stat(path)
+
+            except OSError:
+                continue
+
+            paths.append(path)
+
+            entry = self.entries.get(path)
+
+            if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                continue
+
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+
+            except (IOError, OSError):
+                continue
+
+            days, errors = parse_note(text, note_date(path))
+
+            self.entries[path] = [st.st_mtime_ns, st.st_size, days, errors]
+            self.dirty = True
+            parsed += 1
+
+        # forget the notes that were deleted or moved out of the folders
+        seen = set(paths)
+        roots = tuple(os.path.join(folder, '') for folder in folders)
+
+        for path in [p for p in self.entries if p.startswith(roots) and p not in seen]:
+            del self.entries[path]
+            self.dirty = True
+
+        return paths, parsed
+
+    def records(self, paths):
+        """
+        Yield (ordinal, start, end) for every span in the notes, see
+        `bluebill.analytics.TimeRanges.from_records`.
+        """
+
+        ordinals = {}
+
+        for path in paths:
+            entry = self.entries.get(path)
+
+            if entry is None:
+                continue
+
+            for label, flat in entry[2].items():
+                ordinal = ordinals.get(label)
+
+                if ordinal is None:
+                    year, month, day = label.split('-')
+
+                    try:
+                        ordinal = date(int(year), int(month), int(day)).toordinal()
+
+                    except ValueError:
+                        # a heading like 2024-13-01
+                        ordinal = 0
+
+                    ordinals[label] = ordinal
+
+                if not ordinal:
+                    continue
+
+                for i in range(0, len(flat), 2):
+                    yield ordinal, flat[i], flat[i + 1]
+
+    def errors(self, paths):
+        """
+        Return a list of (path, errors) for the notes with lines that
+        could not be parsed.
+        """
+
+        return [(path, self.entries[path][3]) for path in paths if path in self.entries and self.entries[path][3]]
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Full text search of the notes in a project.
+
+`SearchIndex` is an inverted index: every word (lower case, two or more
+letters or digits) maps to the notes it is in and the rows it is on.
+A search looks up the words of the query, keeps the notes that have all
+of them and ranks those by how often and how rarely the words occur
+(tf-idf). The last word of the query also matches the words it is the
+start of, so a search can be run while the query is typed.
+
+The index is updated the way `bluebill.notes.TimeSheetCache` is, only
+the notes that changed since the last update are read again, and is
+saved as JSON with every path stored once and the notes as indexes into
+that list.
+
+>>> index = SearchIndex(None)
+>>> index.scan('/notes/a.md', 'Budget review\\nthe budget plan')
+>>> index.scan('/notes/b.md', 'Design review')
+>>> [(hit.path, hit.row) for hit in index.search('review bud')]
+[('/notes/a.md', 0)]
+>>> [hit.path for hit in index.search('review')]
+['/notes/a.md', '/notes/b.md']
+>>> index.search('budget nothere')
+[]
+
+"""
+
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+
+from collections import namedtuple
+
+from .notes import note_extensions, note_files
+
+
+# path - the note
+# row - the row with the most words of the query, counted from 0
+# score - higher is better
+Hit = namedtuple('Hit', 'path row score')
+
+_word_pattern = re.compile(r'[^\W_]{2,}')
+
+# the most words the last word of a query is expanded to
+max_prefix_words = 100
+
+
+def words(text):
+    """
+    Return the words of the text, lower case, in order.
+    """
+
+    return _word_pattern.findall(text.lower())
+
+
+class SearchIndex(object):
+    """
+    The words of the notes in a set of folders, persisted to a JSON
+    file.
+
+    # Parameters
+
+    path - str
+        - The index file. It is created on the first `save`.
+
+    """
+
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+
+        # note path -> [mtime_ns, size, words], the words of the note
+        # once each, to take them out of the postings again
+        self.notes = {}
+
+        # word -> {note path: rows}
+        self.postings = {}
+
+        # the words in order, for prefix matches, built when first
+        # needed
+        self._sorted = None
+
+        self.dirty = False
+
+    def load(self):
+        """
+        Read the index file. A missing, unreadable or old index starts
+        empty.
+        """
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+        except (IOError, OSError, ValueError):
+            data = None
+
+        self.notes = {}
+        self.postings = {}
+        self._sorted = None
+
+        if isinstance(data, dict) and data.get('version') == self.version:
+            paths = data['paths']
+
+            for note, mtime, size in data['notes']:
+                self.notes[paths[note]] = [mtime, size, []]
+
+            for word, flat in data['postings'].items():
+                notes = self.postings[word] = {}
+
+                for i in range(0, len(flat), 2):
+                    path = paths[flat[i]]
+                    notes[path] = flat[i + 1]
+                    self.notes[path][2].append(word)
+
+        self.dirty = False
+
+    def save(self):
+        """
+        Write the index file if anything changed. The file is replaced in
+        one step so an interrupted save never leaves half an index.
+        """
+
+        if not self.dirty:
+            return
+
+        paths = list(self.notes)
+        ids = dict([(path, i) for i, path in enumerate(paths)])
+
+        notes = [[ids[path], entry[0], entry[1]] for path, entry in self.notes.items()]
+
+        postings = {}
+        for word, found in self.postings.items():
+            flat = postings[word] = []
+
+            for path, rows in found.items():
+                flat.append(ids[path])
+                flat.append(rows)
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        temp = self.path + '.tmp'
+
+        # json.dumps encodes in C, json.dump to a file in Python
+        text = json.dumps({'version': self.version, 'paths': paths, 'notes': notes, 'postings': postings}, separators=(',', ':'))
+
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+        os.replace(temp, self.path)
+        self.dirty = False
+
+    def scan(self, path, text, index=None, mtime=0, size=0):
+        """
+        Replace the words of a note.
+
+        # Parameters
+
+        path - str
+            - The note.
+
+        text - str
+            - The text of the note.
+
+        index - FileIndex
+            - Not used, for the same call as
+              `bluebill.linkgraph.LinkGraph.scan`.
+
+        mtime, size - int
+            - The modification time (ns) and size of the note, an
+              update reads the note again when they change.
+
+        """
+
+        self.remove(path)
+
+        found = {}
+
+        for row, line in enumerate(text.split('\n')):
+            for word in set(_word_pattern.findall(line.lower())):
+                rows = found.get(word)
+
+                if rows is None:
+                    found[word] = [row]
+
+                else:
+                    rows.append(row)
+
+        for word, rows in found.items():
+            notes = self.postings.get(word)
+
+            if notes is None:
+                notes = self.postings[word] = {}
+                self._sorted = None
+
+            notes[path] = rows
+
+        self.notes[path] = [mtime, size, list(found)]
+        self.dirty = True
+
+    def remove(self, path):
+        """
+        Take a note out of the index.
+        """
+
+        entry = self.notes.pop(path, None)
+
+        if entry is None:
+            return
+
+        for word in entry[2]:
+            notes = self.postings[word]
+            del notes[path]
+
+            if not notes:
+                del self.postings[word]
+                self._sorted = None
+
+        self.dirty = True
+
+    def update(self, folders, index=None, extensions=note_extensions):
+        """
+        Bring the index up to date with the notes in the folders. Notes
+        that haven't changed since they were read aren't read again,
+        notes that no longer exist are dropped.
+
+        # Return
+
+        A tuple (paths, scanned), the paths of the notes in the folders
+        and how many of them had to be read.
+
+        """
+
+        folders = [os.path.normpath(folder) for folder in folders]
+
+        paths = []
+        scanned = 0
+
+        for path in note_files(folders, extensions):
+
+            try:
+                st = os.stat(path)
+
+            except OSError:
+                continue
+
+            paths.append(path)
+
+            entry = self.notes.get(path)
+
+            if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                continue
+
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+
+            except (IOError, OSError):
+                continue
+
+            self.scan(path, text, index, st.st_mtime_ns, st.st_size)
+            scanned += 1
+
+        # forget the notes that were deleted or moved out of the folders
+        seen = set(paths)
+        roots = tuple(os.path.join(folder, '') for folder in folders)
+
+        for path in [p for p in self.notes if p.startswith(roots) and p not in seen]:
+            self.remove(path)
+
+        return paths, scanned
+
+    def _prefixed(self, prefix):
+        """
+        Return the postings of the words that start with the prefix,
+        merged.
+        """
+
+        found = self._sorted
+
+        if found is None:
+            found = self._sorted = sorted(self.postings)
+
+        i = bisect.bisect_left(found, prefix)
+        matches = []
+
+        for word in found[i:i + max_prefix_words]:
+            if not word.startswith(prefix):
+                break
+
+            matches.append(self.postings[word])
+
+        if len(matches) == 1:
+            return matches[0]
+
+        merged = {}
+
+        for postings in matches:
+            for path, rows in postings.items():
+                merged.setdefault(path, []).extend(rows)
+
+        return merged
+
+    def search(self, query, limit=50, folders=None):
+        """
+        Find the notes with every word of the query.
+
+        # Parameters
+
+        query - str
+            - The words to find, the last one can be the start of a
+              word.
+
+        limit - int
+            - The most notes to return.
+
+        folders - list
+            - Only the notes in these folders, all of them if None.
+
+        # Return
+
+        A list of `Hit`s, best first.
+
+        """
+
+        terms = words(query)
+
+        if not terms:
+            return []
+
+        postings = [self.postings.get(word, {}) for word in terms[:-1]]
+        postings.append(self._prefixed(terms[-1]))
+
+        # the notes with every word, starting from the rarest
+        postings.sort(key=len)
+        candidates = set(postings[0])
+
+        for found in postings[1:]:
+            candidates.intersection_update(found)
+
+        if folders is not None:
+            roots = tuple(os.path.join(os.path.normpath(folder), '') for folder in folders)
+            candidates = [path for path in candidates if path.startswith(roots)]
+
+        # a word that is in no note, or no note with all of them
+        if not postings[0] or not candidates:
+            return []
+
+        count = float(len(self.notes))
+        weights = [math.log(1.0 + count / len(found)) for found in postings]
+
+        # 1 + log(tf) for the tf of every note, from a table
+        most = max([len(rows) for found in postings for rows in found.values()] or [1])
+        tf = [0.0] + [1.0 + math.log(n) for n in range(1, most + 1)]
+
+        scored = []
+        for path in candidates:
+            score = 0.0
+
+            for found, weight in zip(postings, weights):
+                score += weight * tf[len(found[path])]
+
+            scored.append((-score, path))
+
+        hits = []
+
+        # only the notes that are shown need a row
+        for score, path in heapq.nsmallest(limit, scored):
+            counts = {}
+
+            for found in postings:
+                for row in set(found[path]):
+                    counts[row] = counts.get(row, 0) + 1
+
+            # the first of the rows with the most words
+            row = min(counts, key=lambda r: (-counts[r], r))
+
+            hits.append(Hit(path, row, -score))
+
+        return hits
+
+    def __len__(self):
+        return len(self.notes)
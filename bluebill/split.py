@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Split a buffer into files, one per part, streamed to disk.
+
+A part is a list of (a, b) ranges of the buffer (see
+`buffer.find_regions_by_selections`) and is written to its file a chunk
+at a time, so splitting a 200MB log holds one chunk in memory, not the
+buffer or a part. Each file is written to a temporary file next to it
+that replaces it when it is complete, like `bluebill.export`. The
+numbers of files that are already there are skipped, an earlier split
+is never overwritten.
+
+>>> split_name('/notes/server.log', 2)
+'/notes/server (2).log'
+>>> import tempfile
+>>> log = os.path.join(tempfile.mkdtemp(), 'server.log')
+>>> text = 'head\\none\\ntwo\\n'
+>>> parts = split_parts(log, [(0, 5), (5, 9), (9, 13)], append_first=True)
+>>> write_parts(lambda a, b: text[a:b], parts, chunk_size=2)
+[9, 9]
+>>> open(split_name(log, 1)).read()
+'head\\ntwo\\n'
+>>> [os.path.basename(p) for p, ranges in split_parts(log, [(0, 5), (5, 9)])]
+['server (2).log', 'server (3).log']
+
+"""
+
+import os
+
+
+def split_name(path, index):
+    """
+    Return the path of part index of the file, `name (index).ext`.
+    """
+
+    base, ext = os.path.splitext(path)
+
+    return '{} ({}){}'.format(base, index, ext)
+
+
+def split_parts(path, regions, append_first=False, exists=os.path.exists):
+    """
+    Return the (path, ranges) of the files to split the buffer into.
+
+    # Parameters
+
+    path - str
+        - The file of the buffer, the parts are named after it.
+
+    regions - list
+        - (a, b) tuples, see `buffer.find_regions_by_selections`.
+
+    append_first - bool
+        - Put the first region at the top of each of the others instead
+          of in a file of its own (a header for every part).
+
+    exists - callable
+        - Checks a name, the numbers of the names that exist are
+          skipped.
+
+    """
+
+    if append_first:
+        ranges = [[regions[0], r] for r in regions[1:]]
+
+    else:
+        ranges = [[r] for r in regions]
+
+    parts = []
+    index = 0
+
+    for r in ranges:
+        name = split_name(path, index)
+
+        while exists(name):
+            index += 1
+            name = split_name(path, index)
+
+        parts.append((name, r))
+        index += 1
+
+    return parts
+
+
+def write_parts(read, parts, chunk_size=1 << 20, progress=None):
+    """
+    Write the parts to their files, chunk_size characters at a time.
+
+    # Parameters
+
+    read - callable
+        - Called with (a, b), returns the text of the buffer from a to b.
+          It can raise to stop the split (e.g. the buffer changed), no
+          file is left half written.
+
+    parts - list
+        - (path, ranges) tuples, see `split_parts`.
+
+    chunk_size - int
+        - The most characters read and held at once.
+
+    progress - callable
+        - Called with (characters written, total) after every chunk.
+
+    # Return
+
+    The characters written to each file, in the order of the parts.
+
+    """
+
+    total = sum(b - a for path, ranges in parts for a, b in ranges)
+    done = 0
+
+    sizes = []
+
+    for path, ranges in parts:
+        temp = path + '.tmp'
+
+        try:
+            with open(temp, 'w', encoding='utf-8', newline='') as f:
+                for a, b in ranges:
+                    for start in range(a, b, chunk_size):
+                        chunk = read(start, min(start + chunk_size, b))
+                        f.write(chunk)
+
+                        done += len(chunk)
+                        if progress is not None:
+                            progress(done, total)
+
+            os.replace(temp, path)
+
+        except Exception:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+            raise
+
+        sizes.append(sum(b - a for a, b in ranges))
+
+    return sizes
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+A stand-in for the Sublime Text plugin API so that the commands can be
+run, profiled and benchmarked on a machine without the editor.
+
+>>> from bluebill import standin
+>>> standin.install()
+>>> import sublime
+>>> import TimeParsing
+>>> view = sublime.View("T: 0800 - 0930")
+>>> view.sel().clear()
+>>> view.sel().add(sublime.Region(0, view.size()))
+>>> view.run_command("time_parsing")
+>>> view.substr(sublime.Region(0, view.size()))
+'T: 0800 - 0930\\n0800 - 0930 (1h30m -> 1.50h -> 5400s)'
+
+`install` registers the stand-in modules as `sublime` and
+`sublime_plugin` in `sys.modules`. Call it before importing any of the
+plugin files.
+"""
+
+import sys
+
+from . import sublime
+from . import sublime_plugin
+
+
+def install():
+    """
+    Register the stand-in modules as `sublime` and `sublime_plugin`. If
+    the real modules are already loaded (i.e. we are running inside the
+    editor) nothing is replaced.
+    """
+
+    sys.modules.setdefault("sublime", sublime)
+    sys.modules.setdefault("sublime_plugin", sublime_plugin)
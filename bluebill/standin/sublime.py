@@ -0,0 +1,903 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+An in-memory stand-in for the parts of the `sublime` module that the
+Bluebill commands use.
+
+The behaviour follows the Sublime Text API reference as closely as is
+reasonable for a plain Python buffer:
+
+- points are character offsets into the buffer
+- `Selection` is kept sorted and overlapping regions are merged
+- iterating a `Selection` reads the live regions, so inserting text
+  while looping over `view.sel()` shifts the cursors that have not been
+  visited yet, exactly like it does in the editor
+- `insert` and `replace` move the cursors that sit after the edit
+
+https://www.sublimetext.com/docs/3/api_reference.html
+
+"""
+
+import bisect
+import os
+import re
+import tempfile
+
+# Flags that show up in calls to the API. The values don't matter here,
+# they only have to exist.
+DRAW_EMPTY = 1
+HIDE_ON_MINIMAP = 2
+DRAW_EMPTY_AS_OVERWRITE = 4
+DRAW_NO_FILL = 32
+DRAW_NO_OUTLINE = 256
+DRAW_SOLID_UNDERLINE = 512
+DRAW_STIPPLED_UNDERLINE = 1024
+DRAW_SQUIGGLY_UNDERLINE = 2048
+HIDDEN = 128
+PERSISTENT = 16
+
+LAYOUT_INLINE = 0
+LAYOUT_BELOW = 1
+LAYOUT_BLOCK = 2
+
+ENCODED_POSITION = 1
+TRANSIENT = 4
+
+
+class Region(object):
+    """
+    Represents an area of the buffer. Empty regions, where a == b, are
+    valid.
+    """
+
+    __slots__ = ('a', 'b', 'xpos')
+
+    def __init__(self, a, b=None, xpos=-1):
+
+        if b is None:
+            b = a
+
+        self.a = a
+        self.b = b
+        self.xpos = xpos
+
+    def __str__(self):
+        return "(" + str(self.a) + ", " + str(self.b) + ")"
+
+    def __repr__(self):
+        return "(" + str(self.a) + ", " + str(self.b) + ")"
+
+    def __len__(self):
+        return self.size()
+
+    def __eq__(self, rhs):
+        return isinstance(rhs, Region) and self.a == rhs.a and self.b == rhs.b
+
+    def __ne__(self, rhs):
+        return not self.__eq__(rhs)
+
+    def __hash__(self):
+        return hash((self.a, self.b))
+
+    def __lt__(self, rhs):
+        lhs_begin = self.begin()
+        rhs_begin = rhs.begin()
+
+        if lhs_begin == rhs_begin:
+            return self.end() < rhs.end()
+        else:
+            return lhs_begin < rhs_begin
+
+    def __iter__(self):
+        return iter((self.a, self.b))
+
+    def to_tuple(self):
+        return (self.a, self.b)
+
+    def empty(self):
+        return self.a == self.b
+
+    def begin(self):
+        return self.a if self.a < self.b else self.b
+
+    def end(self):
+        return self.b if self.a < self.b else self.a
+
+    def size(self):
+        return abs(self.a - self.b)
+
+    def contains(self, x):
+        if isinstance(x, Region):
+            return self.contains(x.a) and self.contains(x.b)
+        else:
+            return x >= self.begin() and x <= self.end()
+
+    def cover(self, rhs):
+        a = min(self.begin(), rhs.begin())
+        b = max(self.end(), rhs.end())
+
+        if self.a < self.b:
+            return Region(a, b)
+        else:
+            return Region(b, a)
+
+    def intersection(self, rhs):
+        if self.end() <= rhs.begin():
+            return Region(0)
+        if self.begin() >= rhs.end():
+            return Region(0)
+
+        return Region(max(self.begin(), rhs.begin()), min(self.end(), rhs.end()))
+
+    def intersects(self, rhs):
+        lb = self.begin()
+        le = self.end()
+        rb = rhs.begin()
+        re_ = rhs.end()
+
+        return (
+            (lb == rb and le == re_) or
+            (rb > lb and rb < le) or (re_ > lb and re_ < le) or
+            (lb > rb and lb < re_) or (le > rb and le < re_))
+
+
+class Selection(object):
+    """
+    The set of regions selected in a view. The regions are kept in order
+    and overlapping regions are merged.
+    """
+
+    def __init__(self, view=None):
+        self._view = view
+        self._regions = []
+
+    def __len__(self):
+        return len(self._regions)
+
+    def __getitem__(self, index):
+        return self._regions[index]
+
+    def __delitem__(self, index):
+        del self._regions[index]
+
+    def __iter__(self):
+        # Like the real Selection, iteration reads the live list, so
+        # edits made inside the loop are visible to later iterations.
+        i = 0
+        while i < len(self._regions):
+            yield self._regions[i]
+            i += 1
+
+    def __eq__(self, rhs):
+        return rhs is not None and list(self) == list(rhs)
+
+    def __repr__(self):
+        return "Selection({!r})".format(self._regions)
+
+    def is_valid(self):
+        return True
+
+    def clear(self):
+        self._regions = []
+
+    def add(self, x):
+
+        if not isinstance(x, Region):
+            x = Region(x)
+
+        regions = self._regions
+        i = bisect.bisect_left(regions, x)
+
+        # merge with the neighbours that overlap the new region
+        while i > 0 and self._overlaps(regions[i - 1], x):
+            x = self._merge(regions[i - 1], x)
+            i -= 1
+            del regions[i]
+
+        while i < len(regions) and self._overlaps(regions[i], x):
+            x = self._merge(regions[i], x)
+            del regions[i]
+
+        regions.insert(i, x)
+
+    def add_all(self, regions):
+        for r in regions:
+            self.add(r)
+
+    def subtract(self, region):
+        self._regions = [r for r in self._regions if not region.contains(r)]
+
+    def contains(self, region):
+        return any(r.contains(region) for r in self._regions)
+
+    def _set(self, regions):
+        # internal, used by the view to shift the regions after an edit.
+        # The regions are already in order so a single merge pass is
+        # enough.
+        merged = []
+        for r in sorted(regions):
+            if merged and self._overlaps(merged[-1], r):
+                merged[-1] = self._merge(merged[-1], r)
+            else:
+                merged.append(r)
+
+        self._regions = merged
+
+    @staticmethod
+    def _overlaps(lhs, rhs):
+        if lhs.empty() or rhs.empty():
+            return lhs.contains(rhs) or rhs.contains(lhs)
+
+        return lhs.begin() < rhs.end() and rhs.begin() < lhs.end()
+
+    @staticmethod
+    def _merge(lhs, rhs):
+        return Region(min(lhs.begin(), rhs.begin()), max(lhs.end(), rhs.end()))
+
+
+class Edit(object):
+    """
+    The token passed to `TextCommand.run`. It carries no state.
+    """
+
+    def __init__(self, view=None):
+        self.view = view
+
+
+class HistoricPosition(object):
+    """
+    A point in the buffer as it was before a `TextChange`.
+    """
+
+    def __init__(self, pt, row, col):
+        self.pt = pt
+        self.row = row
+        self.col = col
+
+
+class TextChange(object):
+    """
+    An edit reported to a `sublime_plugin.TextChangeListener`: a to b,
+    before the edit, was replaced with str.
+    """
+
+    def __init__(self, a, b, text):
+        self.a = a
+        self.b = b
+        self.str = text
+        self.len_utf8 = len(text.encode('utf-8'))
+
+
+class Buffer(object):
+    """
+    The text of a view. The stand-in has one view per buffer.
+    """
+
+    def __init__(self, view):
+        self._view = view
+
+    def id(self):
+        return self._view.buffer_id()
+
+    def views(self):
+        return [self._view]
+
+    def primary_view(self):
+        return self._view
+
+
+class Phantom(object):
+
+    def __init__(self, region, content, layout, on_navigate=None):
+        self.region = region
+        self.content = content
+        self.layout = layout
+        self.on_navigate = on_navigate
+
+
+class PhantomSet(object):
+    """
+    Collects the phantoms for a view. The stand-in only remembers them.
+    """
+
+    def __init__(self, view, key=""):
+        self.view = view
+        self.key = key
+        self.phantoms = []
+
+    def update(self, new_phantoms):
+        self.phantoms = list(new_phantoms)
+
+
+class Settings(object):
+
+    def __init__(self, values=None):
+        self._values = dict(values or {})
+        self._callbacks = {}
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def has(self, key):
+        return key in self._values
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    def erase(self, key):
+        self._values.pop(key, None)
+
+    def add_on_change(self, tag, callback):
+        self._callbacks[tag] = callback
+
+    def clear_on_change(self, tag):
+        self._callbacks.pop(tag, None)
+
+
+_newline_pattern = re.compile(r'\n')
+
+
+class View(object):
+    """
+    An in-memory text buffer that implements the View API used by the
+    Bluebill commands.
+    """
+
+    _next_id = 1
+
+    def __init__(self, text="", window=None, file_name=None):
+        self._text = text
+        self._window = window
+        self._file_name = file_name
+        self._name = ""
+        self._sel = Selection(self)
+        self._line_starts = None
+        self._change_count = 0
+        self._regions = {}
+        self._status = {}
+        self._settings = Settings()
+        self._scratch = False
+        self._read_only = False
+
+        # the last command run with run_command, for command_history
+        self._last_command = ("", None, 0)
+
+        self._id = View._next_id
+        View._next_id += 1
+
+        self._sel.add(Region(0))
+
+    # ---- identity
+
+    def id(self):
+        return self._id
+
+    def buffer_id(self):
+        return self._id
+
+    def buffer(self):
+        return Buffer(self)
+
+    def is_valid(self):
+        return True
+
+    def window(self):
+        return self._window
+
+    def file_name(self):
+        return self._file_name
+
+    def name(self):
+        return self._name
+
+    def set_name(self, name):
+        self._name = name
+
+    def retarget(self, new_fname):
+        self._file_name = new_fname
+
+    def is_loading(self):
+        return False
+
+    def is_dirty(self):
+        return self._change_count > 0
+
+    def is_read_only(self):
+        return self._read_only
+
+    def set_read_only(self, value):
+        self._read_only = value
+
+    def is_scratch(self):
+        return self._scratch
+
+    def set_scratch(self, value):
+        self._scratch = value
+
+    def settings(self):
+        return self._settings
+
+    def change_count(self):
+        return self._change_count
+
+    # ---- buffer access
+
+    def size(self):
+        return len(self._text)
+
+    def substr(self, x):
+
+        if isinstance(x, Region):
+            return self._text[x.begin():x.end()]
+
+        return self._text[x:x + 1]
+
+    def _starts(self):
+
+        if self._line_starts is None:
+            self._line_starts = [0] + [m.end() for m in _newline_pattern.finditer(self._text)]
+
+        return self._line_starts
+
+    def rowcol(self, tp):
+
+        tp = max(0, min(tp, len(self._text)))
+        starts = self._starts()
+        row = bisect.bisect_right(starts, tp) - 1
+
+        return row, tp - starts[row]
+
+    def text_point(self, row, col):
+
+        starts = self._starts()
+
+        if row < 0:
+            return 0
+
+        if row >= len(starts):
+            return len(self._text)
+
+        return min(starts[row] + col, self._line_end(row))
+
+    def _line_end(self, row):
+
+        starts = self._starts()
+
+        if row + 1 < len(starts):
+            return starts[row + 1] - 1
+
+        return len(self._text)
+
+    def line(self, x):
+
+        if isinstance(x, Region):
+            a = self.line(x.begin())
+            b = self.line(x.end())
+            return Region(a.a, b.b)
+
+        row, col = self.rowcol(x)
+
+        return Region(self._starts()[row], self._line_end(row))
+
+    def full_line(self, x):
+
+        r = self.line(x)
+
+        if r.b < len(self._text):
+            return Region(r.a, r.b + 1)
+
+        return r
+
+    def lines(self, r):
+        return self.split_by_newlines(self.line(r))
+
+    def split_by_newlines(self, r):
+
+        begin = r.begin()
+        end = r.end()
+
+        if begin == end:
+            return [Region(begin, end)]
+
+        starts = self._starts()
+        row = bisect.bisect_right(starts, begin) - 1
+        last_row = bisect.bisect_right(starts, end) - 1
+
+        result = []
+        a = begin
+        while row <= last_row:
+            b = min(self._line_end(row), end)
+            result.append(Region(a, b))
+            row += 1
+            if row <= last_row:
+                a = starts[row]
+
+        # a region ending right after a newline does not produce an
+        # empty trailing line
+        if len(result) > 1 and result[-1].empty() and end == starts[last_row] and end != len(self._text):
+            result.pop()
+
+        return result
+
+    def find(self, pattern, start_pt, flags=0):
+
+        m = re.compile(pattern, re.MULTILINE).search(self._text, start_pt)
+
+        if m:
+            return Region(m.start(), m.end())
+
+        return Region(-1, -1)
+
+    def find_all(self, pattern, flags=0):
+        return [Region(m.start(), m.end()) for m in re.finditer(pattern, self._text, re.MULTILINE)]
+
+    # ---- editing
+
+    def sel(self):
+        return self._sel
+
+    def insert(self, edit, pt, text):
+
+        pt = max(0, min(pt, len(self._text)))
+        self._apply(pt, pt, text, shift_at_point=True)
+
+        return len(text)
+
+    def erase(self, edit, region):
+        self._apply(region.begin(), region.end(), "")
+
+    def replace(self, edit, region, text):
+        self._apply(region.begin(), region.end(), text)
+
+    def _apply(self, a, b, text, shift_at_point=False):
+
+        # lazy import so the module can be used without sublime_plugin
+        from . import sublime_plugin
+
+        change = None
+        if sublime_plugin.has_text_change_listeners():
+            change = TextChange(HistoricPosition(a, *self.rowcol(a)), HistoricPosition(b, *self.rowcol(b)), text)
+
+        self._text = self._text[:a] + text + self._text[b:]
+        self._change_count += 1
+
+        delta = len(text) - (b - a)
+
+        # patch the line index rather than rebuilding it
+        starts = self._line_starts
+        if starts is not None:
+            first = bisect.bisect_right(starts, a)
+            last = bisect.bisect_right(starts, b)
+
+            starts[first:] = [a + m.end() for m in _newline_pattern.finditer(text)] + [p + delta for p in starts[last:]]
+
+        def move(p):
+            if p > b or (shift_at_point and p == b):
+                return p + delta
+
+            if p > a:
+                # the point was inside the replaced text
+                return a + len(text)
+
+            return p
+
+        self._sel._set([Region(move(r.a), move(r.b)) for r in self._sel])
+
+        for key, (regions, scope, icon, flags) in list(self._regions.items()):
+            self._regions[key] = ([Region(move(r.a), move(r.b)) for r in regions], scope, icon, flags)
+
+        if change is not None:
+            sublime_plugin.text_changed(self, [change])
+
+    def run_command(self, cmd, args=None):
+        # lazy import so the module can be used without sublime_plugin
+        from . import sublime_plugin
+        self._last_command = (cmd, args, 1)
+        sublime_plugin.run_text_command(self, cmd, args)
+
+    def command_history(self, index, modifying_only=False):
+        """
+        The last command run with run_command, whatever the index and
+        whether it modified the buffer or not.
+        """
+
+        return self._last_command
+
+    # ---- decorations
+
+    def add_regions(self, key, regions, scope="", icon="", flags=0, annotations=None, annotation_color="", on_navigate=None, on_close=None):
+        self._regions[key] = (list(regions), scope, icon, flags)
+
+    def get_regions(self, key):
+
+        if key in self._regions:
+            return list(self._regions[key][0])
+
+        return []
+
+    def erase_regions(self, key):
+        self._regions.pop(key, None)
+
+    def set_status(self, key, value):
+        self._status[key] = value
+
+    def get_status(self, key):
+        return self._status.get(key, "")
+
+    def erase_status(self, key):
+        self._status.pop(key, None)
+
+    def visible_region(self):
+        """
+        There is no window to scroll, the first 60 lines are "visible".
+        """
+
+        return Region(0, self.text_point(60, 0))
+
+    def show(self, x, show_surrounds=True):
+        pass
+
+    def show_at_center(self, x):
+        pass
+
+    def show_popup(self, content, flags=0, location=-1, max_width=320, max_height=240, on_navigate=None, on_hide=None):
+        pass
+
+    def set_syntax_file(self, syntax_file):
+        pass
+
+    def assign_syntax(self, syntax):
+        pass
+
+    def close(self):
+
+        if self._window is not None:
+            self._window._close_view(self)
+
+        return True
+
+
+class Window(object):
+    """
+    A window holding stand-in views. `extract_variables` is driven by
+    the folders passed in.
+    """
+
+    _next_id = 1
+
+    def __init__(self, folders=None, project_file_name=None):
+        self._folders = list(folders or [])
+        self._project_file_name = project_file_name
+        self._views = []
+        self._panels = {}
+        self._active_view = None
+        self._status = {}
+
+        # The last quick panel shown, as (items, on_select). Headless
+        # callers can drive the choice with `select_quick_panel_item`.
+        self.quick_panel = None
+
+        # The last input panel shown, as (caption, initial_text, on_done),
+        # answered with `submit_input_panel`.
+        self.input_panel = None
+
+        self._id = Window._next_id
+        Window._next_id += 1
+
+    def id(self):
+        return self._id
+
+    def is_valid(self):
+        return True
+
+    def folders(self):
+        return list(self._folders)
+
+    def project_file_name(self):
+        return self._project_file_name
+
+    def project_data(self):
+        return {"folders": [{"path": f} for f in self._folders]}
+
+    def set_project_data(self, data):
+        self._folders = [f["path"] for f in data.get("folders", [])]
+
+    def extract_variables(self):
+
+        variables = {
+            "packages": packages_path(),
+            "platform": platform(),
+        }
+
+        if self._folders:
+            variables["folder"] = self._folders[0]
+
+        if self._project_file_name:
+            variables["project"] = self._project_file_name
+            variables["project_path"] = os.path.dirname(self._project_file_name)
+            variables["project_name"] = os.path.basename(self._project_file_name)
+
+        view = self.active_view()
+        if view is not None and view.file_name():
+            variables["file"] = view.file_name()
+            variables["file_path"] = os.path.dirname(view.file_name())
+            variables["file_name"] = os.path.basename(view.file_name())
+
+        return variables
+
+    def views(self):
+        return list(self._views)
+
+    def active_view(self):
+        return self._active_view
+
+    def focus_view(self, view):
+        self._active_view = view
+
+    def new_file(self, flags=0, syntax=""):
+
+        view = View(window=self)
+        self._views.append(view)
+        self._active_view = view
+
+        return view
+
+    def open_file(self, fname, flags=0, group=-1):
+
+        # strip an encoded :row:col suffix
+        path = fname
+        if flags & ENCODED_POSITION:
+            path = re.sub(r'(:\d+){1,2}$', '', fname)
+
+        text = ""
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+
+        view = View(text, window=self, file_name=path)
+        self._views.append(view)
+        self._active_view = view
+
+        return view
+
+    def find_open_file(self, fname):
+
+        for view in self._views:
+            if view.file_name() == fname:
+                return view
+
+        return None
+
+    def _close_view(self, view):
+
+        if view in self._views:
+            self._views.remove(view)
+
+        if self._active_view is view:
+            self._active_view = self._views[-1] if self._views else None
+
+    def create_output_panel(self, name, unlisted=False):
+
+        view = View(window=self)
+        self._panels[name] = view
+
+        return view
+
+    def find_output_panel(self, name):
+        return self._panels.get(name)
+
+    def destroy_output_panel(self, name):
+        self._panels.pop(name, None)
+
+    def run_command(self, cmd, args=None):
+        from . import sublime_plugin
+        sublime_plugin.run_window_command(self, cmd, args)
+
+    def show_quick_panel(self, items, on_select, flags=0, selected_index=-1, on_highlight=None, placeholder=""):
+        self.quick_panel = (items, on_select)
+
+    def select_quick_panel_item(self, index):
+
+        items, on_select = self.quick_panel
+        self.quick_panel = None
+        on_select(index)
+
+    def show_input_panel(self, caption, initial_text, on_done, on_change, on_cancel):
+        self.input_panel = (caption, initial_text, on_done)
+        return View(window=self)
+
+    def submit_input_panel(self, text=None):
+
+        caption, initial_text, on_done = self.input_panel
+        self.input_panel = None
+        on_done(initial_text if text is None else text)
+
+    def status_message(self, msg):
+        status_message(msg)
+
+
+# ---- module level functions
+
+_windows = []
+_settings = {}
+_status_messages = []
+
+
+def version():
+    return "4000"
+
+
+def platform():
+
+    import platform as _platform
+    system = _platform.system()
+
+    return {"Darwin": "osx", "Windows": "windows"}.get(system, "linux")
+
+
+def arch():
+    return "x64"
+
+
+def packages_path():
+    return os.path.join(tempfile.gettempdir(), "bluebill-standin", "Packages")
+
+
+def installed_packages_path():
+    return os.path.join(tempfile.gettempdir(), "bluebill-standin", "Installed Packages")
+
+
+def cache_path():
+    return os.path.join(tempfile.gettempdir(), "bluebill-standin", "Cache")
+
+
+def active_window():
+
+    if not _windows:
+        _windows.append(Window())
+
+    return _windows[-1]
+
+
+def windows():
+    return list(_windows)
+
+
+def load_settings(base_name):
+
+    if base_name not in _settings:
+        _settings[base_name] = Settings()
+
+    return _settings[base_name]
+
+
+def save_settings(base_name):
+    pass
+
+
+def status_message(msg):
+    _status_messages.append(msg)
+
+
+def error_message(msg):
+    _status_messages.append(msg)
+
+
+def message_dialog(msg):
+    _status_messages.append(msg)
+
+
+def ok_cancel_dialog(msg, ok_title=""):
+    return True
+
+
+def set_timeout(callback, delay=0):
+    """
+    There is no event loop headless, callbacks run immediately.
+    """
+    callback()
+
+
+def set_timeout_async(callback, delay=0):
+    callback()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+An in-memory stand-in for the `sublime_plugin` module.
+
+Commands are looked up by the Sublime Text naming convention,
+`PhrasesLikeThisCommand` -> `phrases_like_this`, from the subclasses of
+the command base classes that have been imported.
+"""
+
+import re
+
+from . import sublime
+
+
+class Command(object):
+
+    def name(self):
+        return command_name(type(self))
+
+    def is_enabled(self, *args, **kwargs):
+        return True
+
+    def is_visible(self, *args, **kwargs):
+        return True
+
+    def description(self, *args, **kwargs):
+        return ""
+
+
+class ApplicationCommand(Command):
+    pass
+
+
+class WindowCommand(Command):
+
+    def __init__(self, window):
+        self.window = window
+
+
+class TextCommand(Command):
+
+    def __init__(self, view):
+        self.view = view
+
+
+class EventListener(object):
+    pass
+
+
+class TextChangeListener(object):
+    """
+    Told about every edit of the buffers it applies to, see
+    `text_changed`.
+    """
+
+    @classmethod
+    def is_applicable(cls, buffer):
+        return True
+
+    def __init__(self):
+        self.buffer = None
+
+    def on_text_changed(self, changes):
+        pass
+
+
+class ViewEventListener(object):
+
+    @classmethod
+    def is_applicable(cls, settings):
+        return True
+
+    @classmethod
+    def applies_to_primary_view_only(cls):
+        return True
+
+    def __init__(self, view):
+        self.view = view
+
+
+def command_name(cls):
+    """
+    Convert the class name to the command name the way Sublime Text
+    does.
+    """
+
+    name = cls.__name__
+
+    if name.endswith("Command"):
+        name = name[:-len("Command")]
+
+    return re.sub(r'(?<=[a-z0-9])([A-Z])', r'_\1', name).lower()
+
+
+def _all_subclasses(cls):
+
+    for sub in cls.__subclasses__():
+        yield sub
+
+        for s in _all_subclasses(sub):
+            yield s
+
+
+def find_command(base, cmd):
+
+    for cls in _all_subclasses(base):
+        if command_name(cls) == cmd:
+            return cls
+
+    raise KeyError("Unknown command: {}".format(cmd))
+
+
+# The built in commands that plugins lean on
+def _append(view, edit, characters, force=False, scroll_to_end=False):
+    view.insert(edit, view.size(), characters)
+
+
+_builtin_text_commands = {
+    "append": _append,
+}
+
+_builtin_window_commands = {
+    "show_panel": lambda window, panel, toggle=False: None,
+    "hide_panel": lambda window, panel=None, cancel=False: None,
+}
+
+
+# (listener class, buffer id) -> the listener of the buffer
+_text_change_listeners = {}
+
+
+def has_text_change_listeners():
+    return bool(TextChangeListener.__subclasses__())
+
+
+def text_changed(view, changes):
+    """
+    Call on_text_changed of every TextChangeListener that applies to
+    the buffer of the view, the way the editor does after an edit.
+    """
+
+    buffer = view.buffer()
+
+    for cls in _all_subclasses(TextChangeListener):
+        if not cls.is_applicable(buffer):
+            continue
+
+        listener = _text_change_listeners.get((cls, buffer.id()))
+
+        if listener is None:
+            listener = _text_change_listeners[cls, buffer.id()] = cls()
+            listener.buffer = buffer
+
+        listener.on_text_changed(changes)
+
+
+def run_text_command(view, cmd, args=None):
+
+    if cmd in _builtin_text_commands:
+        return _builtin_text_commands[cmd](view, sublime.Edit(view), **(args or {}))
+
+    cls = find_command(TextCommand, cmd)
+
+    return cls(view).run(sublime.Edit(view), **(args or {}))
+
+
+def run_window_command(window, cmd, args=None):
+
+    if cmd in _builtin_window_commands:
+        return _builtin_window_commands[cmd](window, **(args or {}))
+
+    cls = find_command(WindowCommand, cmd)
+
+    return cls(window).run(**(args or {}))
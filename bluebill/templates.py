@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Note templates, the files in the .templates folder next to a project.
+
+The name of a file (without the extension) is the name of the template
+and the text follows the `string.Template` syntax, `$Date` or `${Date}`
+and `$$` for a dollar sign. The variables are made by `note_variables`.
+A variable the template names that isn't one of them is left as it is.
+
+A `TemplateFolder` lists the folder again only when the modified time of
+the folder changes (a file was added, removed or renamed) and reads and
+compiles a template the first time it is used, or when the file changes.
+A compiled template is the text split into the parts between the
+variables, so filling it in is a join:
+
+>>> t = CompiledTemplate('# $Name\\n\\n${Date} costs $$5, $Other')
+>>> sorted(t.names)
+['Date', 'Name', 'Other']
+>>> t.render({'Name': 'Standup', 'Date': '2020-06-20'})
+'# Standup\\n\\n2020-06-20 costs $5, $Other'
+
+"""
+
+import os
+import string
+import threading
+
+
+# The variables a template can use, see `note_variables`
+template_variables = ('Date', 'Time', 'UUID', 'Project', 'Name')
+
+_pattern = string.Template.pattern
+
+
+class CompiledTemplate(object):
+    """
+    A template split into the text between the variables and the
+    variables.
+
+    # Parameters
+
+    text - str
+        - The text of the template.
+
+    """
+
+    def __init__(self, text):
+
+        # the literal text, one more than the fields
+        self.parts = []
+
+        # (name, the text in the template) of each variable
+        self.fields = []
+
+        start = 0
+        literal = []
+
+        for m in _pattern.finditer(text):
+            literal.append(text[start:m.start()])
+            start = m.end()
+
+            name = m.group('named') or m.group('braced')
+
+            if name is None:
+                # $$ or a $ that isn't a variable
+                literal.append('$' if m.group('escaped') is not None else m.group())
+                continue
+
+            self.parts.append(''.join(literal))
+            self.fields.append((name, m.group()))
+            literal = []
+
+        literal.append(text[start:])
+        self.parts.append(''.join(literal))
+
+        self.names = frozenset(name for name, raw in self.fields)
+
+    def render(self, variables):
+        """
+        Return the text with the variables filled in.
+
+        # Parameters
+
+        variables - dict
+            - name -> str
+
+        """
+
+        out = [self.parts[0]]
+
+        for (name, raw), part in zip(self.fields, self.parts[1:]):
+            out.append(variables.get(name, raw))
+            out.append(part)
+
+        return ''.join(out)
+
+
+def note_variables(now, uuid, project, name):
+    """
+    Return the variables for a new note.
+
+    # Parameters
+
+    now - datetime
+        - The time the note is made, for $Date (2020-06-20) and $Time
+          (14:05).
+
+    uuid - str
+        - For $UUID.
+
+    project - str
+        - The name of the project, for $Project.
+
+    name - str
+        - The file name of the note, see `suggest_date_based_name`, for
+          $Name.
+
+    """
+
+    return {
+        'Date': now.date().isoformat(),
+        'Time': now.strftime('%H:%M'),
+        'UUID': uuid,
+        'Project': project,
+        'Name': name,
+    }
+
+
+class TemplateFolder(object):
+    """
+    The templates in a folder, listed and compiled as they are needed.
+
+    # Parameters
+
+    folder - str
+        - The templates folder.
+
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+
+        # the modified time of the folder when it was listed
+        self._mtime = None
+
+        self._names = []
+
+        # name -> path
+        self._paths = {}
+
+        # path -> (modified time, size, CompiledTemplate)
+        self._compiled = {}
+
+        # the templates read from disk, for the benchmark
+        self.reads = 0
+
+        self._lock = threading.Lock()
+
+    def names(self):
+        """
+        Return the names of the templates, sorted. The folder is only
+        listed again when it changed, otherwise this is one stat call.
+        """
+
+        try:
+            mtime = os.stat(self.folder).st_mtime_ns
+
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            if mtime != self._mtime:
+                self._list(mtime)
+
+            return self._names
+
+    def _list(self, mtime):
+
+        paths = {}
+
+        if mtime is not None:
+            for filename in sorted(os.listdir(self.folder)):
+                path = os.path.join(self.folder, filename)
+
+                if filename.startswith('.') or not os.path.isfile(path):
+                    continue
+
+                paths[os.path.splitext(filename)[0]] = path
+
+        self._paths = paths
+        self._names = sorted(paths, key=str.lower)
+        self._mtime = mtime
+
+        # forget the templates that are gone
+        kept = set(paths.values())
+        self._compiled = {p: c for p, c in self._compiled.items() if p in kept}
+
+    def get(self, name):
+        """
+        Return the CompiledTemplate of the name, read again if the file
+        changed. A KeyError is raised if there is no such template.
+        """
+
+        self.names()
+
+        path = self._paths[name]
+        st = os.stat(path)
+
+        with self._lock:
+            cached = self._compiled.get(path)
+
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+
+        with open(path, 'r', encoding='utf-8') as f:
+            template = CompiledTemplate(f.read())
+
+        with self._lock:
+            self._compiled[path] = (st.st_mtime_ns, st.st_size, template)
+            self.reads += 1
+
+        return template
+
+    def render(self, name, variables):
+        """
+        Return the text of the template with the variables filled in.
+        """
+
+        return self.get(name).render(variables)
+
+    def precompile(self):
+        """
+        Read and compile every template that isn't already, meant for a
+        background thread so the first note made is as quick as the rest.
+        """
+
+        for name in self.names():
+            try:
+                self.get(name)
+
+            except (OSError, UnicodeDecodeError, KeyError):
+                # removed or not text, left for when it is used
+                pass
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Parse time sheet entries of the form:
+
+    T: 0645 - 0730, 0815 - 1200, 1230 - 1545
+    T: 645am - 730am, 815am - 12pm, 1230pm - 345pm
+
+and total up the time spent.
+
+A line is tokenized in a single pass with one compiled pattern that
+understands both the military (HHMM) and the standard (h[mm]am/pm)
+grammars. A line that uses am/pm anywhere is treated as standard time.
+
+Copyright (c) 2015 Troy Williams
+
+License: The MIT License (http://www.opensource.org/licenses/mit-license.php)
+"""
+
+import re
+
+from .clock import (
+    military_minutes,
+    am_minutes,
+    pm_minutes,
+    military_labels,
+    standard_labels,
+    format_total,
+)
+
+
+# A time is 1 to 4 digits with an optional am/pm suffix. A span is two
+# times separated by a dash and terminated by a comma or the end of the
+# line.
+_time = r'(\d{1,4})[ \t]*([AaPp][Mm])?'
+
+_span_pattern = re.compile(
+    r'[ \t]*' + _time + r'[ \t]*-[ \t]*' + _time + r'[ \t]*(,|$)'
+)
+
+# Lines in a buffer that hold time ranges
+time_line_pattern = re.compile(r'^T:.*$', re.MULTILINE)
+
+# The summary line that the parser writes after a time range line,
+# i.e. 0800 - 0930 (1h30m -> 1.50h -> 5400s)
+result_pattern = re.compile(r'\(\d+h\d+m -> \d+\.\d\dh -> \d+s\)$')
+
+
+def _military_time(digits, suffix):
+    """
+    Convert an HHMM token to the minute of the day.
+    """
+
+    if not suffix:
+        minute_of_day = military_minutes.get(digits)
+
+        if minute_of_day is not None:
+            return minute_of_day
+
+    # only the error cases get this far
+    if suffix:
+        raise ValueError("unexpected am/pm in {}{}".format(digits, suffix))
+
+    if len(digits) != 4:
+        raise ValueError("Not enough digits in {}".format(digits))
+
+    raise ValueError("{} is not a valid time".format(digits))
+
+
+def _standard_time(digits, suffix):
+    """
+    Convert an h[mm]am/pm token to the minute of the day.
+
+    The digits are interpreted as:
+
+    - 1 or 2 digits - the hour, 1pm, 11am
+    - 3 digits - hmm, 111pm -> 1:11pm
+    - 4 digits - hhmm, 1230pm
+
+    """
+
+    if not suffix:
+        raise ValueError("missing am/pm in {}".format(digits))
+
+    table = pm_minutes if suffix[0] in 'pP' else am_minutes
+    minute_of_day = table.get(digits)
+
+    if minute_of_day is None:
+        raise ValueError("{}{} is not a valid time".format(digits, suffix))
+
+    return minute_of_day
+
+
+def tokenize_time_ranges(time_ranges):
+    """
+    Split a time range line into its spans in a single pass.
+
+    # Parameters
+
+    time_ranges - str
+        - The line, starting with `T:`.
+
+    # Return
+
+    A tuple (military, spans) where military is True if the line uses
+    the HHMM grammar and spans is a list of (start, end) tuples, in the
+    order they appear. The times are minutes of the day and a reversed
+    span has its start and end swapped.
+
+    # Raises
+
+    ValueError if the line isn't a valid time range.
+
+    """
+
+    if not time_ranges.startswith('T:'):
+        raise ValueError("{} is not a valid time range".format(time_ranges))
+
+    body = time_ranges[2:].strip()
+
+    tokens = []
+    military = True
+    pos = 0
+
+    while True:
+        match = _span_pattern.match(body, pos)
+
+        if match is None:
+            time_span = body[pos:].partition(',')[0]
+
+            if not time_span.partition('-')[2].strip():
+                raise ValueError("missing range in {}".format(time_span))
+
+            raise ValueError("{} is not a valid time range".format(time_span.strip()))
+
+        left_digits, left_suffix, right_digits, right_suffix, separator = match.groups()
+
+        if left_suffix or right_suffix:
+            military = False
+
+        tokens.append((left_digits, left_suffix, right_digits, right_suffix))
+
+        pos = match.end()
+
+        if separator != ',':
+            break
+
+    convert = _military_time if military else _standard_time
+
+    spans = []
+    for left_digits, left_suffix, right_digits, right_suffix in tokens:
+        start = convert(left_digits, left_suffix)
+        end = convert(right_digits, right_suffix)
+
+        # see if the times need to be swapped
+        if start > end:
+            start, end = end, start
+
+        spans.append((start, end))
+
+    return military, spans
+
+
+def total_minutes(spans):
+    """
+    Return the sum of the span durations, in minutes.
+    """
+
+    return sum([end - start for start, end in spans])
+
+
+def format_time_ranges(spans, military):
+    """
+    Format the spans returned by `tokenize_time_ranges` with the total
+    time attached:
+
+    0645 - 0730, 0815 - 1200, 1230 - 1545 (7h45m -> 7.75h -> 27900s)
+
+    """
+
+    labels = military_labels if military else standard_labels
+
+    formatted_times = ', '.join([labels[start] + ' - ' + labels[end] for start, end in spans])
+
+    return '{0} ({1})'.format(formatted_times, format_total(total_minutes(spans)))
+
+
+def parse_time_ranges(time_ranges):
+    """
+    Parse a time range line in either grammar and return the formatted
+    string with the total time attached.
+    """
+
+    military, spans = tokenize_time_ranges(time_ranges)
+
+    return format_time_ranges(spans, military)
+
+
+def parse_time_ranges_standard(time_ranges):
+    """
+    Takes  a range of time_ranges of the form:
+    T: 645am - 730am, 815am - 12pm, 1230pm - 345pm. The method attempts to
+    parse out the time ranges.
+
+    It assumes that all of the times are on the same date.
+
+    returns a properly formatted string with the total time attached:
+    06:45AM - 07:30AM, 08:15AM - 12:00PM, 12:30PM - 03:45PM (7h45m -> 7.75h -> 27900s)
+
+    """
+
+    military, spans = tokenize_time_ranges(time_ranges)
+
+    if military:
+        raise ValueError("missing am/pm in {}".format(time_ranges))
+
+    return format_time_ranges(spans, military)
+
+
+def parse_time_ranges_military(time_ranges):
+    """
+    Takes  a range of time_ranges of the form:
+    T: 0645 - 0730, 0815 - 1200, 1230 - 1545. The method attempts to
+    parse out the time ranges.
+
+    It assumes that all of the times are on the same date.
+
+    returns a properly formatted string with the total time attached:
+    0645 - 0730, 0815 - 1200, 1230 - 1545 (7h45m -> 7.75h -> 27900s)
+
+    """
+
+    military, spans = tokenize_time_ranges(time_ranges)
+
+    if not military:
+        raise ValueError("unexpected am/pm in {}".format(time_ranges))
+
+    return format_time_ranges(spans, military)
+
+
+def parse_time_sheet(text):
+    """
+    Find and parse every time range line (lines starting with `T:`) in
+    the text. A bad line doesn't stop the run, its error is reported
+    with the line instead.
+
+    # Parameters
+
+    text - str
+        - The text to scan, usually the whole buffer.
+
+    # Return
+
+    A generator of (start, end, result, error) tuples, one per time
+    range line. start and end are the offsets of the line in the text.
+    Exactly one of result (the formatted string) or error (the message)
+    is set.
+
+    """
+
+    for match in time_line_pattern.finditer(text):
+
+        try:
+            yield match.start(), match.end(), parse_time_ranges(match.group()), None
+
+        except ValueError as e:
+            yield match.start(), match.end(), None, str(e)
+
+
+def time_sheet_edits(text):
+    """
+    Parse every time range line in the text and build the edits that
+    put the result on the line after each one. If the line after a time
+    range already holds a result from an earlier run, it is replaced
+    rather than duplicated, and left alone when it is the same. The
+    lines in between are never touched.
+
+    # Parameters
+
+    text - str
+        - The whole buffer.
+
+    # Return
+
+    A tuple (edits, count, errors). edits is a list of (a, b, text)
+    tuples in order, see `bluebill.transaction`. count is the number of
+    lines parsed and errors is a list of (offset, message) tuples for
+    the lines that failed. The offsets are positions in the text after
+    the edits have been made.
+
+    """
+
+    edits = []
+    errors = []
+    count = 0
+
+    # the change in length of the edits so far
+    shift = 0
+
+    for start, end, result, error in parse_time_sheet(text):
+
+        if error is not None:
+            errors.append((start + shift, error))
+            continue
+
+        count += 1
+
+        # Does the next line hold the result from an earlier run?
+        next_start = end + 1
+        next_end = text.find('\n', next_start)
+        if next_end < 0:
+            next_end = len(text)
+
+        if next_start <= len(text) and result_pattern.search(text, next_start, next_end):
+            old_end = next_end
+
+        else:
+            old_end = end
+
+        new = '\n' + result
+
+        if text[end:old_end] == new:
+            continue
+
+        edits.append((end, old_end, new))
+        shift += len(new) - (old_end - end)
+
+    return edits, count, errors
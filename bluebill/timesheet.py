@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Keep the time range lines of a buffer, and their totals, up to date as
+the buffer is edited.
+
+A `TimeSheet` remembers which rows hold `T:` lines and the parsed total
+of each one. After an edit only the rows that changed are scanned, the
+rows after them are moved, and parse results are cached by line
+content so a line is never parsed twice. A
+buffer is split into days by markdown headings that contain an ISO date
+(`## 2024-03-01`), the rows before the first heading belong to the
+sheet's own date (usually taken from the file name).
+"""
+
+import bisect
+import re
+
+from collections import namedtuple
+
+from .clock import format_total
+from .timeparsing import tokenize_time_ranges
+
+
+# The parse result of a single time range line, spans is a tuple of
+# (start, end) minutes. minutes and spans are None if the line has an
+# error.
+TimeLine = namedtuple('TimeLine', 'minutes summary error spans')
+
+date_pattern = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# A time range line or a heading with a date in it
+_scan_pattern = re.compile(r'^(?:T:.*|#+[^\n]*?\d{4}-\d{2}-\d{2}[^\n]*)$', re.MULTILINE)
+
+# Parse results by line content. It is shared by every sheet and cleared
+# when it gets too big, which is cheaper than tracking usage.
+_line_cache = {}
+_line_cache_limit = 100000
+
+
+def parse_line(line, cache=True):
+    """
+    Parse a time range line and return its `TimeLine`. The result is
+    cached by the line content, unless cache is False (a one off pass
+    over many lines that would only churn the cache).
+    """
+
+    result = _line_cache.get(line)
+
+    if result is None:
+
+        try:
+            military, spans = tokenize_time_ranges(line)
+            minutes = sum([end - start for start, end in spans])
+            result = TimeLine(minutes, format_total(minutes), None, tuple(spans))
+
+        except ValueError as e:
+            result = TimeLine(None, None, str(e), None)
+
+        if cache:
+            if len(_line_cache) >= _line_cache_limit:
+                _line_cache.clear()
+
+            _line_cache[line] = result
+
+    return result
+
+
+class TimeSheet(object):
+    """
+    The time range lines of one buffer.
+
+    # Parameters
+
+    day - str
+        - The date (YYYY-MM-DD) of the lines that come before the first
+          dated heading, or None.
+
+    """
+
+    def __init__(self, day=None):
+        self.day = day
+
+        # sorted rows of the time range lines and their results
+        self.rows = []
+        self.results = []
+
+        # sorted rows of the dated headings and their dates
+        self.day_rows = []
+        self.day_labels = []
+
+        self.line_count = 0
+
+    def rescan(self, text):
+        """
+        Rebuild the sheet from the full text of the buffer.
+        """
+
+        self.rows, self.results, self.day_rows, self.day_labels = self._scan(text, 0)
+        self.line_count = text.count('\n') + 1
+
+    @staticmethod
+    def _scan(text, row):
+        """
+        Find the time range lines and dated headings in the text, which
+        starts at the given row.
+        """
+
+        rows = []
+        results = []
+        day_rows = []
+        day_labels = []
+
+        pos = 0
+
+        for match in _scan_pattern.finditer(text):
+            start = match.start()
+            row += text.count('\n', pos, start)
+            pos = start
+
+            line = match.group()
+
+            if line.startswith('T:'):
+                rows.append(row)
+                results.append(parse_line(line))
+
+            else:
+                day_rows.append(row)
+                day_labels.append(date_pattern.search(line).group())
+
+        return rows, results, day_rows, day_labels
+
+    def replace_rows(self, first, last, text):
+        """
+        Update the sheet after an edit that replaced the rows from first
+        to last (inclusive, in the old numbering) with the text. The
+        rows after the edit are moved instead of parsed again.
+
+        # Parameters
+
+        first - int
+            - The first row that changed.
+
+        last - int
+            - The last row that changed, before the edit.
+
+        text - str
+            - The new text of the changed rows, without the newline
+              at the end.
+
+        """
+
+        delta = text.count('\n') - (last - first)
+
+        rows, results, day_rows, day_labels = self._scan(text, first)
+
+        self._splice(self.rows, self.results, first, last, delta, rows, results)
+        self._splice(self.day_rows, self.day_labels, first, last, delta, day_rows, day_labels)
+
+        self.line_count += delta
+
+    @staticmethod
+    def _splice(rows, values, first, last, delta, new_rows, new_values):
+        """
+        Replace, in place, the entries between the first and last rows
+        with the new ones and move the entries after them by delta.
+        """
+
+        a = bisect.bisect_left(rows, first)
+        b = bisect.bisect_right(rows, last)
+
+        if delta:
+            rows[b:] = [r + delta for r in rows[b:]]
+
+        rows[a:b] = new_rows
+        values[a:b] = new_values
+
+    def day_bounds(self, row):
+        """
+        Return (label, first row, last row) of the day that the row is
+        in. The last row is exclusive, None means the end of the buffer.
+        """
+
+        i = bisect.bisect_right(self.day_rows, row)
+
+        if i == 0:
+            label = self.day
+            first = 0
+
+        else:
+            first = self.day_rows[i - 1]
+            label = self.day_labels[i - 1]
+
+        last = self.day_rows[i] if i < len(self.day_rows) else None
+
+        return label, first, last
+
+    def days(self):
+        """
+        Return a list of (label, first row, last row) for every day in
+        the sheet, see `day_bounds`. The rows before the first dated
+        heading are only included if they hold time range lines.
+        """
+
+        days = []
+
+        if self.rows and (not self.day_rows or self.rows[0] < self.day_rows[0]):
+            days.append(self.day_bounds(0))
+
+        for row in self.day_rows:
+            days.append(self.day_bounds(row))
+
+        return days
+
+    def _day_results(self, first, last):
+
+        a = bisect.bisect_left(self.rows, first)
+        b = len(self.rows) if last is None else bisect.bisect_left(self.rows, last)
+
+        return self.results[a:b]
+
+    def day_total(self, row):
+        """
+        Return (label, minutes, errors) for the day that the row is in.
+        """
+
+        label, first, last = self.day_bounds(row)
+
+        minutes = 0
+        errors = 0
+        for result in self._day_results(first, last):
+
+            if result.minutes is None:
+                errors += 1
+
+            else:
+                minutes += result.minutes
+
+        return label, minutes, errors
+
+    def day_spans(self, row):
+        """
+        Return (label, spans, errors) for the day that the row is in,
+        spans is a list of every (start, end) in the day.
+        """
+
+        label, first, last = self.day_bounds(row)
+
+        spans = []
+        errors = 0
+        for result in self._day_results(first, last):
+
+            if result.spans is None:
+                errors += 1
+
+            else:
+                spans.extend(result.spans)
+
+        return label, spans, errors
+
+    def lines_between(self, first, last):
+        """
+        Return a list of (row, TimeLine) for the time range lines from
+        the first row up to and including the last row.
+        """
+
+        a = bisect.bisect_left(self.rows, first)
+        b = bisect.bisect_right(self.rows, last)
+
+        return list(zip(self.rows[a:b], self.results[a:b]))
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+The TODO items (`- [] do this`, see `create_todo`) of a note, and of
+every note in a set of folders.
+
+`todo_edits` works out the edits that create, check, uncheck or strip
+the items of many lines at once, so a command can apply them in one
+pass (see `transform_todos`).
+
+The date of an item is the date of the dated heading above it or, when
+there is none, the date in the name of the note (see
+`bluebill.notes.note_date`).
+
+`TodoCache` keeps the items of each note on disk, keyed by the path,
+modification time and size of the file the way
+`bluebill.notes.TimeSheetCache` does, and reads the notes that changed
+on a thread pool.
+
+>>> find_todos('# 2024-03-01\\n- [] call Bob\\n  - [x] done\\ntext - [] not an item')
+[Todo(row=1, done=False, text='call Bob', date='2024-03-01'), Todo(row=2, done=True, text='done', date='2024-03-01')]
+
+>>> todo_edits('- [] one\\n- [x] two\\nthree', 'toggle')
+([(2, 4, '[x]'), (11, 14, '[]')], 1, 1)
+
+"""
+
+import json
+import os
+import re
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .notes import note_date, note_extensions, note_files
+from .timesheet import date_pattern
+
+
+# row - the row of the item in the note, counted from 0
+# done - True for a checked item, - [x]
+# text - the text after the check box
+# date - YYYY-MM-DD, or None
+Todo = namedtuple('Todo', 'row done text date')
+
+# An item, or a dated heading. `- []` and `- [ ]` are open, `- [x]` is
+# done.
+_line_pattern = re.compile(r'^(?:[ \t]*[-*+][ \t]*\[(?P<mark>[ xX]?)\][ \t]*(?P<text>.*?)[ \t\r]*|(?P<heading>#.*))$', re.MULTILINE)
+
+
+def find_todos(text, day=None):
+    """
+    Return the `Todo`s of a note, in order.
+
+    # Parameters
+
+    text - str
+        - The contents of the note.
+
+    day - str
+        - The date (YYYY-MM-DD) of the items before the first dated
+          heading, usually from the file name.
+
+    """
+
+    todos = []
+
+    row = 0
+    pos = 0
+
+    for match in _line_pattern.finditer(text):
+        start = match.start()
+        row += text.count('\n', pos, start)
+        pos = start
+
+        heading = match.group('heading')
+
+        if heading is not None:
+            found = date_pattern.search(heading)
+
+            if found:
+                day = found.group()
+
+            continue
+
+        todos.append(Todo(row, match.group('mark') in ('x', 'X'), match.group('text'), day))
+
+    return todos
+
+
+# The start of a line for `todo_edits`: the indent, then a bullet and
+# its check box if there is one.
+#
+# 1 - the bullet
+# 2 - the space between the bullet and the box
+# 3 - the box, [], [ ] or [x]
+# 4 - the mark in the box
+_item_pattern = re.compile(r'[ \t]*(?:([-*+])(?:([ \t]*)(\[([ xX]?)\]))?)?')
+
+# The actions of `todo_edits`
+todo_actions = ('create', 'toggle', 'check', 'uncheck', 'strip', 'count')
+
+
+def todo_edits(text, action, start=0):
+    """
+    Work out the edits that apply a TODO action to every line of the
+    text. Nothing is changed, the caller applies the edits, last first.
+
+    The actions:
+
+    - create: `- note` becomes `- [] note` and any other line `- [] line`,
+      lines that are items are left alone, and so are blank lines in a
+      text of more than one line
+    - toggle: `- []` and `- [ ]` become `- [x]` and `- [x]` becomes `- []`
+    - check, uncheck: every item becomes `- [x]` or `- []`
+    - strip: `- [] note` becomes `- note`, the opposite of create
+    - count: no edits, only the counts
+
+    # Parameters
+
+    text - str
+        - Whole lines, separated by newlines.
+
+    action - str
+        - One of `todo_actions`.
+
+    start - int
+        - The position of the text in the buffer, added to the positions
+          of the edits.
+
+    # Return
+
+    A tuple (edits, open, done). The edits are (a, b, text) tuples, in
+    order, each replaces a to b with the text. open and done count the
+    items in the lines after the edits.
+
+    """
+
+    if action not in todo_actions:
+        raise ValueError("{} is not a TODO action".format(action))
+
+    edits = []
+    open_count = 0
+    done_count = 0
+
+    match = _item_pattern.match
+    lines = text.split('\n')
+
+    skip_blank = len(lines) > 1
+    pos = start
+
+    for line in lines:
+        m = match(line)
+        box = m.group(3)
+
+        if box is not None:
+            done = m.group(4) in ('x', 'X')
+
+            if action == 'toggle' or (action == 'check' and not done) or (action == 'uncheck' and done):
+                a, b = m.span(3)
+                edits.append((pos + a, pos + b, '[]' if done else '[x]'))
+                done = not done
+
+            elif action == 'strip':
+                edits.append((pos + m.start(2), pos + m.end(3), ''))
+                done = None
+
+            if done:
+                done_count += 1
+
+            elif done is not None:
+                open_count += 1
+
+        elif action == 'create' and (line.strip() or not skip_blank):
+
+            if m.group(1):
+                edits.append((pos + m.end(1), pos + m.end(1), ' []'))
+
+            else:
+                edits.append((pos + m.end(), pos + m.end(), '- [] '))
+
+            open_count += 1
+
+        pos += len(line) + 1
+
+    return edits, open_count, done_count
+
+
+def _read(path):
+    """
+    Return (path, stat, todos) for a note, todos is None if it could
+    not be read.
+    """
+
+    try:
+        st = os.stat(path)
+
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+
+    except (IOError, OSError):
+        return path, None, None
+
+    return path, st, find_todos(text, note_date(path))
+
+
+class TodoCache(object):
+    """
+    The TODO items of the notes in a set of folders, persisted to a JSON
+    file.
+
+    # Parameters
+
+    path - str
+        - The cache file. It is created on the first `save`.
+
+    workers - int
+        - The threads that read the notes that changed.
+
+    """
+
+    version = 1
+
+    def __init__(self, path, workers=4):
+        self.path = path
+        self.workers = workers
+
+        # note path -> [mtime_ns, size, todos], todos as lists
+        self.entries = {}
+        self.dirty = False
+
+    def load(self):
+        """
+        Read the cache file. A missing, unreadable or old cache starts
+        empty.
+        """
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+        except (IOError, OSError, ValueError):
+            data = None
+
+        if isinstance(data, dict) and data.get('version') == self.version:
+            self.entries = data['entries']
+
+        else:
+            self.entries = {}
+
+        self.dirty = False
+
+    def save(self):
+        """
+        Write the cache file if anything changed. The file is replaced
+        in one step so an interrupted save never leaves half a cache.
+        """
+
+        if not self.dirty:
+            return
+
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+
+        temp = self.path + '.tmp'
+
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'version': self.version, 'entries': self.entries}, separators=(',', ':')))
+
+        os.replace(temp, self.path)
+        self.dirty = False
+
+    def update(self, folders, extensions=note_extensions):
+        """
+        Bring the cache up to date with the notes in the folders. Notes
+        that haven't changed since they were cached aren't read, the
+        rest are read on the thread pool. Notes that no longer exist are
+        dropped.
+
+        # Return
+
+        A tuple (paths, scanned), the paths of the notes in the folders
+        and how many of them had to be read.
+
+        """
+
+        paths = []
+        changed = []
+
+        for path in note_files(folders, extensions):
+
+            try:
+                st = os.stat(path)
+
+            except OSError:
+                continue
+
+            paths.append(path)
+
+            entry = self.entries.get(path)
+
+            if entry is None or entry[0] != st.st_mtime_ns or entry[1] != st.st_size:
+                changed.append(path)
+
+        scanned = 0
+
+        if changed:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for path, st, todos in pool.map(_read, changed):
+                    if st is None:
+                        continue
+
+                    self.entries[path] = [st.st_mtime_ns, st.st_size, [list(todo) for todo in todos]]
+                    self.dirty = True
+                    scanned += 1
+
+        # forget the notes that were deleted or moved out of the folders
+        seen = set(paths)
+        roots = tuple(os.path.join(folder, '') for folder in folders)
+
+        for path in [p for p in self.entries if p.startswith(roots) and p not in seen]:
+            del self.entries[path]
+            self.dirty = True
+
+        return paths, scanned
+
+    def todos(self, paths, done=False):
+        """
+        Return (path, [Todo, ...]) for the notes with items, sorted by
+        path. Only the open items unless done is True.
+        """
+
+        found = []
+
+        for path in sorted(paths):
+            entry = self.entries.get(path)
+
+            if entry is None:
+                continue
+
+            todos = [Todo(*todo) for todo in entry[2] if done or not todo[1]]
+
+            if todos:
+                found.append((path, todos))
+
+        return found
+
+
+def format_todos(found):
+    """
+    Return the text of the output panel for the result of
+    `TodoCache.todos`: the path of each note, then its items under the
+    date they are for. See `result_file_regex` and `result_line_regex`.
+    """
+
+    lines = []
+    total = 0
+
+    for path, todos in found:
+        lines.append('{}:'.format(path))
+
+        day = False
+        for todo in todos:
+            if todo.date != day:
+                day = todo.date
+                lines.append('  {}'.format(day or 'no date'))
+
+            lines.append('    {}: [{}] {}'.format(todo.row + 1, 'x' if todo.done else ' ', todo.text))
+
+        lines.append('')
+        total += len(todos)
+
+    lines.append('{:,} item(s) in {:,} note(s)'.format(total, len(found)))
+
+    return '\n'.join(lines) + '\n'
+
+
+# Match the lines of `format_todos`, a note and the row of an item
+result_file_regex = r'^(\S.*):$'
+result_line_regex = r'^    (\d+): '
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+#-*- coding:utf-8 -*-
+
+"""
+Apply many insertions and replacements to a view as one batch.
+
+Inserting at each cursor in turn moves every cursor after it, so with
+thousands of cursors most of the work is moving cursors. An
+`EditTransaction` collects the edits instead, `apply_edits` clears the
+selection, makes the edits last first (so the positions of the ones
+before stay put) and puts the cursors back where the editor would have
+moved them, worked out once with `move_points`.
+
+The values for the cursors can differ, see `stepped`:
+
+>>> t = EditTransaction()
+>>> t.insert_each([0, 4], ('#{}'.format(n) for n in stepped(1, 1)))
+>>> t.replace(1, 3, 'X')
+>>> t.edits()
+[(0, 0, '#1'), (1, 3, 'X'), (4, 4, '#2')]
+>>> move_points([0, 2, 4], t.edits())
+[2, 4, 7]
+
+"""
+
+import bisect
+import itertools
+
+
+def stepped(start, step):
+    """
+    Yield start, start + step, start + 2 * step and so on, for numbers,
+    dates and times (with a timedelta step).
+    """
+
+    value = start
+
+    while True:
+        yield value
+        value = value + step
+
+
+class EditTransaction(object):
+    """
+    A batch of edits to a buffer, in the positions of the buffer before
+    any of them are made.
+    """
+
+    def __init__(self):
+        self._edits = []
+
+    def __len__(self):
+        return len(self._edits)
+
+    def insert(self, point, text):
+        """
+        Insert the text at the point. Texts inserted at the same point
+        end up in the order they were added.
+        """
+
+        self._edits.append((point, point, text))
+
+    def replace(self, a, b, text):
+        """
+        Replace a to b with the text.
+        """
+
+        if a > b:
+            a, b = b, a
+
+        self._edits.append((a, b, text))
+
+    def insert_each(self, points, values):
+        """
+        Insert the next of the values at each of the points, for a value
+        per cursor.
+        """
+
+        for point, text in zip(points, values):
+            self._edits.append((point, point, text))
+
+    def edits(self):
+        """
+        Return the edits as (a, b, text) tuples in order, see
+        `apply_edits`. A ValueError is raised if two of them overlap.
+        """
+
+        # sorted is stable, inserts at the same point keep their order
+        edits = sorted(self._edits, key=lambda e: (e[0], e[1]))
+
+        end = 0
+        for a, b, text in edits:
+            if a < end:
+                raise ValueError("the edit at {} overlaps the one before it".format(a))
+
+            end = b
+
+        return edits
+
+
+def move_points(points, edits):
+    """
+    Return where the points end up after the edits are made, the way the
+    editor moves a cursor: past the text inserted at it, to the end of
+    the text that replaced a range it was in.
+
+    # Parameters
+
+    points - list
+        - Positions in the buffer before the edits, in any order.
+
+    edits - list
+        - (a, b, text) tuples in order and not overlapping, see
+          `EditTransaction.edits`.
+
+    # Return
+
+    A list of the new positions, in the order of the points.
+
+    """
+
+    # the change in length of the edits up to each one
+    shifts = [0]
+    for a, b, text in edits:
+        shifts.append(shifts[-1] + len(text) - (b - a))
+
+    starts = [e[0] for e in edits]
+
+    moved = []
+
+    for p in points:
+        # the edits at or before the point, the last one first, the way
+        # they are made
+        i = bisect.bisect_right(starts, p) - 1
+
+        while i >= 0:
+            a, b, text = edits[i]
+
+            if p > b:
+                # this edit and the ones before it are before the point
+                break
+
+            if a == b:
+                # inserted at the point
+                p += len(text)
+
+            elif p > a:
+                # inside a range that was replaced
+                p = a + len(text)
+
+            i -= 1
+
+        moved.append(p + shifts[i + 1])
+
+    return moved
+
+
+def apply_edits(view, edit, edits, region):
+    """
+    Make the edits in the view and move the cursors the way the editor
+    would have. The cursors are taken off while the edits are made, so
+    no edit has to move them. All of it is one step in the undo history.
+
+    # Parameters
+
+    view - View
+        - The view.
+
+    edit - Edit
+        - The edit of the running TextCommand.
+
+    edits - list
+        - (a, b, text) tuples in order and not overlapping, see
+          `EditTransaction.edits`.
+
+    region - type
+        - `sublime.Region`, this package doesn't import sublime.
+
+    """
+
+    if not edits:
+        return
+
+    sel = view.sel()
+    cursors = [(r.a, r.b) for r in sel]
+
+    moved = move_points(list(itertools.chain.from_iterable(cursors)), edits)
+
+    sel.clear()
+
+    for a, b, text in reversed(edits):
+        if a == b:
+            view.insert(edit, a, text)
+
+        else:
+            view.replace(edit, region(a, b), text)
+
+    sel.add_all([region(moved[i], moved[i + 1]) for i in range(0, len(moved), 2)])
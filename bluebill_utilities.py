@@ -23,15 +23,57 @@ import sublime
 import sublime_plugin
 
 import bisect
+import itertools
 import re
-import uuid
+import threading
+import time
 import os
-import subprocess
-import platform
 
-from datetime import datetime
-from random import randint
-from string import Template
+from datetime import datetime, timedelta
+
+try:
+    from .bluebill.links import (
+        find_whitespace_positions,
+        LinkIndex,
+    )
+    from .bluebill import buffer
+    from .bluebill import fileindex
+    from .bluebill import ids
+    from .bluebill import launcher as launch
+    from .bluebill import linkcache
+    from .bluebill import linkcheck
+    from .bluebill import lineindex
+    from .bluebill import linkgraph
+    from .bluebill import search
+    from .bluebill import split
+    from .bluebill import templates
+    from .bluebill import todos
+    from .bluebill import transaction
+    from .bluebill.notes import note_extensions, note_files
+    from .bluebill.edits import ChangedRows, cursor_rows, edited_at_cursors
+
+except ImportError:
+    # loaded outside of Sublime Text (bluebill.standin), the package
+    # folder is on the path
+    from bluebill.links import (
+        find_whitespace_positions,
+        LinkIndex,
+    )
+    from bluebill import buffer
+    from bluebill import fileindex
+    from bluebill import ids
+    from bluebill import launcher as launch
+    from bluebill import linkcache
+    from bluebill import linkcheck
+    from bluebill import lineindex
+    from bluebill import linkgraph
+    from bluebill import search
+    from bluebill import split
+    from bluebill import templates
+    from bluebill import todos
+    from bluebill import transaction
+    from bluebill.notes import note_extensions, note_files
+    from bluebill.edits import ChangedRows, cursor_rows, edited_at_cursors
 
 # NOTE: Need to install PackageDev to get access to the PathLib for
 # Sublime v3.2.2 Build 3211 from pathlib import Path
@@ -45,7 +87,10 @@ from string import Template
 #     { "keys": ["ctrl+k","ctrl+j"], "command":"insert_uuid"},
 #     { "keys": ["ctrl+k", "ctrl+t"], "command": "title_case" },
 #     { "keys": ["ctrl+t", "ctrl+t"], "command": "create_todo" },
+#     { "keys": ["ctrl+t", "ctrl+x"], "command": "transform_todos", "args": {"action": "toggle"} },
 #     { "keys": ["ctrl+t", "ctrl+r"], "command": "open_links" },
+#     { "keys": ["ctrl+t", "ctrl+n"], "command": "move_to_link", "args": {"forward": true} },
+#     { "keys": ["ctrl+t", "ctrl+p"], "command": "move_to_link", "args": {"forward": false} },
 # ]
 
 
@@ -93,56 +138,134 @@ def _insert_text(view, edit, start, text):
     # print('inserted...')
 
 
+def _apply_edits(view, edit, edits):
+    """
+    Apply (a, b, text) edits, in order and not overlapping, last first
+    so the positions of the ones before it stay put. All of them are
+    one step in the undo history. See `bluebill.transaction`.
+    """
+
+    transaction.apply_edits(view, edit, edits, sublime.Region)
+
+
+def _insert_at_cursors(view, edit, values):
+    """
+    Insert the next of the values at each cursor, in one batch (see
+    `bluebill.transaction`).
+    """
+
+    t = transaction.EditTransaction()
+    t.insert_each([s.a for s in view.sel()], values)
+
+    _apply_edits(view, edit, t.edits())
+
+
 # ctrl+` -> view.run_command("insert_date")
+# ctrl+` -> view.run_command("insert_date", {"step_days": 7})
 class InsertDateCommand(sublime_plugin.TextCommand):
     """
     Insert the current date in iso format (YYYY-MM-DD) at all the cursor
     locations.
-    """
 
-    def run(self, edit):
+    # Usage
 
-        print("Inserting Date...")
+    step_days - int
+        - Each cursor gets the date of the one before it plus this many
+          days, 0 for the same date at every cursor.
 
-        current_date = datetime.now().date().isoformat()
+    """
 
-        for s in self.view.sel():
+    def run(self, edit, step_days=0):
 
-            _insert_text(self.view, edit, s.a, current_date)
+        print("Inserting Date...")
 
+        current_date = datetime.now().date()
+        dates = transaction.stepped(current_date, timedelta(days=step_days))
 
+        _insert_at_cursors(self.view, edit, (d.isoformat() for d in dates))
 
 
 # ctrl+` -> view.run_command("insert_time")
+# ctrl+` -> view.run_command("insert_time", {"step_minutes": 15})
 class InsertTimeCommand(sublime_plugin.TextCommand):
     """
     Insert the current time in 24hr format with no separator, i.e. 1634
     instead of 16:34 at all the cursor locations (same time at each
     one).
+
+    # Usage
+
+    step_minutes - int
+        - Each cursor gets the time of the one before it plus this many
+          minutes, 0 for the same time at every cursor.
+
     """
 
-    def run(self, edit):
+    def run(self, edit, step_minutes=0):
 
         print("Inserting Time...")
 
-        current_time = datetime.now().time().strftime('%H%M')
+        current_time = datetime.now()
+        times = transaction.stepped(current_time, timedelta(minutes=step_minutes))
+
+        _insert_at_cursors(self.view, edit, (t.strftime('%H%M') for t in times))
 
-        for s in self.view.sel():
-            _insert_text(self.view, edit, s.a, current_time)
 
 # ctrl+` -> view.run_command("insert_uuid")
+# ctrl+` -> view.run_command("insert_uuid", {"kind": "uuid7", "distinct": True})
 class InsertUuidCommand(sublime_plugin.TextCommand):
     """
     Insert a UUID at all the cursor locations.
+
+    # Usage
+
+    kind - str
+        - uuid4 (random), uuid7 or ulid (sorted by the time they were
+          made) or hex (4 digits), see `bluebill.ids`.
+
+    distinct - bool
+        - A different ID at each cursor instead of the same one. They
+          are made in one batch.
+
     """
 
-    def run(self, edit):
+    def run(self, edit, kind="uuid4", distinct=False):
 
         print("Inserting UUID...")
-        generated_uuid = str(uuid.uuid1())
 
-        for s in self.view.sel():
-            _insert_text(self.view, edit, s.a, generated_uuid)
+        if distinct:
+            values = ids.new_ids(kind, len(self.view.sel()))
+
+        else:
+            values = itertools.repeat(ids.new_ids(kind, 1)[0])
+
+        _insert_at_cursors(self.view, edit, values)
+
+
+# ctrl+` -> view.run_command("insert_sequence")
+# ctrl+` -> view.run_command("insert_sequence", {"start": 10, "step": 10, "format": "{:04d}"})
+class InsertSequenceCommand(sublime_plugin.TextCommand):
+    """
+    Insert a number at each cursor, counting up from the first cursor.
+
+    # Usage
+
+    start - int
+        - The number at the first cursor.
+
+    step - int
+        - Added for each cursor after it.
+
+    format - str
+        - A str.format template for the number.
+
+    """
+
+    def run(self, edit, start=1, step=1, format="{}"):
+
+        numbers = transaction.stepped(start, step)
+
+        _insert_at_cursors(self.view, edit, (format.format(n) for n in numbers))
 
 
 # ctrl+` -> view.run_command("create_todo")
@@ -152,7 +275,10 @@ class CreateTodoCommand(sublime_plugin.TextCommand):
 
     - [] todo item
 
-    Basically it will add the dash and square brackets.
+    Basically it will add the dash and square brackets. When every
+    selection is part of a single line, only the selected text becomes
+    the item, otherwise every line of the cursors and selections does,
+    see `transform_todos`.
 
     """
 
@@ -160,102 +286,159 @@ class CreateTodoCommand(sublime_plugin.TextCommand):
 
         print("Creating TODO entry...")
 
-        for region in self.view.sel():
+        view = self.view
 
-            # If the selection region is empty, select the line
-            if region.empty():
-                current_line = self.view.line(region)
-                region = sublime.Region(current_line.a, current_line.b)
+        edits = []
 
-                s = self.view.substr(region)
+        for region in view.sel():
+            text = view.substr(region)
 
-            else:
-                # use the selected text
-                s = self.view.substr(region)
+            if not text or '\n' in text:
+                view.run_command("transform_todos", {"action": "create"})
+                return
 
-            match = re.match(r"^(\s*)-(.*)$", s)
+            edits.extend(todos.todo_edits(text, "create", region.begin())[0])
 
-            if match:
-                todo_line = match.group(1) + '- []' + match.group(2)
+        _apply_edits(view, edit, edits)
 
-            else:
-                todo_line = '- [] {}'.format(s)
 
-            self.view.replace(edit, region, todo_line)
+# ctrl+` -> view.run_command("transform_todos", {"action": "toggle"})
+class TransformTodosCommand(sublime_plugin.TextCommand):
+    """
+    Create, toggle, check, uncheck or strip the TODO items on the lines
+    of every cursor and selection, then show how many of the items are
+    done in the status bar. See `bluebill.todos.todo_edits`.
 
-# ----
+    The lines are read once per selection, the edits are worked out for
+    all of them first and then applied last to first, so thousands of
+    cursors (or a whole selected checklist) are one quick undo step.
 
-# def print_region_info(region):
-#     """
-#     """
-#     print("region.a: ", region.a)
-#     print("region.b: ", region.b)
-#     print("region.xpos: ", region.xpos)
-#     print("region.size: ", region.size())
-#     print("region.empty:", region.empty())
+    # Usage
+
+    view.run_command("transform_todos", {"action": "toggle"})
+    view.run_command("transform_todos", {"action": "count"})
 
-def find_whitespace_positions(input_string):
-    """
-    Given the string, return a list of index numbers for each location
-    of whitespace
     """
 
-    # Define the regex pattern for matching whitespace
-    whitespace_pattern = re.compile(r'\s+')
+    def run(self, edit, action="toggle"):
 
-    # Use finditer to find all matches in the input string
-    matches = whitespace_pattern.finditer(input_string)
+        view = self.view
 
-    # Extract and return the positions of each match
-    positions = [match.start() for match in matches]
+        edits = []
+        open_count = 0
+        done_count = 0
 
-    return positions if len(positions) > 0 else None
+        for a, b in buffer.selected_lines(view, cursors_index(view)):
+            found, o, d = todos.todo_edits(view.substr(sublime.Region(a, b)), action, a)
 
+            edits.extend(found)
+            open_count += o
+            done_count += d
 
+        _apply_edits(view, edit, edits)
 
-def find_largest_quoted_substring(input_string):
-    """
-    Find the largest substring in single quotes, double quotes, or back
-    ticks (matching pairs).
+        total = open_count + done_count
 
-    Returns the start and end index of the substring if there is a match
-    else it returns None.
-    """
+        if total:
+            sublime.status_message("{:,} of {:,} done ({:.0%}), {:,} open".format(done_count, total, done_count / float(total), open_count))
 
-    match = re.search(r'([\'\"`])(.*?)\1', input_string)
+        else:
+            sublime.status_message("No TODO items")
 
-    if match:
 
-        return match.start(2), match.end(2)
+# The TODO items of the notes, loaded on first use, see `bluebill.todos`
+_todo_cache = None
 
-    else:
+# one scan at a time
+_todo_lock = threading.Lock()
 
-        return None
 
+def _todos():
+
+    global _todo_cache
+
+    if _todo_cache is None:
+        settings = sublime.load_settings("Bluebill.sublime-settings")
 
+        _todo_cache = todos.TodoCache(
+            os.path.join(sublime.cache_path(), "Bluebill", "todos.json"),
+            workers=settings.get("todo_scan_workers", 4),
+        )
+        _todo_cache.load()
+
+    return _todo_cache
 
-def find_markdown_links(input_string):
+
+# ctrl+` -> window.run_command("show_project_todos", {"done": False})
+class ShowProjectTodosCommand(sublime_plugin.WindowCommand):
     """
+    List the TODO items of every note in the project folders in an
+    output panel, by note and by date. Double click an item to go to
+    it.
+
+    The items of each note are cached by path, modification time and
+    size, so after the first scan only the notes that changed are read.
+    The scan runs in the background.
+
+    # Usage
+
+    window.run_command("show_project_todos")
+    window.run_command("show_project_todos", {"done": True})
+
     """
 
-    markdown_link_pattern = re.compile(r"\[(?P<text>[^\]]+)\]\((?P<url>[^)]+)\)")
-    matches = markdown_link_pattern.finditer(input_string)
+    def run(self, done=False):
 
-    result = []
+        window = self.window
+        folders = window.folders()
 
-    for match in matches:
-        result.append(
-            (
-                match.group('text'),
-                match.group('url'),
-                match.start(),
-                match.end(),
-            )
-        )
+        if not folders:
+            sublime.status_message("TODOs: no project folders")
+            return
+
+        if not _todo_lock.acquire(False):
+            sublime.status_message("TODOs: already scanning")
+            return
+
+        sublime.status_message("TODOs: scanning {} folder(s)...".format(len(folders)))
+
+        def scan():
+
+            try:
+                cache = _todos()
 
-    return result or None
+                paths, scanned = cache.update(folders)
+                cache.save()
 
+                text = todos.format_todos(cache.todos(paths, done))
+
+            finally:
+                _todo_lock.release()
+
+            sublime.status_message("TODOs: {:,} notes, {:,} read".format(len(paths), scanned))
+            sublime.set_timeout(lambda: self.show(text), 0)
+
+        sublime.set_timeout_async(scan, 0)
+
+    def show(self, text):
+
+        panel = self.window.create_output_panel("bluebill_todos")
+        panel.settings().set("result_file_regex", todos.result_file_regex)
+        panel.settings().set("result_line_regex", todos.result_line_regex)
+        panel.run_command("append", {"characters": text})
+        self.window.run_command("show_panel", {"panel": "output.bluebill_todos"})
+
+
+# ----
 
+# def print_region_info(region):
+#     """
+#     """
+#     print("region.a: ", region.a)
+#     print("region.b: ", region.b)
+#     print("region.xpos: ", region.xpos)
+#     print("region.size: ", region.size())
+#     print("region.empty:", region.empty())
 
 # def find_largest_quoted_substring(input_string, index):
 #     """
@@ -274,36 +457,149 @@ def find_markdown_links(input_string):
 #     return largest_quoted_substring, substring_around_index
 
 
+# The launcher is created on first use, with the system checked once
+_launcher = None
+
+
+def launcher():
+    """
+    Return the shared `bluebill.launcher.Launcher`. The settings
+    `open_links_command` (a command to use instead of xdg-open/open) and
+    `open_links_interval` (milliseconds between two launches) are read
+    when it is created.
+    """
+
+    global _launcher
+
+    if _launcher is None:
+        settings = sublime.load_settings("Bluebill.sublime-settings")
+        command = settings.get("open_links_command")
+
+        _launcher = launch.Launcher(
+            command=list(command) if command else False,
+            interval=settings.get("open_links_interval", 200) / 1000.0,
+        )
+
+    return _launcher
+
+
 def open_with_default_app(path):
     """
     given a path, attempt to open it using the default system
     application. Determine the appropriate command based on the
     operating system
+
+    The application is started in the background (see `launcher`) so
+    this returns right away.
     """
 
-    if platform.system() == "Darwin":  # macOS
-        command = ["open", path]
+    launcher().open([path])
 
-    elif platform.system() == "Windows":
-        # command = ["start", "", path, "/B", "/WAIT"]
-        os.startfile(path)
-        return
 
-    elif platform.system() == "Linux":
-        command = ["xdg-open", path]
+# One index of the project files per window, see `bluebill.fileindex`
+_file_indexes = {}
 
-    else:
-        print("Unsupported operating system :(")
-        return
 
-    try:
+def file_index(window):
+    """
+    Return the file index of the window's project folders. A new index
+    is built in the background when the folders change, until it is
+    ready lookups go to the file system.
+    """
+
+    folders = [os.path.normpath(f) for f in window.folders()]
+    index = _file_indexes.get(window.id())
+
+    if index is None or index.folders != folders:
+        index = _file_indexes[window.id()] = fileindex.FileIndex(folders)
+        sublime.set_timeout_async(index.build, 0)
+
+    return index
+
+
+# ctrl+` -> window.run_command("rebuild_file_index")
+class RebuildFileIndexCommand(sublime_plugin.WindowCommand):
+    """
+    Rebuild the index of the project files used to resolve links, for
+    changes made outside of Sublime Text.
+    """
+
+    def run(self):
+        _file_indexes.pop(self.window.id(), None)
+        file_index(self.window)
+
+
+class FileIndexListener(sublime_plugin.EventListener):
+    """
+    Build the file index when a window is first used and add the files
+    that are saved to it.
+    """
+
+    def on_activated(self, view):
+        if view.window():
+            file_index(view.window())
+
+    def on_post_save(self, view):
+        if view.window() and view.file_name():
+            file_index(view.window()).add(view.file_name())
+            _link_graph.saved(view)
+            _search_index.saved(view)
+
+
+# The links open_links resolved, loaded on first use, see
+# `bluebill.linkcache`
+_resolved_links = None
+
+
+def resolved_links():
+    """
+    Return the shared `bluebill.linkcache.ResolvedLinks`, kept in the
+    cache folder between sessions. The setting `open_links_cache_size`
+    is the most links it remembers.
+    """
+
+    global _resolved_links
+
+    if _resolved_links is None:
+        settings = sublime.load_settings("Bluebill.sublime-settings")
 
-        subprocess.call(command)
+        _resolved_links = linkcache.ResolvedLinks(
+            os.path.join(sublime.cache_path(), "Bluebill", "resolved_links.json"),
+            max_size=settings.get("open_links_cache_size", 2000),
+        )
+        _resolved_links.load()
+
+    return _resolved_links
+
+
+def plugin_unloaded():
+
+    if _resolved_links is not None:
+        _resolved_links.save()
+
+    _link_graph.save()
+    _search_index.save()
+
+
+# ctrl+` -> window.run_command("show_link_cache_stats")
+class ShowLinkCacheStatsCommand(sublime_plugin.WindowCommand):
+    """
+    Show the size and the hit and miss counts of the resolved link
+    cache in the status bar (and the console), for tuning
+    `open_links_cache_size`.
+    """
+
+    def run(self):
+
+        stats = resolved_links().stats()
 
-    except subprocess.CalledProcessError as e:
-        print("Error: {}".format(e))
+        print("Resolved links: " + stats)
+        sublime.status_message(stats)
 
 
+# a url (https://..., file://...) is opened as is
+_url_pattern = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*://')
+
 
 # ctrl+` -> view.run_command("open_links")
 class OpenLinksCommand(sublime_plugin.TextCommand):
@@ -318,543 +614,1324 @@ class OpenLinksCommand(sublime_plugin.TextCommand):
     - [x] We should be able to handle paths
     - [x] we should be able to handle paths that are in a selection
     - [x] We should be able to handle paths that are relative to the project
-    - We should be able to handle paths defined in markdown links
-    - We should be able to handle paths in back ticks or quotes (single and double)
+    - [x] paths relative to the note, to any project folder or only the
+      basename of a file in the project (see `file_index`)
+    - [x] We should be able to handle paths defined in markdown links
+    - [x] We should be able to handle paths in back ticks or quotes (single and double)
+    - [x] reference style links, wiki links ([[Note]] -> Note.md) and urls
+    - [x] every link under every cursor
     """
 
     def run(self, edit):
 
         print("Opening Link...")
 
-        for region in self.view.sel():
+        view = self.view
 
-            potential_path = None
+        # every link under every cursor, once each
+        links = []
+        for region in view.sel():
+            for link in self.links_at(region):
+                if link and link not in links:
+                    links.append(link)
 
-            if region.empty():
+        relative_to = os.path.dirname(view.file_name()) if view.file_name() else None
+        index = file_index(view.window())
 
-                # assume that the cursor is placed in the middle of
-                # path, we want to select all of the text towards the
-                # beginning and end of the line until we hit a
-                # whitespace
+        cache = resolved_links()
+        project = os.pathsep.join(index.folders)
 
-                # If the region is empty, region.a == region.b will be
-                # the cursor position
+        targets = []
+        choices = []
+        missing = []
 
-                # select the current line
-                current_line = self.view.line(region)
-                # print_region_info(current_line)
+        for link in links:
+            if _url_pattern.match(link):
+                targets.append(link)
+                continue
 
-                # translate the cursor position to the line coordinate
-                # system. Essentially we are calculation the column
-                # position
-                cursor_position = region.a - current_line.a
+            path = cache.get(project, relative_to, link)
 
-                # the column is 1 based
-                # print(cursor_position + 1)
+            if path is None:
+                # absolute, relative to the note, relative to one of
+                # the project folders, then by basename anywhere in
+                # the project
+                paths, exact = index.resolve(link, relative_to)
 
-                # get the string representing the entire line
-                full_line_text = self.view.substr(current_line)
+                if exact:
+                    path = paths[0]
+                    cache.put(project, relative_to, link, path)
 
-                # ---
-                quoted_string = find_largest_quoted_substring(full_line_text)
-                # print("quoted_string: ", full_line_text[slice(*quoted_string)])
+                elif paths:
+                    choices.append((link, paths))
 
-                markdown_links = find_markdown_links(full_line_text)
+                else:
+                    missing.append(link)
 
-                potential_path = None
+            if path is not None and path not in targets:
+                targets.append(path)
 
+        count = launcher().open(targets) if targets else 0
 
+        if missing:
+            sublime.status_message("Opening {} link(s), not found: {}".format(count, ", ".join(missing)))
 
+        elif targets:
+            sublime.status_message("Opening {} link(s)".format(count))
 
-                if quoted_string:
-                    start_index, end_index = quoted_string
-                    potential_path = full_line_text[start_index: end_index]
+        # let the user pick from the best guesses, one link at a time
+        self.choose(view.window(), choices, project, relative_to)
 
-                if markdown_links:
+        sublime.set_timeout_async(cache.save, 0)
 
-                    for md_link in markdown_links:
-                        link_text, link_url, start_index, end_index = md_link
-                        if start_index <= cursor_position <= end_index:
-                            potential_path = link_url
-                            break
+    def choose(self, window, choices, project, relative_to):
 
-                if potential_path is None:
-                    # ----
-                    # Find white spaces by index
+        if not choices:
+            return
 
-                    whitespaces = find_whitespace_positions(full_line_text)
-                    # print(whitespaces)
+        link, paths = choices[0]
 
-                    if whitespaces is None:
-                        potential_path = full_line_text
+        def on_select(index):
+            if index >= 0:
+                # the choice is where the link goes from now on
+                resolved_links().put(project, relative_to, link, paths[index])
+                open_with_default_app(paths[index])
 
-                    else:
+            self.choose(window, choices[1:], project, relative_to)
 
-                        left_items = [index for index in whitespaces if index <= cursor_position]
-                        left_index = max(left_items) if left_items else 0
+        window.show_quick_panel(paths, on_select)
 
+    def links_at(self, region):
+        """
+        Return the links in the region, the one under the cursor for an
+        empty region, each line of a selection otherwise.
+        """
 
-                        right_items = [index for index in whitespaces if index >= cursor_position]
-                        right_index = min(right_items) if right_items else len(full_line_text)
+        view = self.view
 
-                        # # figure out where in the list of whitespaces the cursor would fit
-                        # insert_cursor = bisect.bisect_left(whitespaces, cursor_position)
-                        # print(insert_cursor)
+        if not region.empty():
+            # use the selected text
+            return [line.strip().replace("%20", " ") for line in view.substr(region).split("\n")]
 
-                        potential_path = full_line_text[left_index:right_index].lstrip()
-                        # print(potential_path)
+        row, col = view.rowcol(region.b)
+        index = LinkIndexListener.index(view)
+        link = index.at(row, col)
 
-            else:
-                # use the selected text
-                potential_path = self.view.substr(region).strip()
+        if link is not None:
+            target = index.target(link)
+
+            if target is None:
+                print("[{}] is not defined".format(link.target))
+                return []
+
+            # [[Note Name]] names a note without the extension
+            if link.kind == "wiki" and not os.path.splitext(target)[1]:
+                target += ".md"
 
             # the strings may have %20 sometimes that are the html for
             # spaces in markdown
-            potential_path = potential_path.replace("%20", " ")
+            return [target.replace("%20", " ")]
 
-            if potential_path is not None:
-                print(potential_path)
+        # not on a link, use the text between the whitespace around the
+        # cursor
+        full_line_text = view.substr(view.line(region))
+        whitespaces = find_whitespace_positions(full_line_text) or []
 
-                if os.path.exists(potential_path):
-                    open_with_default_app(potential_path)
-                    print('Opening absolute path...')
-                    return
+        i = bisect.bisect_right(whitespaces, col)
+        left_index = whitespaces[i - 1] if i > 0 else 0
+        right_index = whitespaces[i] if i < len(whitespaces) else len(full_line_text)
 
-                # Is the path a relative path of the project?
+        return [full_line_text[left_index:right_index].strip().replace("%20", " ")]
 
-                project_properties = self.view.window().extract_variables()
 
-                if "folder" in project_properties:
+# Sublime Text 4 reports the rows every edit changed (see
+# `LinkIndexChanges`), Sublime Text 3 only the cursor rows can be
+# recorded
+exact_changes = hasattr(sublime_plugin, "TextChangeListener")
 
-                    root = project_properties["folder"]
-                    full_path = os.path.join(root, potential_path)
 
-                    # normalize the path as we might have .. or . or ./
-                    # in it...
-                    full_path = os.path.normpath(full_path)
+class _ViewLinks(object):
+    """
+    The link index of a single view.
+    """
 
-                    if os.path.exists(full_path):
-                        open_with_default_app(full_path)
-                        print('Opening relative path...')
-                        return
+    def __init__(self):
+        self.index = LinkIndex()
 
+        # the rows the edits since the last update can have changed
+        self.changes = ChangedRows(exact_changes)
+        self.modified = False
 
-# ----
+        # rebuild the index from scratch on the next update
+        self.full = True
 
-# ctrl+` -> view.run_command("select_empty_lines")
-class SelectEmptyLinesCommand(sublime_plugin.TextCommand):
+
+class LinkIndexListener(sublime_plugin.EventListener):
     """
-    Takes a view and selects all of the empty lines
+    Keep an index of the links in each view (markdown, reference, wiki
+    and quoted links, urls and bare paths, see `bluebill.links`) for
+    opening the link under the cursor and moving between links.
+
+    The index of a view is built the first time it is needed. After
+    that the next lookup scans only the rows the edits changed again
+    and moves the rest. The rows are reported by the editor
+    (`LinkIndexChanges`), or in Sublime Text 3 bounded by the cursor
+    rows recorded on every edit, an edit not made at the cursors
+    (Replace All, another plugin) rebuilds the index.
     """
-    def run(self, edit):
 
-        print("Selecting empty lines...")
+    views = {}
 
-        # construct a region that encompasses the entire view
-        r = sublime.Region(0, self.view.size())
+    # The most rows an update will scan before it rebuilds the index
+    # instead.
+    max_incremental_rows = 2000
 
-        # split the view region up into a list of regions containing that
-        # encapsulates lines within the buffer
-        lines = self.view.split_by_newlines(r)
+    @classmethod
+    def index(cls, view):
+        """
+        Return the `LinkIndex` of the view, up to date with its text.
+        """
 
-        # ----------------
-        # Strip empty lines from the start and ends of the buffer
-        empty_start_lines = True
-        empty_end_lines = True
-        while empty_start_lines or empty_end_lines:
-            if len(lines[0]) == 0:
-                lines.pop(0)
-            else:
-                empty_start_lines = False
+        state = cls.views.get(view.id())
+
+        if state is None:
+            state = cls.views[view.id()] = _ViewLinks()
+
+        index = state.index
+        line_count = view.rowcol(view.size())[0] + 1
+
+        bounds = state.changes.bounds(line_count) if state.modified else None
+
+        if not state.full and state.modified and bounds is None:
+            # modified, but no rows to go on
+            state.full = True
+
+        if not state.full and bounds is not None:
+            first, old_last, last = bounds
+
+            if last - first > cls.max_incremental_rows or old_last < first - 1:
+                state.full = True
 
-            if len(lines[-1]) == 0:
-                lines.pop(-1)
             else:
-                empty_end_lines = False
-        # ----------------
+                region = sublime.Region(view.text_point(first, 0), view.line(view.text_point(last, 0)).b)
+                index.replace_rows(first, old_last, view.substr(region))
+
+                if index.line_count != line_count:
+                    state.full = True
 
-        # ----------------
-        # Remove empty adjacent lines. That is, if we have an empty line
-        # in the list and the next line is empty, remove that next line
-        # from the list, we don't want to select it
+        if state.full:
+            index.rescan(view.substr(sublime.Region(0, view.size())))
+            state.full = False
 
-        new_list = []
+        state.modified = False
+        state.changes.reset(cursor_rows(view))
 
-        previous_empty = False
-        for l in lines:
+        return index
 
-            if len(l) > 0:
-                new_list.append(l)
-                previous_empty = False
+    def on_modified(self, view):
+
+        state = self.views.get(view.id())
+
+        if state is None:
+            return
+
+        state.modified = True
+
+        if not exact_changes:
+            if edited_at_cursors(view):
+                state.changes.record(cursor_rows(view))
 
             else:
-                if not previous_empty:
-                    new_list.append(l)
-                    previous_empty = True
+                state.full = True
 
-        lines = new_list
-        # ----------------
+    def on_selection_modified(self, view):
 
-        empty_lines = [l for l in lines if l.size() == 0]
+        state = self.views.get(view.id())
 
-        self.view.sel().clear()
+        if state is not None and not exact_changes:
+            if state.modified:
+                state.changes.record(cursor_rows(view))
 
-        for el in empty_lines:
-            self.view.sel().add(el)
+            else:
+                state.changes.reset(cursor_rows(view))
 
-        print('{} empty lines selected.'.format(len(empty_lines)))
+    def on_activated(self, view):
 
+        # the file may have been changed outside of the view
+        state = self.views.get(view.id())
 
-def find_regions_by_selections(view):
+        if state is not None:
+            state.full = True
+
+    def on_reload(self, view):
+        self.on_activated(view)
+
+    def on_revert(self, view):
+        self.on_activated(view)
+
+    def on_close(self, view):
+        self.views.pop(view.id(), None)
+
+
+if exact_changes:
+
+    class LinkIndexChanges(sublime_plugin.TextChangeListener):
+        """
+        Record the rows every edit changed for the link indexes of the
+        views of the buffer, see `LinkIndexListener`.
+        """
+
+        @classmethod
+        def is_applicable(cls, buffer):
+            return True
+
+        def on_text_changed(self, changes):
+
+            for view in self.buffer.views():
+                state = LinkIndexListener.views.get(view.id())
+
+                if state is None:
+                    continue
+
+                state.modified = True
+
+                for change in changes:
+                    state.changes.changed(change.a.row, change.b.row, change.a.row + change.str.count("\n"))
+
+
+# ctrl+` -> view.run_command("move_to_link", {"forward": True})
+class MoveToLinkCommand(sublime_plugin.TextCommand):
     """
-    Take the view and split it up into regions based on the cursor(s) location.
-    If there is one cursor, two regions will be returned. If there are 2 cursors, 3
-    regions will be returned.
+    Select the next link after the cursor, or the previous one before
+    it, see `LinkIndexListener`.
+
+    # Usage
+
+    view.run_command("move_to_link")
+    view.run_command("move_to_link", {"forward": False})
+
     """
 
-    # Determine where to split the document
-    values = set()
-    sel = view.sel();
-    for s in sel:
-        r,c = view.rowcol(s.a)
-        values.add(r)
+    def run(self, edit, forward=True):
 
-        r,c = view.rowcol(s.b)
-        values.add(r)
+        view = self.view
+        sel = view.sel()
 
-    # the set isn't sorted
-    values = sorted(values)
+        if len(sel) == 0:
+            return
 
-    # collect the areas into regions, starting at the beginning
-    # of the document to the first
-    regions = []
-    a = 0
-    for row in values:
-        b = view.text_point(row, 0)
+        index = LinkIndexListener.index(view)
 
-        # construct a region to capture the 'in-between' text
-        r = sublime.Region(a, b)
+        if forward:
+            row, col = view.rowcol(sel[-1].end())
+            found = index.next(row, col)
 
-        # Make sure there are enough characters. There has to be
-        # more than 2 char (i.e. \n) for us to consider it a valid region
-        if r.size() > 1:
-            regions.append(r)
+        else:
+            row, col = view.rowcol(sel[0].begin())
+            found = index.previous(row, col)
 
-        a = b
+        if found is None:
+            sublime.status_message("No {} link".format("next" if forward else "previous"))
+            return
 
-    # capture the last part of the file
-    r = sublime.Region(a, view.size())
-    if r.size() > 1:
-        regions.append(r)
+        row, link = found
+        region = sublime.Region(view.text_point(row, link.start), view.text_point(row, link.end))
 
-    return regions
+        sel.clear()
+        sel.add(region)
+        view.show(region)
 
-def random_4_digit_hex():
+
+# ----
+# Broken links
+
+# Whether a path exists, shared by every check, see
+# `bluebill.linkcheck.StatCache`
+_stat_cache = None
+
+# one check at a time
+_link_check_lock = threading.Lock()
+
+
+def link_checker(window):
+    """
+    Return a `bluebill.linkcheck.LinkChecker` for the window's project
+    folders. The settings `link_check_workers` (threads) and
+    `link_check_cache_seconds` (how long an existing or missing file is
+    remembered) are read when the stat cache is created.
     """
-    Generate a random 4 digit hex value between 4096 (0x1000) and 65535 (0xffff)
 
-    # Return
+    global _stat_cache
 
-    Random hex string between between 4096 (0x1000) and 65535 (0xffff)
+    settings = sublime.load_settings("Bluebill.sublime-settings")
 
-    # Note
+    if _stat_cache is None:
+        _stat_cache = linkcheck.StatCache(ttl=settings.get("link_check_cache_seconds", 30))
 
-    >>> from random import randint
-    >>> print(f'{randint(4096, 65535):x}')
-    2ec7
+    return linkcheck.LinkChecker(
+        window.folders(),
+        index=file_index(window),
+        stats=_stat_cache,
+        workers=settings.get("link_check_workers", 8),
+    )
 
-    4 Digit:
-    >>> int(0x1000)
-    4096
-    >>> int(0xffff)
-    65535
 
-    5 digit:
-    >>> int(0xfffff)
-    1048575
-    >>> int(0x10000)
-    65536
+def show_broken_links(window, broken, checked, elapsed):
+    """
+    List the broken links in the bluebill_broken_links output panel,
+    double click a line to go to the link.
+    """
+
+    lines = [linkcheck.format_broken(b) for b in broken]
+    lines.append("{:,} broken link(s) in {:,} note(s), {:.2f}s".format(len(broken), checked, elapsed))
+
+    panel = window.create_output_panel("bluebill_broken_links")
+    panel.settings().set("result_file_regex", linkcheck.result_file_regex)
+    panel.run_command("append", {"characters": "\n".join(lines) + "\n"})
+    window.run_command("show_panel", {"panel": "output.bluebill_broken_links"})
 
+    sublime.status_message("{:,} broken link(s)".format(len(broken)))
+
+
+# ctrl+` -> view.run_command("check_links")
+class CheckLinksCommand(sublime_plugin.TextCommand):
     """
+    List the markdown, reference, wiki and quoted path links in the view
+    that don't resolve to a file (the way `open_links` resolves them) in
+    an output panel. The check runs in the background.
 
-    lower = 4096
-    upper = 65535
+    # Usage
 
-    return "{:x}".format(randint(lower, upper))
+    view.run_command("check_links")
 
-def suggest_date_based_name(extension):
     """
 
-    Generate a file string based on the current date and a random 4 digit
-    hex number
+    def run(self, edit):
 
-    # Parameters
+        view = self.view
+        window = view.window()
 
-    extension - str
-        - the file extension to use (.txt, .md)
+        if not _link_check_lock.acquire(False):
+            sublime.status_message("Check links: already running")
+            return
 
-    # Returns
+        text = view.substr(sublime.Region(0, view.size()))
+        path = view.file_name() or view.name() or "untitled"
+        checker = link_checker(window)
 
-    A new name based on the current date and a random hex number.
+        def check():
 
-    """
+            try:
+                start = time.time()
 
-    return '{} [{}]{}'.format(datetime.now().date().isoformat(), random_4_digit_hex(), extension)
+                broken = checker.check_text(text, path, parallel=True)
 
+                elapsed = time.time() - start
 
-# # NOTE: Need to install PackageDev to get access to the PathLib for Sublime v3.2.2 Build 3211
-# def new_view_from_lines(window, lines, view_name):
-#     """
-#     Creates a new view in sublime text that isn't saved yet. The view will be populated
-#     with the lines in the list.
+            finally:
+                _link_check_lock.release()
 
-#     # Parameters
+            sublime.set_timeout(lambda: show_broken_links(window, broken, 1, elapsed), 0)
 
-#     edit
+        sublime.set_timeout_async(check, 0)
 
-#     window - Window
-#         - the sublime text window object
 
-#     lines - str
-#         - Represents the string to write to the view.
+# ctrl+` -> window.run_command("check_project_links")
+class CheckProjectLinksCommand(sublime_plugin.WindowCommand):
+    """
+    `check_links` for every note in the project folders. The notes are
+    read and checked on a thread pool.
 
-#     view_name - str
-#         - the name of the buffer
+    # Usage
 
-#     """
+    window.run_command("check_project_links")
 
-#     new_view = window.new_file()
-#     new_view.set_name(view_name)
-#     new_view.run_command("bluebill_insert_text", {'start':0, 'text':lines})
+    """
 
-#     return new_view
+    def run(self):
 
+        window = self.window
+        folders = window.folders()
 
-# # ctrl+` -> view.run_command("bluebill_new_note_view", {'text': new_text})
-# class BluebillNewNoteViewCommand(sublime_plugin.TextCommand):
-#     """
-#     Create a new view for a note based and insert the text.
-#     """
+        if not folders:
+            sublime.status_message("Check links: no project folders")
+            return
 
-#     def run(self, edit, text):
-#         """
-#         Create a new view based and insert the text. The view will be named
-#         using an iso date suitable for a note in the system.
+        if not _link_check_lock.acquire(False):
+            sublime.status_message("Check links: already running")
+            return
 
-#         # Parameters
+        sublime.status_message("Check links: checking {} folder(s)...".format(len(folders)))
+        checker = link_checker(window)
 
-#         edit - Edit
-#             - The edit object to identify this operation.
+        def check():
 
-#         text str
-#             - The text to insert.
+            try:
+                start = time.time()
 
-#         root str
-#             - The path that we want to store the view in
+                paths = list(note_files(folders))
+                broken = list(checker.check_files(paths))
 
-#         # Usage
+                elapsed = time.time() - start
 
-#         view.run_command("bluebill_new_note_view", {'text': new_text})
-#         """
+            finally:
+                _link_check_lock.release()
 
-#         fn = suggest_date_based_name(".md")
-#         nv = new_view_from_lines(self.view.window(), text, fn)
+            sublime.set_timeout(lambda: show_broken_links(window, broken, len(paths), elapsed), 0)
 
-#         # This doesn't work the way I want it. It just saves it without prompting
-#         # if root:
-#         #     # retarget requires the complete path so when the user saves, it opens in a folder
-#         #     # we are interested in.
-#         #     nv.retarget(str(Path(root).joinpath(fn)))
+        sublime.set_timeout_async(check, 0)
 
 
-# # ctrl+` -> view.run_command("clone_current_view")
-# class CloneCurrentViewCommand(sublime_plugin.TextCommand):
-#     """
-#     Make a clone of the currently active view with different file name.
+# ----
+# Project notes
 
-#     Useful when you need to make a new meeting note or other notes from an existing one.
+class _ProjectCache(object):
+    """
+    A cache of the notes in the project folders, `bluebill.linkgraph`
+    or `bluebill.search`, kept in the cache folder between sessions.
 
-#     It will create a new view, copy all of the text and insert it and name the file
-#     based on the current date and hex code.
+    It is loaded on first use and brought up to date with the folders
+    of a window the first time it is used with them in a session, in the
+    background. After that the notes that are saved keep it current.
 
-#     """
+    # Parameters
 
-#     def run(self, edit):
+    name - str
+        - For the status messages.
 
-#         active_view = self.view
-#         r = sublime.Region(0, active_view.size())
+    create - callable
+        - Called with the cache file, returns the cache.
 
-#         self.view.run_command("bluebill_new_note_view", {'text': active_view.substr(r)})
+    filename - str
+        - The cache file, in the cache folder.
 
+    """
 
-# # ctrl+` -> view.run_command("new_note_menu")
-# class NewNoteMenuCommand(sublime_plugin.TextCommand):
-#     """
-#     Display a menu to allow the user to select what kind of template to apply
-#     when creating a new note.
+    def __init__(self, name, create, filename):
+        self.name = name
+        self.create = create
+        self.filename = filename
 
-#     """
+        self.cache = None
 
-#     def __init__(self, view):
-#         super().__init__(view)
+        # the folders the cache was brought up to date with
+        self.folders = set()
 
-#         self.menu_options = [('Clone Active View', "clone_current_view")]
+        self.lock = threading.Lock()
 
-#         # Get the root project folder name
-#         if self.view.window().project_file_name():
-#             project = Path(self.view.window().project_file_name()).resolve()
+    def get(self):
 
-#             # Does the template folder (.templates) exist?
-#             template_folder = project.parent.joinpath('.templates')
-#             if template_folder.exists():
+        if self.cache is None:
+            self.cache = self.create(os.path.join(sublime.cache_path(), "Bluebill", self.filename))
+            self.cache.load()
 
-#                 # Construct the menu:
-#                 for f in template_folder.glob("*"):
-#                     self.menu_options.append((f.stem, f))
+        return self.cache
 
+    def use(self, window, callback):
+        """
+        Call back with the cache once it is up to date with the window's
+        project folders, right away after the first time.
+        """
 
-#     def run(self, edit):
+        folders = tuple([os.path.normpath(f) for f in window.folders()])
 
-#         # find the .templates folder - it should be in the path of the project
+        if folders in self.folders:
+            callback(self.cache)
+            return
 
-#         # find the files in the .templates folder, the name of the file will be the menu name
+        if not self.lock.acquire(False):
+            sublime.status_message("{}: already scanning".format(self.name))
+            return
 
-#         # present the menu of choices to the user
+        sublime.status_message("{}: scanning {} folder(s)...".format(self.name, len(folders)))
+        index = file_index(window)
 
+        def update():
 
-#         #https://www.sublimetext.com/docs/3/api_reference.html#sublime.Window
-#         self.view.window().show_quick_panel([m for m, c in self.menu_options], self.on_done)
+            try:
+                # a large cache takes a while to load, not on the UI
+                # thread
+                cache = self.get()
 
-#         # show_quick_panel(items, on_done, <flags>, <selected_index>, <on_highlighted>)
-#         # self.view.show_popup_menu(['foo', 'bar'], self.done)
+                paths, scanned = cache.update(folders, index)
+                cache.save()
+                self.folders.add(folders)
 
+            finally:
+                self.lock.release()
 
-#     def on_done(self, selected_index):
-#         """
-#         This method is called when the menu is done showing and the user made a choice.
+            sublime.status_message("{}: {:,} notes, {:,} scanned".format(self.name, len(paths), scanned))
+            sublime.set_timeout(lambda: callback(cache), 0)
 
-#         The selected_index will contain the index integer of the users choice. If they canceled
-#         the value will be -1.
+        sublime.set_timeout_async(update, 0)
 
-#         """
+    def saved(self, view):
+        """
+        Scan a saved note again, if the cache is in use for its project.
+        """
 
-#         if selected_index < 0:
-#             print('User canceled.')
+        folders = tuple([os.path.normpath(f) for f in view.window().folders()])
 
-#         # Did the user select the Clone option?
-#         elif selected_index == 0:
-#             m, c = self.menu_options[selected_index]
-#             self.view.run_command(c)
+        if folders not in self.folders or not view.file_name().endswith(note_extensions):
+            return
 
-#         else:
-#             m, f = self.menu_options[selected_index]
+        path = view.file_name()
+        text = view.substr(sublime.Region(0, view.size()))
+        index = file_index(view.window())
+        cache = self.get()
 
-#             note_template = Path(f)
-#             with note_template.open("r", encoding="utf-8") as f:
-#                 text = f.read()
+        def scan():
 
-#                 # The file text will be following the python Template library for syntax
-#                 # https://docs.python.org/3/library/string.html
-#                 t = Template(text)
+            try:
+                st = os.stat(path)
 
-#                 # We only recognize the $Date variable right now
-#                 s = t.substitute(Date=datetime.now().date().isoformat())
+            except OSError:
+                return
 
-#                 # root = None
-#                 # if self.view.window().project_file_name():
-#                 #     root = Path(self.view.window().project_file_name()).resolve().parent
+            cache.scan(path, text, index, st.st_mtime_ns, st.st_size)
 
-#                 self.view.run_command("bluebill_new_note_view", {'text': s})
+        sublime.set_timeout_async(scan, 0)
 
-# ==============
-# Older methods that may not be required any more
+    def save(self):
 
-# def new_view_from_region(index, current_view, regions):
-#     """
-#     Takes the current view and a region within that view and constructs
-#     a new view from it.
-#     """
+        if self.cache is not None:
+            self.cache.save()
 
-#     # at this point, the text is split up into regions based
-#     # on the cursor positions within the document. Insert the
-#     # region into a new documents
-#     new_view = current_view.window().new_file()
-#     # new_view.insert(edit, 0 , '\n'.join([current_view.substr(r) for r in regions]))
-#     new_view.run_command("bluebill_insert_text", {'start':0, 'text':'\n'.join([current_view.substr(r) for r in regions])})
 
-#     # print(current_view.name())
-#     # print(current_view.file_name())
+# The links between the notes, see `bluebill.linkgraph`
+_link_graph = _ProjectCache("Link graph", linkgraph.LinkGraph, "link_graph.json")
 
-#     # capture the name of the current view as a default
-#     view_name = current_view.name()
+# The words of the notes, see `bluebill.search`
+_search_index = _ProjectCache("Search index", search.SearchIndex, "search_index.json")
 
-#     # if the view has a file name, use that to generate a view name.
-#     if current_view.file_name():
 
-#         # Capture the original path
-#         original_path = Path(current_view.file_name()).resolve()
+def _project_path(window, path):
+    """
+    Return the path relative to the project folder it is in.
+    """
 
-#         # Construct a new path based on the original
-#         new_path = original_path.parent.joinpath('{} ({}){}'.format(original_path.stem,
-#                                                                     index,
-#                                                                     original_path.suffix))
+    for folder in window.folders():
+        if path.startswith(os.path.join(folder, "")):
+            return os.path.relpath(path, folder)
 
-#         # Link the new view to the new path
-#         new_view.retarget(str(new_path))
+    return path
 
-#         # set the new views name - TBW 2020-06-20 - this isn't required
-#         # view_name = new_path.name
 
-#         # save the view
-#         new_view.run_command('save')
+# ctrl+` -> view.run_command("show_backlinks")
+class ShowBacklinksCommand(sublime_plugin.TextCommand):
+    """
+    List the notes that link to this one in a quick panel, selecting
+    one opens it at the link.
 
-#     # TBW 2020-06-20 - This isn't required
-#     # new_view.set_name(str(view_name))
+    # Usage
 
+    view.run_command("show_backlinks")
 
-# # ctrl+` -> view.run_command("split_by_selection")
-# class SplitBySelectionCommand(sublime_plugin.TextCommand):
-#     """
-#     The idea is that if the user places the cursor on a line in the
-#     document we can generate two documents, one with the top portion and the
-#     other with the bottom portion (including the selected line). If 3 lines are
-#     selected, we are only interested in the row numbers, but 3 files will be generated.
-#     """
-#     def run(self, edit):
-#         print('Splitting the view into regions based on the cursor position(s).')
+    """
 
-#         regions = find_regions_by_selections(self.view)
+    def run(self, edit):
 
-#         for i, r in enumerate(regions):
+        path = self.view.file_name()
+        window = self.view.window()
 
-#             # print('Region {} ->'.format(i))
-#             # print()
-#             # print(self.view.substr(r))
-#             # print()
-#             # print('<<<<<>>>>>>')
+        if not path:
+            sublime.status_message("Backlinks: the view has not been saved")
+            return
 
-#             new_view_from_region(i, self.view, edit, [r])
+        def show(graph):
 
+            found = graph.backlinks(path)
 
-# # ctrl+` -> view.run_command("split_by_selection_and_append")
-# class SplitBySelectionAndAppendCommand(sublime_plugin.TextCommand):
-#     """
-#     The idea is that if the user places the cursor on a line in the
-#     document we can generate two documents, one with the top portion and the
-#     other with the bottom portion (including the selected line). If 3 lines are
-#     selected, we are only interested in the row numbers, but 3 files will be generated.
-#     """
-#     def run(self, edit):
+            if not found:
+                sublime.status_message("No notes link to {}".format(os.path.basename(path)))
+                return
 
-#         print('Splitting the view into regions based on the cursor position(s) and appending them to the first section.')
-#         regions = find_regions_by_selections(self.view)
+            items = [[os.path.basename(source), "line {}  {}".format(row + 1, _project_path(window, source))] for source, row in found]
 
-#         for i, r in enumerate(regions[1:]):
+            def on_select(index):
+                if index >= 0:
+                    source, row = found[index]
+                    window.open_file("{}:{}".format(source, row + 1), sublime.ENCODED_POSITION)
 
-#             # print('Region {} ->'.format(i))
-#             # print()
-#             # print(self.view.substr(r))
-#             # print()
-#             # print('<<<<<>>>>>>')
+            window.show_quick_panel(items, on_select)
+
+        _link_graph.use(window, show)
+
+
+# ctrl+` -> window.run_command("show_orphan_notes")
+class ShowOrphanNotesCommand(sublime_plugin.WindowCommand):
+    """
+    List the notes in the project that no other note links to in a
+    quick panel, selecting one opens it.
+
+    # Usage
+
+    window.run_command("show_orphan_notes")
+
+    """
+
+    def run(self):
+
+        window = self.window
+
+        def show(graph):
+
+            found = graph.orphans(window.folders())
+
+            if not found:
+                sublime.status_message("No orphan notes")
+                return
+
+            items = [[os.path.basename(path), _project_path(window, path)] for path in found]
+
+            def on_select(index):
+                if index >= 0:
+                    window.open_file(found[index])
+
+            window.show_quick_panel(items, on_select)
+
+        _link_graph.use(window, show)
+
+
+def _line_at(path, row):
+    """
+    Return the row of the file, stripped, or an empty string.
+    """
+
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in itertools.islice(f, row, row + 1):
+                return line.strip()
+
+    except (IOError, OSError):
+        pass
+
+    return ""
+
+
+# ctrl+` -> window.run_command("search_notes", {"query": "budget review"})
+class SearchNotesCommand(sublime_plugin.WindowCommand):
+    """
+    Search the text of every note in the project and list the notes
+    with all of the words, best first, in a quick panel. Selecting one
+    opens it at the line with the most words. The last word can be the
+    start of a word. See `bluebill.search`.
+
+    # Usage
+
+    window.run_command("search_notes")
+    window.run_command("search_notes", {"query": "budget rev"})
+
+    """
+
+    def run(self, query=None):
+
+        if query is None:
+            self.window.show_input_panel("Search notes:", "", self.search, None, None)
+            return
+
+        self.search(query)
+
+    def search(self, query):
+
+        window = self.window
+
+        def show(index):
+
+            start = time.time()
+            hits = index.search(query, folders=window.folders())
+            elapsed = time.time() - start
+
+            if not hits:
+                sublime.status_message("No notes with {}".format(query))
+                return
+
+            sublime.status_message("{} note(s), {:.0f}ms".format(len(hits), elapsed * 1000))
+
+            items = [[_project_path(window, hit.path), "{}: {}".format(hit.row + 1, _line_at(hit.path, hit.row))] for hit in hits]
+
+            def on_select(i):
+                if i >= 0:
+                    window.open_file("{}:{}".format(hits[i].path, hits[i].row + 1), sublime.ENCODED_POSITION)
+
+            window.show_quick_panel(items, on_select)
+
+        _search_index.use(window, show)
+
+
+# ----
+
+# Characters read from the view at a time by the commands that scan the
+# whole buffer
+_chunk_size = 1 << 20
+
+
+def _view_chunks(view, size=_chunk_size):
+    """
+    Yield the text of the view in pieces of at most size characters, so
+    a large buffer is never copied out of the view in one piece.
+    """
+
+    end = view.size()
+
+    for a in range(0, end, size):
+        yield view.substr(sublime.Region(a, min(a + size, end)))
+
+
+# The line index of each view, see `bluebill.lineindex`
+_line_indexes = {}
+
+
+def line_index(view):
+    """
+    Return the line index of the view, built again from the text when
+    the view has changed since the last call.
+    """
+
+    index = _line_indexes.get(view.id())
+
+    if index is None or index.change_count != view.change_count():
+        index = _line_indexes[view.id()] = lineindex.LineIndex(_view_chunks(view), view.change_count())
+
+    return index
+
+
+# The fewest cursors worth reading the whole buffer into a line index
+# for, fewer are looked up in the view
+line_index_cursors = 100
+
+
+def cursors_index(view):
+    """
+    Return the line index of the view when it has at least
+    `line_index_cursors` cursors, None otherwise.
+    """
+
+    if len(view.sel()) < line_index_cursors:
+        return None
+
+    return line_index(view)
+
+
+class LineIndexListener(sublime_plugin.EventListener):
+    """
+    Drop the line index of a view when it is closed.
+    """
+
+    def on_close(self, view):
+        _line_indexes.pop(view.id(), None)
+
+
+# ctrl+` -> view.run_command("select_empty_lines")
+# ctrl+` -> view.run_command("select_empty_lines", {"mode": "runs", "whitespace": True})
+class SelectEmptyLinesCommand(sublime_plugin.TextCommand):
+    """
+    Takes a view and selects all of the empty lines, ignoring the ones
+    at the start and end of the buffer.
+
+    # Usage
+
+    mode - str
+        - first: the first empty line of each run of empty lines
+        - all: every empty line
+        - runs: each run of empty lines as one selection
+
+    whitespace - bool
+        - Lines of only spaces and tabs are empty too.
+
+    """
+    def run(self, edit, mode="first", whitespace=False):
+
+        print("Selecting empty lines...")
+
+        sel = self.view.sel()
+        sel.clear()
+
+        count = 0
+        for a, b in buffer.blank_lines(_view_chunks(self.view), mode, whitespace):
+            sel.add(sublime.Region(a, b))
+            count += 1
+
+        # leave a cursor behind when there was nothing to select
+        if not count:
+            sel.add(sublime.Region(0))
+
+        print('{} empty lines selected.'.format(count))
+        sublime.status_message('{:,} empty line(s) selected'.format(count))
+
+
+# ctrl+` -> view.run_command("normalize_whitespace")
+# ctrl+` -> view.run_command("normalize_whitespace", {"blank_lines": None, "trailing": True, "trim": False})
+class NormalizeWhitespaceCommand(sublime_plugin.TextCommand):
+    """
+    Collapse the runs of blank lines, strip the whitespace at the end of
+    the lines and remove the blank lines at the start and end of the
+    buffer, in one scan. Only the whitespace that changes is edited and
+    all of it is one step in the undo history.
+
+    # Usage
+
+    blank_lines - int
+        - The most blank lines in a row, None leaves them alone.
+
+    trailing - bool
+        - Strip the spaces and tabs at the end of the lines.
+
+    trim - bool
+        - Remove the blank lines at the start and end of the buffer.
+
+    """
+    def run(self, edit, blank_lines=1, trailing=True, trim=True):
+
+        edits = buffer.whitespace_edits(_view_chunks(self.view), blank_lines, trailing, trim)
+
+        _apply_edits(self.view, edit, edits)
+
+        if edits:
+            sublime.status_message("Whitespace: {:,} change(s), {:,} character(s) removed".format(len(edits), sum([b - a for a, b, text in edits])))
+
+        else:
+            sublime.status_message("Whitespace: nothing to change")
+
+
+def find_regions_by_selections(view):
+    """
+    Take the view and split it up into regions based on the cursor(s) location.
+    If there is one cursor, two regions will be returned. If there are 2 cursors, 3
+    regions will be returned.
+    """
+
+    return [sublime.Region(a, b) for a, b in buffer.find_regions_by_selections(view, cursors_index(view))]
+
+def random_4_digit_hex():
+    """
+    Generate a random 4 digit hex value between 4096 (0x1000) and 65535 (0xffff)
+
+    # Return
+
+    Random hex string between between 4096 (0x1000) and 65535 (0xffff)
+
+    # Note
+
+    >>> from bluebill import ids
+    >>> value = ids.hex_ids(1, digits=4)[0]
+    >>> len(value), 4096 <= int(value, 16) <= 65535
+    (4, True)
+
+    4 Digit:
+    >>> int(0x1000)
+    4096
+    >>> int(0xffff)
+    65535
+
+    5 digit:
+    >>> int(0xfffff)
+    1048575
+    >>> int(0x10000)
+    65536
+
+    """
+
+    return ids.hex_ids(1, digits=4)[0]
+
+def suggest_date_based_name(extension):
+    """
+
+    Generate a file string based on the current date and a random 4 digit
+    hex number
+
+    # Parameters
+
+    extension - str
+        - the file extension to use (.txt, .md)
+
+    # Returns
+
+    A new name based on the current date and a random hex number.
+
+    """
+
+    return '{} [{}]{}'.format(datetime.now().date().isoformat(), random_4_digit_hex(), extension)
+
+
+# ----
+# New notes
+
+def new_view_from_lines(window, lines, view_name):
+    """
+    Creates a new view in sublime text that isn't saved yet. The view will be populated
+    with the lines in the list.
+
+    # Parameters
+
+    window - Window
+        - the sublime text window object
+
+    lines - str
+        - Represents the string to write to the view.
+
+    view_name - str
+        - the name of the buffer
+
+    """
+
+    new_view = window.new_file()
+    new_view.set_name(view_name)
+    new_view.run_command("append", {'characters': lines})
+
+    return new_view
+
+
+# ctrl+` -> view.run_command("bluebill_new_note_view", {'text': new_text})
+class BluebillNewNoteViewCommand(sublime_plugin.TextCommand):
+    """
+    Create a new view for a note based and insert the text.
+    """
+
+    def run(self, edit, text, name=None):
+        """
+        Create a new view based and insert the text. The view will be named
+        using an iso date suitable for a note in the system.
+
+        # Parameters
+
+        edit - Edit
+            - The edit object to identify this operation.
+
+        text str
+            - The text to insert.
+
+        name str
+            - The name of the view, a new `suggest_date_based_name` if None.
+
+        # Usage
+
+        view.run_command("bluebill_new_note_view", {'text': new_text})
+        """
+
+        new_view_from_lines(self.view.window(), text, name or suggest_date_based_name(".md"))
+
+
+# One TemplateFolder per .templates folder, see `bluebill.templates`
+_template_folders = {}
+
+
+def _project_name(window):
+    """
+    Return the name of the project file without the extension, or the
+    name of the first folder.
+    """
+
+    if window.project_file_name():
+        return os.path.splitext(os.path.basename(window.project_file_name()))[0]
+
+    if window.folders():
+        return os.path.basename(os.path.normpath(window.folders()[0]))
+
+    return ""
+
+
+def template_folder(window):
+    """
+    Return the TemplateFolder of the .templates folder next to the
+    project file (or in the first project folder), None if the window
+    has neither. The templates are compiled in the background the first
+    time a folder is used.
+    """
+
+    if window.project_file_name():
+        root = os.path.dirname(window.project_file_name())
+
+    elif window.folders():
+        root = window.folders()[0]
+
+    else:
+        return None
+
+    folder = os.path.normpath(os.path.join(root, '.templates'))
+
+    if folder not in _template_folders:
+        _template_folders[folder] = templates.TemplateFolder(folder)
+        sublime.set_timeout_async(_template_folders[folder].precompile, 0)
+
+    return _template_folders[folder]
+
+
+# ctrl+` -> view.run_command("new_note_menu")
+class NewNoteMenuCommand(sublime_plugin.TextCommand):
+    """
+    Display a menu to allow the user to select what kind of template to apply
+    when creating a new note.
+
+    The first choice clones the active view. The templates are the
+    files in the .templates folder next to the project, the name of the
+    file is the menu name. They are listed and compiled once and kept
+    until they change, see `bluebill.templates`. The variables are
+    $Date, $Time, $UUID, $Project and $Name (the file name of the note).
+
+    """
+
+    def run(self, edit):
+
+        window = self.view.window()
+        folder = template_folder(window)
+        names = folder.names() if folder is not None else []
+
+        def on_done(selected_index):
+            """
+            This method is called when the menu is done showing and the user made a choice.
+
+            The selected_index will contain the index integer of the users choice. If they canceled
+            the value will be -1.
+
+            """
+
+            if selected_index < 0:
+                return
+
+            # Did the user select the Clone option?
+            if selected_index == 0:
+                self.view.run_command("clone_current_view")
+                return
+
+            name = suggest_date_based_name(".md")
+            variables = templates.note_variables(datetime.now(), ids.new_ids("uuid4", 1)[0], _project_name(window), name)
+
+            try:
+                text = folder.render(names[selected_index - 1], variables)
+
+            except (OSError, UnicodeDecodeError, KeyError) as e:
+                sublime.status_message("New note: can't read the template {}: {}".format(names[selected_index - 1], e))
+                return
+
+            self.view.run_command("bluebill_new_note_view", {'text': text, 'name': name})
+
+        #https://www.sublimetext.com/docs/3/api_reference.html#sublime.Window
+        window.show_quick_panel(['Clone Active View'] + names, on_done)
+
+
+# Buffers larger than this many characters are cloned through a file
+# next to the original instead of the API, see `CloneCurrentViewCommand`
+clone_to_file_size = 16 << 20
+
+
+def _clone_note_path(view, name):
+    """
+    Return the path of a new note named name in the folder of the view's
+    file (or the first project folder), None if it has neither.
+    """
+
+    if view.file_name():
+        return os.path.join(os.path.dirname(view.file_name()), name)
+
+    folders = view.window().folders()
+
+    if folders:
+        return os.path.join(folders[0], name)
+
+    return None
+
+
+def _append_async(source, target, on_done=None):
+    """
+    Copy the text of the source view to the end of the target view a
+    chunk at a time, one chunk per pass of the UI thread so the editor
+    keeps responding. The copy stops if the source is edited.
+    """
+
+    end = source.size()
+    count = source.change_count()
+
+    def step(a):
+
+        if source.change_count() != count:
+            sublime.status_message("Clone stopped: the view was edited")
+            return
+
+        if a >= end:
+            if on_done is not None:
+                on_done()
+
+            return
+
+        b = min(a + _chunk_size, end)
+        target.run_command("append", {'characters': source.substr(sublime.Region(a, b))})
+
+        sublime.set_timeout(lambda: step(b), 0)
+
+    step(0)
+
+
+def _clone_to_file(view, path):
+    """
+    Write the text of the view to a new file in the background, a chunk
+    at a time (see `bluebill.split`), and open it.
+    """
+
+    window = view.window()
+    count = view.change_count()
+
+    def read(a, b):
+
+        if view.change_count() != count:
+            raise ValueError("the view was edited")
+
+        return view.substr(sublime.Region(a, b))
+
+    def work():
+
+        try:
+            split.write_parts(read, [(path, [(0, view.size())])], _chunk_size)
+
+        except (IOError, OSError, ValueError) as e:
+            sublime.status_message("Clone failed: {}".format(e))
+            return
+
+        sublime.set_timeout(lambda: window.open_file(path), 0)
+
+    sublime.set_timeout_async(work, 0)
+
+
+# ctrl+` -> view.run_command("clone_current_view")
+class CloneCurrentViewCommand(sublime_plugin.TextCommand):
+    """
+    Make a clone of the currently active view with different file name.
+
+    Useful when you need to make a new meeting note or other notes from an existing one.
+
+    It will create a new view, copy all of the text and insert it and name the file
+    based on the current date and hex code.
+
+    The text is copied a chunk at a time without blocking the editor.
+    A buffer larger than `clone_to_file_size` is written straight to
+    the new note's file next to the original, in the background, and
+    opened from there.
+
+    """
+
+    def run(self, edit):
+
+        view = self.view
+        name = suggest_date_based_name(os.path.splitext(view.file_name() or "")[1] or ".md")
+        path = _clone_note_path(view, name)
+
+        if view.size() > clone_to_file_size and path is not None:
+            _clone_to_file(view, path)
+            return
+
+        new_view = new_view_from_lines(view.window(), "", name)
+        _append_async(view, new_view)
+
+
+# ----
+# Split
+
+def _split_async(view, parts, open_files):
+    """
+    Write the parts of the view to their files in the background, a
+    chunk at a time (see `bluebill.split`), with the progress in the
+    status bar. The split stops if the view is edited before it is done.
+    """
+
+    window = view.window()
+    count = view.change_count()
+    shown = [-1]
+
+    def read(a, b):
+
+        if view.change_count() != count:
+            raise ValueError("the view was edited")
+
+        return view.substr(sublime.Region(a, b))
+
+    def progress(done, total):
+
+        percent = 100 * done // total if total else 100
+
+        if percent != shown[0]:
+            shown[0] = percent
+            sublime.status_message("Split: {}% of {:,} characters".format(percent, total))
+
+    def work():
+
+        try:
+            sizes = split.write_parts(read, parts, _chunk_size, progress)
+
+        except (IOError, OSError, ValueError) as e:
+            sublime.status_message("Split failed: {}".format(e))
+            return
+
+        sublime.status_message("Split into {} files, {:,} characters".format(len(sizes), sum(sizes)))
+
+        if open_files:
+            sublime.set_timeout(lambda: [window.open_file(path) for path, ranges in parts], 0)
+
+    sublime.set_timeout_async(work, 0)
+
+
+def _split_by_selection(view, command, path, append_first, open_files):
+
+    if path is None and view.file_name():
+        path = view.file_name()
+
+    if path is None:
+        folders = view.window().folders()
+        base = os.path.join(folders[0] if folders else os.path.expanduser("~"), view.name() or "untitled")
+
+        view.window().show_input_panel(
+            "Split into files named after:",
+            base if os.path.splitext(base)[1] else base + ".md",
+            lambda path: view.run_command(command, {"path": path, "open_files": open_files}),
+            None,
+            None,
+        )
+        return
+
+    parts = split.split_parts(path, buffer.find_regions_by_selections(view, cursors_index(view)), append_first)
+
+    if not parts:
+        sublime.status_message("Split: nothing to split")
+        return
+
+    _split_async(view, parts, open_files)
+
+
+# ctrl+` -> view.run_command("split_by_selection")
+class SplitBySelectionCommand(sublime_plugin.TextCommand):
+    """
+    The idea is that if the user places the cursor on a line in the
+    document we can generate two documents, one with the top portion and the
+    other with the bottom portion (including the selected line). If 3 lines are
+    selected, we are only interested in the row numbers, but 3 files will be generated.
+
+    The parts are written next to the file as `name (0).ext`,
+    `name (1).ext` and so on (skipping the numbers of files that are
+    already there), in the background, and are only opened if
+    open_files is true. An unsaved view asks for the name.
+
+    # Usage
+
+    view.run_command("split_by_selection")
+    view.run_command("split_by_selection", {"open_files": true})
+
+    """
+
+    def run(self, edit, path=None, open_files=False):
+        _split_by_selection(self.view, "split_by_selection", path, False, open_files)
+
+
+# ctrl+` -> view.run_command("split_by_selection_and_append")
+class SplitBySelectionAndAppendCommand(sublime_plugin.TextCommand):
+    """
+    The idea is that if the user places the cursor on a line in the
+    document we can generate two documents, one with the top portion and the
+    other with the bottom portion (including the selected line). If 3 lines are
+    selected, we are only interested in the row numbers, but 3 files will be generated.
+
+    The top portion is written at the start of every other part instead
+    of to a file of its own, see `SplitBySelectionCommand`.
+
+    """
 
-#             new_view_from_region(i, self.view, edit, [regions[0], r])
+    def run(self, edit, path=None, open_files=False):
+        _split_by_selection(self.view, "split_by_selection_and_append", path, True, open_files)